@@ -18,6 +18,8 @@ class Omni(CameraModel):
     geometry = aslam_cv.OmniCameraGeometry
     reprojectionError = OmniReprojectionError
     reprojectionErrorSimple = OmniReprojectionErrorSimple
+    reprojectionErrorMeasurements = OmniReprojectionErrorMeasurements
+    multiCornerReprojectionError = OmniMultiCornerReprojectionError
     designVariable = OmniCameraGeometryDesignVariable
     projectionType = aslam_cv.OmniProjection
     distortionType = aslam_cv.NoDistortion
@@ -28,6 +30,8 @@ class DistortedOmni(CameraModel):
     geometry = aslam_cv.DistortedOmniCameraGeometry
     reprojectionError = DistortedOmniReprojectionError
     reprojectionErrorSimple = DistortedOmniReprojectionErrorSimple
+    reprojectionErrorMeasurements = DistortedOmniReprojectionErrorMeasurements
+    multiCornerReprojectionError = DistortedOmniMultiCornerReprojectionError
     designVariable = DistortedOmniCameraGeometryDesignVariable
     projectionType = aslam_cv.DistortedOmniProjection
     distortionType = aslam_cv.RadialTangentialDistortion
@@ -38,6 +42,8 @@ class DistortedOmniRs(CameraModel):
     geometry = aslam_cv.DistortedOmniRsCameraGeometry
     reprojectionError = DistortedOmniRsReprojectionError
     reprojectionErrorSimple = DistortedOmniRsReprojectionErrorSimple
+    reprojectionErrorMeasurements = DistortedOmniRsReprojectionErrorMeasurements
+    multiCornerReprojectionError = DistortedOmniRsMultiCornerReprojectionError
     reprojectionErrorAdaptiveCovariance = DistortedOmniRsReprojectionErrorAdaptiveCovariance
     designVariable = DistortedOmniRsCameraGeometryDesignVariable
     projectionType = aslam_cv.DistortedOmniProjection
@@ -49,6 +55,8 @@ class DistortedPinhole(CameraModel):
     geometry = aslam_cv.DistortedPinholeCameraGeometry
     reprojectionError = DistortedPinholeReprojectionError
     reprojectionErrorSimple = DistortedPinholeReprojectionErrorSimple
+    reprojectionErrorMeasurements = DistortedPinholeReprojectionErrorMeasurements
+    multiCornerReprojectionError = DistortedPinholeMultiCornerReprojectionError
     designVariable = DistortedPinholeCameraGeometryDesignVariable
     projectionType = aslam_cv.DistortedPinholeProjection
     distortionType = aslam_cv.RadialTangentialDistortion
@@ -59,6 +67,8 @@ class DistortedPinholeRs(CameraModel):
     geometry = aslam_cv.DistortedPinholeRsCameraGeometry
     reprojectionError = DistortedPinholeRsReprojectionError
     reprojectionErrorSimple = DistortedPinholeRsReprojectionErrorSimple
+    reprojectionErrorMeasurements = DistortedPinholeRsReprojectionErrorMeasurements
+    multiCornerReprojectionError = DistortedPinholeRsMultiCornerReprojectionError
     reprojectionErrorAdaptiveCovariance = DistortedPinholeRsReprojectionErrorAdaptiveCovariance
     designVariable = DistortedPinholeRsCameraGeometryDesignVariable
     projectionType = aslam_cv.DistortedPinholeProjection
@@ -70,6 +80,8 @@ class EquidistantPinhole(CameraModel):
     geometry = aslam_cv.EquidistantDistortedPinholeCameraGeometry
     reprojectionError = EquidistantDistortedPinholeReprojectionError
     reprojectionErrorSimple = EquidistantDistortedPinholeReprojectionErrorSimple
+    reprojectionErrorMeasurements = EquidistantDistortedPinholeReprojectionErrorMeasurements
+    multiCornerReprojectionError = EquidistantDistortedPinholeMultiCornerReprojectionError
     designVariable = EquidistantDistortedPinholeCameraGeometryDesignVariable
     projectionType = aslam_cv.EquidistantPinholeProjection
     distortionType = aslam_cv.EquidistantDistortion
@@ -80,6 +92,8 @@ class EquidistantPinholeRs(CameraModel):
     geometry = aslam_cv.EquidistantDistortedPinholeRsCameraGeometry
     reprojectionError = EquidistantDistortedPinholeRsReprojectionError
     reprojectionErrorSimple = EquidistantDistortedPinholeRsReprojectionErrorSimple
+    reprojectionErrorMeasurements = EquidistantDistortedPinholeRsReprojectionErrorMeasurements
+    multiCornerReprojectionError = EquidistantDistortedPinholeRsMultiCornerReprojectionError
     reprojectionErrorAdaptiveCovariance = EquidistantDistortedPinholeRsReprojectionErrorAdaptiveCovariance
     designVariable = EquidistantDistortedPinholeRsCameraGeometryDesignVariable
     projectionType = aslam_cv.EquidistantPinholeProjection
@@ -91,6 +105,8 @@ class FovPinhole(CameraModel):
     geometry = aslam_cv.FovDistortedPinholeCameraGeometry
     reprojectionError = FovDistortedPinholeReprojectionError
     reprojectionErrorSimple = FovDistortedPinholeReprojectionErrorSimple
+    reprojectionErrorMeasurements = FovDistortedPinholeReprojectionErrorMeasurements
+    multiCornerReprojectionError = FovDistortedPinholeMultiCornerReprojectionError
     designVariable = FovDistortedPinholeCameraGeometryDesignVariable
     projectionType = aslam_cv.FovPinholeProjection
     distortionType = aslam_cv.FovDistortion
@@ -101,6 +117,8 @@ class ExtendedUnified(CameraModel):
     geometry = aslam_cv.ExtendedUnifiedCameraGeometry
     reprojectionError = ExtendedUnifiedReprojectionError
     reprojectionErrorSimple = ExtendedUnifiedReprojectionErrorSimple
+    reprojectionErrorMeasurements = ExtendedUnifiedReprojectionErrorMeasurements
+    multiCornerReprojectionError = ExtendedUnifiedMultiCornerReprojectionError
     designVariable = ExtendedUnifiedCameraGeometryDesignVariable
     projectionType = aslam_cv.ExtendedUnifiedProjection
     distortionType = aslam_cv.NoDistortion
@@ -111,6 +129,8 @@ class DoubleSphere(CameraModel):
     geometry = aslam_cv.DoubleSphereCameraGeometry
     reprojectionError = DoubleSphereReprojectionError
     reprojectionErrorSimple = DoubleSphereReprojectionErrorSimple
+    reprojectionErrorMeasurements = DoubleSphereReprojectionErrorMeasurements
+    multiCornerReprojectionError = DoubleSphereMultiCornerReprojectionError
     designVariable = DoubleSphereCameraGeometryDesignVariable
     projectionType = aslam_cv.DoubleSphereProjection
     distortionType = aslam_cv.NoDistortion
@@ -13,6 +13,7 @@ from matplotlib.backends.backend_pdf import PdfPages
 import mpl_toolkits.mplot3d.axes3d as p3
 import cv2
 import numpy as np
+import multiprocessing
 
 np.set_printoptions(suppress=True, precision=8)
 
@@ -40,6 +41,10 @@ class CameraGeometry(object):
         self.setDvActiveStatus(True, True, False)
         self.isGeometryInitialized = False
 
+        #cache for the pnp solutions of the observations (valid for one version of the initialized intrinsics)
+        self.intrinsicsVersion = 0
+        self.poseCache = dict()
+
         #create target detector
         self.ctarget = TargetDetector(targetConfig, self.geometry, showCorners=verbose)
 
@@ -48,7 +53,17 @@ class CameraGeometry(object):
         self.dv.distortionDesignVariable().setActive(distortionActive)
         self.dv.shutterDesignVariable().setActive(shutterActice)
 
-    def initGeometryFromObservations(self, observations):
+    #maxObservations: initialize on at most this many observations (selected by image coverage and
+    #target tilt, see selectObservationsByCoverage), 0 uses all observations
+    def initGeometryFromObservations(self, observations, maxObservations=0):
+        #the cached pnp solutions are invalid for the new intrinsics
+        self.invalidatePoseCache()
+
+        allObservations = observations
+        observations = kcc.selectObservationsByCoverage(observations, maxObservations)
+        if len(observations) < len(allObservations):
+            print("\tInitializing the intrinsics on {0} of {1} observations".format(len(observations), len(allObservations)))
+
         #obtain focal length guess
         success = self.geometry.initializeIntrinsics(observations)
         if not success:
@@ -67,8 +82,32 @@ class CameraGeometry(object):
             sm.logError("initialization of intrinsics for cam with topic {0} failed  ".format(self.dataset.topic))
         
         self.isGeometryInitialized = success        
+
+        #solve the pnp for all observations once with the initialized intrinsics
+        if success:
+            self.estimateTransformations(allObservations)
         return success
 
+    def invalidatePoseCache(self):
+        self.intrinsicsVersion += 1
+        self.poseCache = dict()
+
+    #returns the (cached) pnp solution (success, T_t_c) for an observation
+    def estimateTransformation(self, obs):
+        return self.estimateTransformations([obs])[0]
+
+    #returns the (cached) pnp solutions [(success, T_t_c), ...] for a list of observations
+    #(the missing solutions are computed in one multithreaded batch)
+    def estimateTransformations(self, observations):
+        keys = [obs.time().toNSec() for obs in observations]
+        missing = [idx for idx, key in enumerate(keys) if key not in self.poseCache]
+        if missing:
+            numThreads = max(1,multiprocessing.cpu_count()-1)
+            results = self.geometry.estimateTransformations([observations[idx] for idx in missing], numThreads)
+            for idx, result in zip(missing, results):
+                self.poseCache[keys[idx]] = result
+        return [self.poseCache[key] for key in keys]
+
 class TargetDetector(object):
     def __init__(self, targetConfig, cameraGeometry, showCorners=False, showReproj=False, showOneStep=False):
         self.targetConfig = targetConfig
@@ -141,7 +180,7 @@ class CalibrationTarget(object):
 
 class CalibrationTargetOptimizationProblem(ic.CalibrationOptimizationProblem):        
     @classmethod
-    def fromTargetViewObservations(cls, cameras, target, baselines, timestamp, T_tc_guess, rig_observations, useBlakeZissermanMest=True):
+    def fromTargetViewObservations(cls, cameras, target, baselines, timestamp, T_tc_guess, rig_observations, useBlakeZissermanMest=True, baselineChains=None):
         rval = CalibrationTargetOptimizationProblem()        
 
         #store the arguements in case we want to rebuild a modified problem
@@ -178,6 +217,10 @@ class CalibrationTargetOptimizationProblem(ic.CalibrationOptimizationProblem):
             rval.addDesignVariable(camera.dv.shutterDesignVariable(), CALIBRATION_GROUP_ID)
         
         #4.add all observations for this view
+        #(the baseline chains are usually built once by the calibrator)
+        if baselineChains is None:
+            baselineChains = kcc.getBaselineChainExpressions(baselines)
+        T_cam0_target = rval.dv_T_target_camera.expression.inverse()
         cams_in_view = set()
         rval.rerrs=dict()
         rerr_cnt=0
@@ -187,10 +230,7 @@ class CalibrationTargetOptimizationProblem(ic.CalibrationOptimizationProblem):
             
             #add reprojection errors
             #build baseline chain (target->cam0->baselines->camN)                
-            T_cam0_target = rval.dv_T_target_camera.expression.inverse()
-            T_camN_calib = T_cam0_target
-            for idx in range(0, cam_id):
-                T_camN_calib =  baselines[idx].toExpression() * T_camN_calib
+            T_camN_calib = kcc.chainTransformation(baselineChains, cam_id, T_cam0_target)
             
             # \todo pass in the detector uncertainty somehow.
             cornerUncertainty = 1.0
@@ -219,30 +259,25 @@ class CalibrationTargetOptimizationProblem(ic.CalibrationOptimizationProblem):
         sm.logDebug("Adding a view with {0} cameras and {1} error terms".format(len(cams_in_view), rerr_cnt))
         return rval
 
-def removeCornersFromBatch(batch, camId_cornerIdList_tuples, useBlakeZissermanMest=True):
+def removeCornersFromBatch(batch, camId_cornerIdList_tuples):
     #translate (camid,obs) tuple to dict
     obsdict=dict()
     for cidx, obs in batch.rig_observations:
         obsdict[cidx]=obs
        
-    #disable the corners
+    #disable the corners in place (the batch keeps its design variables and remaining error terms)
     hasCornerRemoved=False
     for cidx, removelist in camId_cornerIdList_tuples:
         for corner_id in removelist: 
+            rerr = batch.rerrs[cidx][corner_id]
+            if rerr is not None:
+                batch.removeErrorTerm(rerr)
+                batch.rerrs[cidx][corner_id] = None
             obsdict[cidx].removeImagePoint(corner_id)
             hasCornerRemoved=True
     assert hasCornerRemoved, "need to remove at least one corner..."
-    
-    #rebuild problem
-    new_problem = CalibrationTargetOptimizationProblem.fromTargetViewObservations(batch.cameras, 
-                                                                                  batch.target, 
-                                                                                  batch.baselines, 
-                                                                                  batch.timestamp, 
-                                                                                  batch.T_tc_guess, 
-                                                                                  batch.rig_observations,
-                                                                                  useBlakeZissermanMest=useBlakeZissermanMest)
 
-    return new_problem
+    return batch
         
 class CameraCalibration(object):
     def __init__(self, cameras, baseline_guesses, estimateLandmarks=False, verbose=False, useBlakeZissermanMest=True):
@@ -256,18 +291,64 @@ class CameraCalibration(object):
         self.initializeBaselineDVs(baseline_guesses)
         #storage for the used views
         self.views = list()
+        #used views that were marginalized out of the estimator (poses are no longer optimized)
+        self.marginalizedViews = list()
+        #running reprojection error sums per cam of the used views (when they were added)
+        self.rerrSums = dict()
+        #batches built while scoring candidate views (timestamp -> batch)
+        self.scoredBatches = dict()
         
     def initializeBaselineDVs(self, baseline_guesses):
         self.baselines = list()
         for baseline_idx in range(0, len(self.cameras)-1): 
             self.baselines.append( aopt.TransformationDv(baseline_guesses[baseline_idx]) )
+        self.baselineChains = kcc.getBaselineChainExpressions(self.baselines)
             
     def getBaseline(self, i):
         return self.baselines[i]
     
+    #re-add the accepted views of a checkpoint, starting from their optimized target poses
+    #(the outlier corners were already removed from the observations, all views are solved at once)
+    def restoreTargetViews(self, checkpoint_views, obsdb):
+        batches = list()
+        for timestamp, T_target_camera, _ in checkpoint_views:
+            batches.append( CalibrationTargetOptimizationProblem.fromTargetViewObservations(self.cameras, self.target, self.baselines, timestamp, sm.Transformation(T_target_camera), obsdb.getAllObsAtTimestamp(timestamp), useBlakeZissermanMest=self.useBlakeZissermanMest, baselineChains=self.baselineChains) )
+        if len(batches)==0:
+            return
+
+        self.estimator_return_value = self.estimator.addBatches(batches)
+        if self.estimator_return_value.numIterations >= self.optimizerOptions.maxIterations:
+            sm.logError("Did not converge in maxIterations... restarting...")
+            raise OptimizationDiverged
+
+        for batch_problem in batches:
+            self.views.append(batch_problem)
+            for cam_id in batch_problem.rerrs.keys():
+                corners, reprojections, rerrs = kcc.getViewReprojectionErrors(self, batch_problem, cam_id)
+                self.rerrSums[cam_id] = self.rerrSums.get(cam_id, 0.0) + kcc.getReprojectionErrorSums(rerrs)
+    
+    #score candidate views (list of (timestamp, rig_observations, T_tc_guess)) by their expected
+    #information gain on the calibration DVs at the current estimate (evaluated concurrently)
+    #       returns the expected gains in the order of the candidates
+    def scoreTargetViews(self, candidates):
+        batches = list()
+        for timestamp, rig_observations, T_tc_guess in candidates:
+            batch_problem = CalibrationTargetOptimizationProblem.fromTargetViewObservations(self.cameras, self.target, self.baselines, timestamp, T_tc_guess, rig_observations, useBlakeZissermanMest=self.useBlakeZissermanMest, baselineChains=self.baselineChains)
+            self.scoredBatches[timestamp] = batch_problem
+            batches.append(batch_problem)
+        
+        #same thread budget as the optimizer
+        return self.estimator.getExpectedInformationGains(batches, self.optimizerOptions.nThreads).flatten()
+    
+    #drop the batches of scored views that were not added
+    def clearScoredViews(self):
+        self.scoredBatches = dict()
+    
     def addTargetView(self, timestamp, rig_observations, T_tc_guess, force=False):
-        #create the problem for this batch and try to add it 
-        batch_problem = CalibrationTargetOptimizationProblem.fromTargetViewObservations(self.cameras, self.target, self.baselines, timestamp, T_tc_guess, rig_observations, useBlakeZissermanMest=self.useBlakeZissermanMest)
+        #create the problem for this batch (unless it was built while scoring) and try to add it 
+        batch_problem = self.scoredBatches.pop(timestamp, None)
+        if batch_problem is None:
+            batch_problem = CalibrationTargetOptimizationProblem.fromTargetViewObservations(self.cameras, self.target, self.baselines, timestamp, T_tc_guess, rig_observations, useBlakeZissermanMest=self.useBlakeZissermanMest, baselineChains=self.baselineChains)
         self.estimator_return_value = self.estimator.addBatch(batch_problem, force)
         
         if self.estimator_return_value.numIterations >= self.optimizerOptions.maxIterations:
@@ -278,7 +359,129 @@ class CameraCalibration(object):
         if success:
             sm.logDebug("The estimator accepted this batch")
             self.views.append(batch_problem)
+            for cam_id in batch_problem.rerrs.keys():
+                corners, reprojections, rerrs = kcc.getViewReprojectionErrors(self, batch_problem, cam_id)
+                self.rerrSums[cam_id] = self.rerrSums.get(cam_id, 0.0) + kcc.getReprojectionErrorSums(rerrs)
         else:
             sm.logDebug("The estimator did not accept this batch")
         return success
+    
+    #covariance of the active calibration DVs (baselines, then distortion/projection/shutter per cam)
+    def getCalibrationCovariance(self):
+        return self.estimator.getSigma2Theta()
+    
+    #marginalize the oldest views into a prior on the calibration DVs until at most windowSize
+    #views remain in the estimator (keeps the solve time and memory bounded)
+    def marginalizeOldViews(self, windowSize):
+        while len(self.views) > windowSize:
+            self.estimator.marginalizeBatch(0)
+            self.marginalizedViews.append(self.views.pop(0))
+
 
+#calibrates on a fixed set of views with a single batch solve (no information gain test per view)
+class BatchCameraCalibration(CameraCalibration):
+    def __init__(self, cameras, baseline_guesses, estimateLandmarks=False, verbose=False, useBlakeZissermanMest=True):
+        CameraCalibration.__init__(self, cameras, baseline_guesses, estimateLandmarks=estimateLandmarks, 
+                                   verbose=verbose, useBlakeZissermanMest=useBlakeZissermanMest)
+        self.verbose = verbose
+        
+        #single problem with the DVs and error terms of all views (same DV ordering as the batches)
+        self.problem = ic.CalibrationOptimizationProblem()
+        for baseline_dv in self.baselines:
+            for i in range(0, baseline_dv.numDesignVariables()):
+                self.problem.addDesignVariable(baseline_dv.getDesignVariable(i), CALIBRATION_GROUP_ID)
+        for p in self.target.P_t_dv:
+            self.problem.addDesignVariable(p, LANDMARK_GROUP_ID)
+        for camera in cameras:
+            camera.setDvActiveStatus(True, True, False)
+            self.problem.addDesignVariable(camera.dv.distortionDesignVariable(), CALIBRATION_GROUP_ID)
+            self.problem.addDesignVariable(camera.dv.projectionDesignVariable(), CALIBRATION_GROUP_ID)
+            self.problem.addDesignVariable(camera.dv.shutterDesignVariable(), CALIBRATION_GROUP_ID)
+    
+    def addTargetView(self, timestamp, rig_observations, T_tc_guess, force=True):
+        batch_problem = CalibrationTargetOptimizationProblem.fromTargetViewObservations(self.cameras, self.target, self.baselines, timestamp, T_tc_guess, rig_observations, useBlakeZissermanMest=self.useBlakeZissermanMest, baselineChains=self.baselineChains)
+        
+        #the shared calibration and landmark DVs are already in the problem
+        for i in range(0, batch_problem.dv_T_target_camera.numDesignVariables()):
+            self.problem.addDesignVariable(batch_problem.dv_T_target_camera.getDesignVariable(i), TRANSFORMATION_GROUP_ID)
+        for cam_id, rerrs in batch_problem.rerrs.items():
+            for rerr in rerrs:
+                if rerr is not None:
+                    self.problem.addErrorTerm(rerr)
+        
+        self.views.append(batch_problem)
+        return True
+    
+    def solve(self, maxIterations=50):
+        options = aopt.Optimizer2Options()
+        options.verbose = self.verbose
+        options.nThreads = max(1,multiprocessing.cpu_count()-1)
+        options.convergenceDeltaX = 1e-5
+        options.convergenceDeltaJ = 1e-2
+        options.maxIterations = maxIterations
+        options.trustRegionPolicy = aopt.LevenbergMarquardtTrustRegionPolicy(10)
+        
+        self.optimizer = aopt.Optimizer2(options)
+        self.optimizer.setProblem(self.problem)
+        try:
+            retval = self.optimizer.optimize()
+        except Exception as e:
+            sm.logError(str(e))
+            raise OptimizationDiverged
+        
+        if retval.linearSolverFailure or not np.isfinite(retval.JFinal):
+            sm.logError("Batch optimization failed... restarting...")
+            raise OptimizationDiverged
+        
+        sm.logDebug("Batch optimization: J {0} -> {1} in {2} iterations".format(retval.JStart, retval.JFinal, retval.iterations))
+        return retval
+    
+    #remove the corners with a reprojection error above sigmaThreshold*std over all views at once
+    #       returns list of (cam_id, corner) of the removed corners
+    def removeOutliers(self, sigmaThreshold=4.0):
+        removedCorners = list()
+        cornerRemovalLists = dict() #view_id -> list of (cam_id, corner_ids)
+        for cam_id in range(0, len(self.cameras)):
+            corners, reprojs, rerrs = kcc.getReprojectionErrors(self, cam_id)
+            if not np.any(np.isfinite(rerrs)):
+                continue
+            me, se = kcc.getReprojectionErrorStatistics(rerrs)
+            
+            #unobserved corners are NaN and never exceed the threshold
+            with np.errstate(invalid='ignore'):
+                outliers = np.any(np.abs(rerrs) > sigmaThreshold*se, 2)
+            for view_id in np.where(np.any(outliers, 1))[0].tolist():
+                pidxs = np.where(outliers[view_id])[0].tolist()
+                cornerRemovalLists.setdefault(view_id, list()).append( (cam_id, pidxs) )
+                removedCorners.extend( [ (cam_id, corners[view_id][pidx].copy()) for pidx in pidxs ] )
+        
+        for view_id, cornerRemovalList in cornerRemovalLists.items():
+            view = self.views[view_id]
+            for cam_id, pidxs in cornerRemovalList:
+                for pidx in pidxs:
+                    self.problem.removeErrorTerm(view.rerrs[cam_id][pidx])
+            removeCornersFromBatch(view, cornerRemovalList)
+        
+        return removedCorners
+    
+    #covariance of the calibration DVs from the sparse factorization of the last solve (only the
+    #calibration blocks of the inverse are computed, no second solve)
+    def recoverCovariance(self):
+        calibrationDvs = list()
+        for baseline_dv in self.baselines:
+            calibrationDvs.extend( [ baseline_dv.getDesignVariable(i) for i in range(0, baseline_dv.numDesignVariables()) ] )
+        for camera in self.cameras:
+            calibrationDvs.extend( [camera.dv.distortionDesignVariable(), camera.dv.projectionDesignVariable(), camera.dv.shutterDesignVariable()] )
+        calibrationDvs = [ dv for dv in calibrationDvs if dv.isActive() ]
+        
+        try:
+            self.sigma2Theta = self.optimizer.computeMarginalCovariance(calibrationDvs)
+        except Exception as e:
+            #singular information matrix --> pseudo-inverse from the incremental estimator (full re-solve)
+            sm.logWarn("Selective covariance recovery failed ({0}), falling back to the incremental estimator".format(e))
+            self.estimator_return_value = self.estimator.addBatch(self.problem, True)
+            self.sigma2Theta = self.estimator.getSigma2Theta()
+        return self.sigma2Theta
+    
+    def getCalibrationCovariance(self):
+        return self.sigma2Theta
@@ -2,16 +2,72 @@ import sm
 import aslam_backend as aopt
 import aslam_cv as cv
 import numpy as np
+import multiprocessing
 
-def addPoseDesignVariable(problem, T0=sm.Transformation()):
+#marginalized: eliminate the pose with the Schur complement (if the optimizer has doSchurComplement set)
+def addPoseDesignVariable(problem, T0=sm.Transformation(), marginalized=False):
     q_Dv = aopt.RotationQuaternionDv( T0.q() )
     q_Dv.setActive( True )
+    q_Dv.setMarginalized( marginalized )
     problem.addDesignVariable(q_Dv)
     t_Dv = aopt.EuclideanPointDv( T0.t() )
     t_Dv.setActive( True )
+    t_Dv.setMarginalized( marginalized )
     problem.addDesignVariable(t_Dv)
     return aopt.TransformationBasicDv( q_Dv.toExpression(), t_Dv.toExpression() )
 
+#adds one reprojection error term for all observed corners of the observation (the transformation
+#T_cam_target is evaluated once per term instead of once per corner), returns None if no corner is observed
+def addObservationReprojectionError(problem, cam, obs, T_cam_target, invR):
+    y = np.asarray(obs.getCornersImageFrame(), dtype=np.float64).reshape(-1,2)
+    if y.shape[0] == 0:
+        return None
+    p_target = np.asarray(obs.getCornersTargetFrame(), dtype=np.float64).reshape(-1,3)
+    rerr = cam.model.multiCornerReprojectionError(y, invR, p_target, T_cam_target, cam.dv)
+    problem.addErrorTerm(rerr)
+    return rerr
+
+#squared reprojection errors of all corners of a list of multi-corner reprojection error terms
+def getCornerSquaredErrors(rerrs):
+    if len(rerrs) == 0:
+        return np.zeros(0)
+    for rerr in rerrs:
+        rerr.evaluateError()
+    return np.hstack([ np.asarray(rerr.getCornerSquaredErrors()).flatten() for rerr in rerrs ])
+
+#chained baseline expressions T_camN_cam0 for all cameras of a chain (None for cam0), build them once per
+#set of baseline dvs and pass them to chainTransformation instead of rebuilding the chain for every view
+#(the transformation product and inverse nodes guard their cached operands, so the chains can be shared
+#by error terms that are evaluated on different threads)
+def getBaselineChainExpressions(baseline_dvs):
+    chains = [None]
+    for baseline_dv in baseline_dvs:
+        T_cam_cam0 = baseline_dv.toExpression()
+        if chains[-1] is not None:
+            T_cam_cam0 = T_cam_cam0 * chains[-1]
+        chains.append(T_cam_cam0)
+    return chains
+
+#transformation from the frame x to camera cam_id given the transformation to cam0 (target->cam0->baselines->camN)
+def chainTransformation(chains, cam_id, T_cam0_x):
+    if chains[cam_id] is None:
+        return T_cam0_x
+    return chains[cam_id] * T_cam0_x
+
+#solver options for the bundle adjustments with one target pose per view and a few shared camera
+#parameters: the (marginalized) target poses are eliminated with the Schur complement and the reduced
+#system of the camera parameters is solved densely
+def getBundleAdjustmentOptions(maxIterations=200):
+    options = aopt.Optimizer2Options()
+    options.verbose = True if sm.getLoggingLevel()==sm.LoggingLevel.Debug else False
+    options.nThreads = 4
+    options.convergenceDeltaX = 1e-3
+    options.convergenceDeltaJ = 1
+    options.maxIterations = maxIterations
+    options.trustRegionPolicy = aopt.LevenbergMarquardtTrustRegionPolicy(10)
+    options.doSchurComplement = True
+    return options
+
 def stereoCalibrate(camL_geometry, camH_geometry, obslist, distortionActive=False, baseline=None):
     #####################################################
     ## find initial guess as median of  all pnp solutions
@@ -21,8 +77,8 @@ def stereoCalibrate(camL_geometry, camH_geometry, obslist, distortionActive=Fals
         for obsL, obsH in obslist:
             #if we have observations for both camss
             if obsL is not None and obsH is not None:
-                success, T_L = camL_geometry.geometry.estimateTransformation(obsL)
-                success, T_H = camH_geometry.geometry.estimateTransformation(obsH)
+                success, T_L = camL_geometry.estimateTransformation(obsL)
+                success, T_H = camH_geometry.estimateTransformation(obsH)
                 
                 baseline = T_H.inverse()*T_L
                 t.append(baseline.t())
@@ -61,12 +117,12 @@ def stereoCalibrate(camL_geometry, camH_geometry, obslist, distortionActive=Fals
     target_pose_dvs = list()
     for obsL, obsH in obslist:
         if obsL is not None: #use camL if we have an obs for this one
-            success, T_t_cL = camL_geometry.geometry.estimateTransformation(obsL)
+            success, T_t_cL = camL_geometry.estimateTransformation(obsL)
         else:
-            success, T_t_cH = camH_geometry.geometry.estimateTransformation(obsH)
+            success, T_t_cH = camH_geometry.estimateTransformation(obsH)
             T_t_cL = T_t_cH*baseline_HL #apply baseline for the second camera
             
-        target_pose_dv = addPoseDesignVariable(problem, T_t_cL)
+        target_pose_dv = addPoseDesignVariable(problem, T_t_cL, marginalized=True)
         target_pose_dvs.append(target_pose_dv)
     
     #add camera dvs
@@ -92,50 +148,36 @@ def stereoCalibrate(camL_geometry, camH_geometry, obslist, distortionActive=Fals
     #Add reprojection error terms for both cameras
     reprojectionErrors0 = []; reprojectionErrors1 = []
             
+    #target pose expressions (shared by both cameras) and the baseline chain
+    T_camL_ws = [ target_pose_dv.toExpression().inverse() for target_pose_dv in target_pose_dvs ]
+    chains = getBaselineChainExpressions([baseline_dv])
+    
     for cidx, cam in enumerate([camL_geometry, camH_geometry]):
         sm.logDebug("stereoCalibration: adding camera error terms for {0} calibration targets".format(len(obslist)))
 
-        #get the image and target points corresponding to the frame
-        target = cam.ctarget.detector.target()
-        
         #add error terms for all observations
         for view_id, obstuple in enumerate(obslist):
             
             #add error terms if we have an observation for this cam
             obs=obstuple[cidx]
             if obs is not None:
-                T_cam_w = target_pose_dvs[view_id].toExpression().inverse()
-            
                 #add the baseline for the second camera
-                if cidx!=0:
-                    T_cam_w =  baseline_dv.toExpression() * T_cam_w
+                T_cam_w = chainTransformation(chains, cidx, T_camL_ws[view_id])
                     
-                for i in range(0, target.size()):
-                    p_target = aopt.HomogeneousExpression(sm.toHomogeneous(target.point(i)));
-                    valid, y = obs.imagePoint(i)
-                    if valid:
-                        # Create an error term.
-                        rerr = cam.model.reprojectionError(y, invR, T_cam_w * p_target, cam.dv)
-                        rerr.idx = i
-                        problem.addErrorTerm(rerr)
-                    
-                        if cidx==0:
-                            reprojectionErrors0.append(rerr)
-                        else:
-                            reprojectionErrors1.append(rerr)
+                #one error term for all corners of the view
+                rerr = addObservationReprojectionError(problem, cam, obs, T_cam_w, invR)
+                if rerr is not None:
+                    if cidx==0:
+                        reprojectionErrors0.append(rerr)
+                    else:
+                        reprojectionErrors1.append(rerr)
                                                         
         sm.logDebug("stereoCalibrate: added {0} camera error terms".format( len(reprojectionErrors0)+len(reprojectionErrors1) ))
         
     ############################################
     ## solve
     ############################################       
-    options = aopt.Optimizer2Options()
-    options.verbose = True if sm.getLoggingLevel()==sm.LoggingLevel.Debug else False
-    options.nThreads = 4
-    options.convergenceDeltaX = 1e-3
-    options.convergenceDeltaJ = 1
-    options.maxIterations = 200
-    options.trustRegionPolicy = aopt.LevenbergMarquardtTrustRegionPolicy(10)
+    options = getBundleAdjustmentOptions()
 
     optimizer = aopt.Optimizer2(options)
     optimizer.setProblem(problem)
@@ -143,9 +185,9 @@ def stereoCalibrate(camL_geometry, camH_geometry, obslist, distortionActive=Fals
     #verbose output
     if sm.getLoggingLevel()==sm.LoggingLevel.Debug:
         sm.logDebug("Before optimization:")
-        e2 = np.array([ e.evaluateError() for e in reprojectionErrors0 ])
+        e2 = getCornerSquaredErrors(reprojectionErrors0)
         sm.logDebug( " Reprojection error squarred (camL):  mean {0}, median {1}, std: {2}".format(np.mean(e2), np.median(e2), np.std(e2) ) )
-        e2 = np.array([ e.evaluateError() for e in reprojectionErrors1 ])
+        e2 = getCornerSquaredErrors(reprojectionErrors1)
         sm.logDebug( " Reprojection error squarred (camH):  mean {0}, median {1}, std: {2}".format(np.mean(e2), np.median(e2), np.std(e2) ) )
     
         sm.logDebug("baseline={0}".format(baseline_dv.toTransformationMatrix()))
@@ -161,9 +203,9 @@ def stereoCalibrate(camL_geometry, camH_geometry, obslist, distortionActive=Fals
     
     if sm.getLoggingLevel()==sm.LoggingLevel.Debug:
         sm.logDebug("After optimization:")
-        e2 = np.array([ e.evaluateError() for e in reprojectionErrors0 ])
+        e2 = getCornerSquaredErrors(reprojectionErrors0)
         sm.logDebug( " Reprojection error squarred (camL):  mean {0}, median {1}, std: {2}".format(np.mean(e2), np.median(e2), np.std(e2) ) )
-        e2 = np.array([ e.evaluateError() for e in reprojectionErrors1 ])
+        e2 = getCornerSquaredErrors(reprojectionErrors1)
         sm.logDebug( " Reprojection error squarred (camH):  mean {0}, median {1}, std: {2}".format(np.mean(e2), np.median(e2), np.std(e2) ) )
     
     #verbose output
@@ -209,41 +251,30 @@ def calibrateIntrinsics(cam_geometry, obslist, distortionActive=True, intrinsics
     R = np.eye(2) * cornerUncertainty * cornerUncertainty
     invR = np.linalg.inv(R)
     
-    #get the image and target points corresponding to the frame
-    target = cam_geometry.ctarget.detector.target()
-    
     #target pose dv for all target views (=T_camL_w)
     reprojectionErrors = [];    
     sm.logDebug("calibrateIntrinsics: adding camera error terms for {0} calibration targets".format(len(obslist)))
     target_pose_dvs=list()
-    for obs in obslist: 
-        success, T_t_c = cam_geometry.geometry.estimateTransformation(obs)
-        target_pose_dv = addPoseDesignVariable(problem, T_t_c)
+    #the intrinsics are still being initialized --> don't use the cached pnp solutions
+    numThreads = max(1,multiprocessing.cpu_count()-1)
+    pnp_solutions = cam_geometry.geometry.estimateTransformations(obslist, numThreads)
+    for obs, (success, T_t_c) in zip(obslist, pnp_solutions): 
+        target_pose_dv = addPoseDesignVariable(problem, T_t_c, marginalized=True)
         target_pose_dvs.append(target_pose_dv)
         
         T_cam_w = target_pose_dv.toExpression().inverse()
     
-        ## add error terms
-        for i in range(0, target.size()):
-            p_target = aopt.HomogeneousExpression(sm.toHomogeneous(target.point(i)));
-            valid, y = obs.imagePoint(i)
-            if valid:
-                rerr = cam_geometry.model.reprojectionError(y, invR, T_cam_w * p_target, cam_geometry.dv)
-                problem.addErrorTerm(rerr)
-                reprojectionErrors.append(rerr)
+        ## add error terms (one for all corners of the view)
+        rerr = addObservationReprojectionError(problem, cam_geometry, obs, T_cam_w, invR)
+        if rerr is not None:
+            reprojectionErrors.append(rerr)
                                                     
     sm.logDebug("calibrateIntrinsics: added {0} camera error terms".format(len(reprojectionErrors)))
     
     ############################################
     ## solve
     ############################################       
-    options = aopt.Optimizer2Options()
-    options.verbose = True if sm.getLoggingLevel()==sm.LoggingLevel.Debug else False
-    options.nThreads = 4
-    options.convergenceDeltaX = 1e-3
-    options.convergenceDeltaJ = 1
-    options.maxIterations = 200
-    options.trustRegionPolicy = aopt.LevenbergMarquardtTrustRegionPolicy(10)
+    options = getBundleAdjustmentOptions()
 
     optimizer = aopt.Optimizer2(options)
     optimizer.setProblem(problem)
@@ -251,7 +282,7 @@ def calibrateIntrinsics(cam_geometry, obslist, distortionActive=True, intrinsics
     #verbose output
     if sm.getLoggingLevel()==sm.LoggingLevel.Debug:
         sm.logDebug("Before optimization:")
-        e2 = np.array([ e.evaluateError() for e in reprojectionErrors ])
+        e2 = getCornerSquaredErrors(reprojectionErrors)
         sm.logDebug( " Reprojection error squarred (camL):  mean {0}, median {1}, std: {2}".format(np.mean(e2), np.median(e2), np.std(e2) ) )
     
     #run intrinsic calibration
@@ -302,8 +333,8 @@ def solveFullBatch(cameras, baseline_guesses, graph):
     R = np.eye(2) * cornerUncertainty * cornerUncertainty
     invR = np.linalg.inv(R)
     
-    #get the target
-    target = cameras[0].ctarget.detector.target()
+    #baseline chains (cam0->baselines->camN)
+    chains = getBaselineChainExpressions(baseline_dvs)
 
     #Add calibration target reprojection error terms for all camera in chain
     target_pose_dvs = list()
@@ -318,43 +349,30 @@ def solveFullBatch(cameras, baseline_guesses, graph):
 
         #create a target pose dv for all target views (= T_cam0_w)
         T0 = graph.getTargetPoseGuess(timestamp, cameras, baseline_guesses)
-        target_pose_dv = addPoseDesignVariable(problem, T0)
+        target_pose_dv = addPoseDesignVariable(problem, T0, marginalized=True)
         target_pose_dvs.append(target_pose_dv)
         
 
+        #calibration target coords to camera X coords
+        T_cam0_calib = target_pose_dv.toExpression().inverse()
+
         for cidx, obs in obs_tuple:
             cam = cameras[cidx]
               
-            #calibration target coords to camera X coords
-            T_cam0_calib = target_pose_dv.toExpression().inverse()
-
             #build pose chain (target->cam0->baselines->camN)
-            T_camN_calib = T_cam0_calib
-            for idx in range(0, cidx):
-                T_camN_calib = baseline_dvs[idx].toExpression() * T_camN_calib
-                
+            T_camN_calib = chainTransformation(chains, cidx, T_cam0_calib)
         
-            ## add error terms
-            for i in range(0, target.size()):
-                p_target = aopt.HomogeneousExpression(sm.toHomogeneous(target.point(i)));
-                valid, y = obs.imagePoint(i)
-                if valid:
-                    rerr = cameras[cidx].model.reprojectionError(y, invR, T_camN_calib * p_target, cameras[cidx].dv)
-                    problem.addErrorTerm(rerr)
-                    reprojectionErrors.append(rerr)
+            ## add error terms (one for all corners of the view)
+            rerr = addObservationReprojectionError(problem, cam, obs, T_camN_calib, invR)
+            if rerr is not None:
+                reprojectionErrors.append(rerr)
                                                     
     sm.logDebug("solveFullBatch: added {0} camera error terms".format(len(reprojectionErrors)))
     
     ############################################
     ## solve
     ############################################       
-    options = aopt.Optimizer2Options()
-    options.verbose = True if sm.getLoggingLevel()==sm.LoggingLevel.Debug else False
-    options.nThreads = 4
-    options.convergenceDeltaX = 1e-3
-    options.convergenceDeltaJ = 1
-    options.maxIterations = 250
-    options.trustRegionPolicy = aopt.LevenbergMarquardtTrustRegionPolicy(10)
+    options = getBundleAdjustmentOptions(maxIterations=250)
 
     optimizer = aopt.Optimizer2(options)
     optimizer.setProblem(problem)
@@ -362,7 +380,7 @@ def solveFullBatch(cameras, baseline_guesses, graph):
     #verbose output
     if sm.getLoggingLevel()==sm.LoggingLevel.Debug:
         sm.logDebug("Before optimization:")
-        e2 = np.array([ e.evaluateError() for e in reprojectionErrors ])
+        e2 = getCornerSquaredErrors(reprojectionErrors)
         sm.logDebug( " Reprojection error squarred (camL):  mean {0}, median {1}, std: {2}".format(np.mean(e2), np.median(e2), np.std(e2) ) )
     
     #run intrinsic calibration
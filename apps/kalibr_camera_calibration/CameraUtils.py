@@ -25,6 +25,8 @@ import pylab as pl
 import math
 import gc
 import sys
+import os
+import pickle
 
 # make numpy print prettier
 np.set_printoptions(suppress=True)
@@ -41,142 +43,140 @@ def getImageCenterRay(cself, cam_id):
     vc = normalize(geometry.keypointToEuclidean(yc))
     return vc;
 
-class pointStatistics(object):
-    pass
-
-def getPointStatistics(cself,view_id,cam_id,pidx):
-    view = cself.views[view_id]
-    
-    #check if the given camera sees the target in the given view (and get the obs)
-    #view.rig_observations = list of tuples (cam_id, obs)
-    cams_in_view = [obs_tuple[0] for obs_tuple in view.rig_observations]
-    if cam_id not in cams_in_view:
-        rval = pointStatistics()
-        rval.valid = False
-        return rval
-    obs = view.rig_observations[ cams_in_view.index(cam_id) ][1]
-    
-    vc = getImageCenterRay(cself, cam_id)
-    z = np.array([0,0,1])
-    dz = np.dot(z,vc)
-    if np.abs(dz - 1.0) > 1e-3:
-        print("The point statistics are only valid if the camera points down the z axis. This camera has the image center: [%f, %f, %f]" % (z[0],z[1],z[2]))
-    valid, y = obs.imagePoint(pidx)
-    geometry = cself.cameras[cam_id].geometry
-    rerr = None
-    yhat = None
-    azumithalAngle = None
-    polarAngle = None
-    squaredError = None
-    e = None
-    
-    if valid:
-        #translate point index to error term index (pidx!=eidx if not all points are observed!)
-        pidx_observed = obs.getCornersIdx()
-        eidx=list(pidx_observed).index(pidx)
-    
-        rerr = view.errorTerm(eidx)
-        e = rerr.error()
-        yhat = y - e
-        v = normalize(geometry.keypointToEuclidean(y))
-        # Note, these calculations assume that the camera point
-        # down the z-axis. If this is wrong...this is bad.
-        polarAngle = math.acos(v[2])
-        azumithalAngle = math.atan2(v[1],v[0])
-        # Make sure to recompute the error just in case
-        # The point has been updated
-        rerr.evaluateError()
-        squaredError = rerr.getRawSquaredError()
-    rval = pointStatistics()
-    rval.valid = valid
-    rval.view_id = view_id
-    rval.camid = cam_id
-    rval.pidx = pidx
-    rval.y = y
-    rval.yhat = yhat
-    rval.azumithalAngle = azumithalAngle
-    rval.polarAngle = polarAngle
-    rval.squaredError = squaredError
-    rval.e = e
-    return rval
-    
 def getReprojectionErrorStatistics(all_rerrs):
     """
     usage:  all_corners, all_reprojections, all_reprojection_errs = getReprojectionErrors(calibrator, 0)
-            mean, std = getReprojectionErrorStatistics(all_reprojections)
+            mean, std = getReprojectionErrorStatistics(all_reprojection_errs)
     """
     if not len(all_rerrs)>0:
         raise RuntimeError("rerrs has invalid dimension")
 
-    gc.disable() #append speed up
-    rerr_matrix=list();
-    for view_id, view_rerrs in enumerate(all_rerrs):
-        if view_rerrs is not None: #if cam sees target in this view
-            for rerr in view_rerrs:
-                if not (rerr==np.array([None,None])).all(): #if corner was observed
-                    rerr_matrix.append(rerr)
-    
-    
-    rerr_matrix = np.array(rerr_matrix)
-    gc.enable()
+    #flatten to (num. corners x 2) and drop the unobserved corners (NaN)
+    rerr_matrix = np.asarray(all_rerrs, dtype=np.float64).reshape(-1,2)
+    rerr_matrix = rerr_matrix[ np.isfinite(rerr_matrix[:,0]) ]
     
     mean = np.mean(rerr_matrix, 0, dtype=np.float64)
     std = np.std(rerr_matrix, 0, dtype=np.float64)
  
     return mean, std
 
-#return a list (views) of a list (reprojection errors) for a cam
+#return the corners, reprojections and reprojection errors of a cam in a view
+#as (num. target points x 2) arrays (NaN for corners that were not observed)
+def getViewReprojectionErrors(cself, view, cam_id):
+    if cam_id not in view.rerrs:
+        corners = np.full((cself.target.target.size(), 2), np.nan)
+        return corners, corners.copy(), corners.copy()
+    
+    corners, reprojections = cself.cameras[cam_id].model.reprojectionErrorMeasurements(view.rerrs[cam_id])
+    return corners, reprojections, corners-reprojections
+
+#return the corners, reprojections and reprojection errors of a cam over all views
+#as (num. views x num. target points x 2) arrays (NaN for corners that were not observed)
 def getReprojectionErrors(cself, cam_id):
-    all_corners = list(); all_reprojections = list(); all_reprojection_errs =list()
+    shape = (len(cself.views), cself.target.target.size(), 2)
+    all_corners = np.full(shape, np.nan)
+    all_reprojections = np.full(shape, np.nan)
     
-    gc.disable() #append speed up
     for view_id, view in enumerate(cself.views):
-        if cam_id in list(view.rerrs.keys()):
-            view_corners=list(); view_reprojections=list(); view_reprojection_errs=list()
-            for rerr in view.rerrs[cam_id]:
-                #add if the corners was observed
-                if rerr is not None:
-                    corner = rerr.getMeasurement()
-                    reprojection = rerr.getPredictedMeasurement()
-                    err = corner-reprojection
-                else:
-                    corner = np.array([None, None])
-                    reprojection = np.array([None, None])
-                    err = np.array([None, None])
-                    
-                view_corners.append(corner)
-                view_reprojections.append(reprojection)
-                view_reprojection_errs.append(err)
-                    
-            all_corners.append(np.array(view_corners))
-            all_reprojections.append(np.array(view_reprojections))
-            all_reprojection_errs.append(np.array(view_reprojection_errs))
-        else:
-            #the camera doesn't see the target in this view
-            all_corners.append(None)
-            all_reprojections.append(None)
-            all_reprojection_errs.append(None)
-
-    gc.enable()
-    return all_corners, all_reprojections, all_reprojection_errs
+        if cam_id in view.rerrs:
+            corners, reprojections = cself.cameras[cam_id].model.reprojectionErrorMeasurements(view.rerrs[cam_id])
+            all_corners[view_id,:,:] = corners
+            all_reprojections[view_id,:,:] = reprojections
+
+    return all_corners, all_reprojections, all_corners-all_reprojections
+
+#cache of the reprojection errors of a cam over all views with running sums for the
+#error statistics. Views that are replaced/removed are updated without re-evaluating
+#the error terms of all the other views.
+class ReprojectionErrorStatistics(object):
+    def __init__(self, cself, cam_id):
+        self.cself = cself
+        self.cam_id = cam_id
+        
+        self.corners, self.reprojections, self.rerrs = getReprojectionErrors(cself, cam_id)
+        
+        #per view: (num. errors, sum x, sum y, sum x^2, sum y^2)
+        observed = np.isfinite(self.rerrs[:,:,0])
+        e = np.where(observed[:,:,np.newaxis], self.rerrs, 0.0)
+        self.view_sums = np.hstack( (np.sum(observed, 1)[:,np.newaxis], np.sum(e, 1), np.sum(e*e, 1)) )
+        self.sums = np.sum(self.view_sums, 0)
+    
+    def getViewSums(self, rerrs):
+        return getReprojectionErrorSums(rerrs)
+    
+    #re-evaluate the errors of a view (e.g. after the batch was replaced)
+    def updateView(self, view_id):
+        view = self.cself.views[view_id]
+        corners, reprojections, rerrs = getViewReprojectionErrors(self.cself, view, self.cam_id)
+        self.corners[view_id] = corners
+        self.reprojections[view_id] = reprojections
+        self.rerrs[view_id] = rerrs
+        
+        view_sums = self.getViewSums(rerrs)
+        self.sums += view_sums - self.view_sums[view_id,:]
+        self.view_sums[view_id,:] = view_sums
+    
+    #drop a view (call after the view has been removed from the calibrator)
+    def removeView(self, view_id):
+        self.sums -= self.view_sums[view_id,:]
+        self.view_sums = np.delete(self.view_sums, view_id, 0)
+        self.corners = np.delete(self.corners, view_id, 0)
+        self.reprojections = np.delete(self.reprojections, view_id, 0)
+        self.rerrs = np.delete(self.rerrs, view_id, 0)
+    
+    #returns: mean, std (same as getReprojectionErrorStatistics)
+    def getStatistics(self):
+        return getReprojectionErrorStatisticsFromSums(self.sums)
+
+#sums of the reprojection errors (num. target points x 2, NaN for unobserved corners)
+#       returns array (num. errors, sum x, sum y, sum x^2, sum y^2)
+def getReprojectionErrorSums(rerrs):
+    e = rerrs[ np.isfinite(rerrs[:,0]) ]
+    return np.hstack( (e.shape[0], np.sum(e, 0), np.sum(e*e, 0)) )
+
+#returns: mean, std from the sums of getReprojectionErrorSums
+def getReprojectionErrorStatisticsFromSums(sums):
+    n = sums[0]
+    if not n>0:
+        raise RuntimeError("rerrs has invalid dimension")
+    
+    mean = sums[1:3] / n
+    std = np.sqrt( np.maximum(sums[3:5] / n - mean*mean, 0.0) )
+    return mean, std
   
 
-#get statistics for one cam over all points
-def getAllPointStatistics(cself, cam_id):
-    gc.disable() #gc slows down appends... disable it temporarily
-    stats = []
-    for view_id in range(0,len(cself.views)):
-        for p_idx in range(0,cself.target.target.size()):
-            stat = getPointStatistics(cself,view_id,cam_id,p_idx)
-            if stat.valid:
-                stats.append(stat)
-    gc.enable()
-    return stats
+#get the statistics for one cam over all observed points of all views
+#       returns arrays (num. observed points) of the polar angle, the azimuthal angle and the squared error
+def getAllPointStatisticsArrays(cself, cam_id):
+    vc = getImageCenterRay(cself, cam_id)
+    if np.abs(vc[2] - 1.0) > 1e-3:
+        print("The point statistics are only valid if the camera points down the z axis. This camera has the image center: [%f, %f, %f]" % (vc[0],vc[1],vc[2]))
+    
+    #the error terms have unit information (squared error = squared norm of the error)
+    all_corners, all_reprojections, all_rerrs = getReprojectionErrors(cself, cam_id)
+    corners = all_corners.reshape(-1,2)
+    rerrs = all_rerrs.reshape(-1,2)
+    observed = np.isfinite(rerrs[:,0])
+    corners = corners[observed]
+    rerrs = rerrs[observed]
+    
+    #back-project all observed corners at once
+    v = cself.cameras[cam_id].geometry.keypointsToEuclidean(corners)
+    v = v / np.linalg.norm(v, axis=1)[:,np.newaxis]
+    
+    # Note, these calculations assume that the camera point
+    # down the z-axis. If this is wrong...this is bad.
+    polarAngle = np.arccos(np.clip(v[:,2], -1.0, 1.0))
+    azumithalAngle = np.arctan2(v[:,1], v[:,0])
+    squaredError = np.sum(rerrs*rerrs, 1)
+    
+    valid = np.isfinite(v[:,0])
+    return polarAngle[valid], azumithalAngle[valid], squaredError[valid]
 
 def plotPolarError(cself, cam_id, fno=1, clearFigure=True, stats=None, noShow=False, title=""):
     if stats is None:
-        stats = getAllPointStatistics(cself, cam_id)
-    angleError = np.array([ [ np.degrees(s.polarAngle), math.sqrt(s.squaredError)] for s in stats ])
+        stats = getAllPointStatisticsArrays(cself, cam_id)
+    angleError = np.column_stack( (np.degrees(stats[0]), np.sqrt(stats[2])) )
     # sort by polar angle
     sae = angleError[ angleError[:,0].argsort() ]
     
@@ -201,8 +201,8 @@ def plotPolarError(cself, cam_id, fno=1, clearFigure=True, stats=None, noShow=Fa
 
 def plotAzumithalError(cself, cam_id, fno=1, clearFigure=True, stats=None, noShow=False, title=""):
     if stats is None:
-        stats = getAllPointStatistics(cself, cam_id)
-    angleError = np.array([ [ np.degrees(s.azumithalAngle), math.sqrt(s.squaredError)] for s in stats ])
+        stats = getAllPointStatisticsArrays(cself, cam_id)
+    angleError = np.column_stack( (np.degrees(stats[1]), np.sqrt(stats[2])) )
     # sort by azimuthal angle
     sae = angleError[ angleError[:,0].argsort() ]
     # Now plot
@@ -239,10 +239,13 @@ def plotAllReprojectionErrors(cself, cam_id, fno=1, noShow=False, clearFigure=Tr
     values = np.arange(len(cself.views))/np.double(len(cself.views))
     cmap = pl.cm.jet(values,alpha=0.5)
     
+    #views in which this camera sees the target
+    cam_in_view = np.any(np.isfinite(all_corners[:,:,0]), 1)
+
     #detected corners plot
     a=pl.subplot(121)
     for view_id, corners in enumerate(all_corners):
-        if corners is not None: #if this camerea sees the target in this view
+        if cam_in_view[view_id]: #if this camerea sees the target in this view
             color = cmap[view_id,:]
             pl.plot(corners[:,0], corners[:,1],'o-', mfc=color, c=color, mec=color)
 
@@ -253,7 +256,7 @@ def plotAllReprojectionErrors(cself, cam_id, fno=1, noShow=False, clearFigure=Tr
     #reprojection errors scatter plot
     sub = pl.subplot(122)
     for view_id, rerrs in enumerate(rerrs_xy):
-        if rerrs is not None: #if this camerea sees the target in this view
+        if cam_in_view[view_id]: #if this camerea sees the target in this view
             color = cmap[view_id,:]
             pl.plot(rerrs[:,0], rerrs[:,1], 'x', lw=3, mew=3, color=color)
 
@@ -285,7 +288,7 @@ def plotCornersAndReprojection(gridobs, reprojs, fno=1, cornerlist=None, clearFi
     # Get the reprojections:
     for pidx, reproj in enumerate(reprojs):
         if (cornerlist is not None) and (pidx in cornerlist):
-            if (not np.all(reproj==np.array([None,None]))):
+            if np.all(np.isfinite(reproj)):
                 pl.plot(reproj[0], reproj[1], 'x', lw=3, mew=3, color=color)
 
     pl.xlim([0,gridobs.imCols()])
@@ -303,7 +306,7 @@ def recoverCovariance(cself):
     #                c) shutter    --> 0
     
     numCams = len(cself.cameras)
-    est_stds = np.sqrt(cself.estimator.getSigma2Theta().diagonal())
+    est_stds = np.sqrt(cself.getCalibrationCovariance().diagonal())
 
     #split the variance for baselines
     baseline_cov = est_stds[0:6*(numCams-1)]
@@ -480,14 +483,15 @@ def generateReport(cself, filename="report.pdf", showOnScreen=True, graph=None,
         
     #plot for each camera
     for cidx, cam in enumerate(cself.cameras):
+        stats = getAllPointStatisticsArrays(cself, cidx)
         f = pl.figure(cidx*10+1)
         title="cam{0}: polar error".format(cidx)
-        plotPolarError(cself, cidx, fno=f.number, noShow=True, title=title)
+        plotPolarError(cself, cidx, fno=f.number, stats=stats, noShow=True, title=title)
         plotter.add_figure(title, f)
         figs.append(f)
         f = pl.figure(cidx*10+2)
         title="cam{0}: azimuthal error".format(cidx)
-        plotAzumithalError(cself, cidx, fno=f.number, noShow=True, title=title)
+        plotAzumithalError(cself, cidx, fno=f.number, stats=stats, noShow=True, title=title)
         plotter.add_figure(title, f)
         figs.append(f)
         f = pl.figure(cidx*10+3)
@@ -635,10 +639,70 @@ def exportPoses(cself, filename):
         print("{:.0f},".format(1e9 * view.timestamp) + ",".join(map("{:.6f}".format, position)) \
                + "," + ",".join(map("{:.6f}".format, orientation)) , file=f)
 
+#state of the incremental calibration loop that is needed to resume it (plain python/numpy data only)
+#       timestamps: processing order of the views, view_id: index of the last processed view
+def getCalibrationCheckpoint(cself, timestamps, view_id, initOutlierRejection, removedOutlierCorners):
+    checkpoint = dict()
+    checkpoint['timestamps'] = list(timestamps)
+    checkpoint['view_id'] = view_id
+    checkpoint['initOutlierRejection'] = initOutlierRejection
+    checkpoint['removedOutlierCorners'] = [ (cidx, np.array(corner)) for cidx, corner in removedOutlierCorners ]
+    checkpoint['projections'] = [ cam.geometry.projection().getParameters() for cam in cself.cameras ]
+    checkpoint['distortions'] = [ cam.geometry.projection().distortion().getParameters() for cam in cself.cameras ]
+    checkpoint['baselines'] = [ baseline.T() for baseline in cself.baselines ]
+    
+    #accepted views: (timestamp, T_target_camera, {cam_id: remaining corner ids})
+    checkpoint['views'] = list()
+    for view in cself.views:
+        corners = dict( (cam_id, [ int(i) for i in obs.getCornersIdx() ]) for cam_id, obs in view.rig_observations )
+        checkpoint['views'].append( (view.timestamp, view.dv_T_target_camera.T(), corners) )
+    return checkpoint
+
+def saveCalibrationCheckpoint(checkpoint, filename):
+    #write to a temporary file first so an interrupted write never replaces a good checkpoint
+    tmpfile = filename + ".tmp"
+    with open(tmpfile, 'wb') as f:
+        pickle.dump(checkpoint, f, pickle.HIGHEST_PROTOCOL)
+    os.rename(tmpfile, filename)
+
+def loadCalibrationCheckpoint(filename):
+    with open(filename, 'rb') as f:
+        return pickle.load(f)
+
+#restore the intrinsics and remove the outlier corners of the accepted views of a checkpoint
+#       returns the baselines as guesses for the calibrator
+def restoreCalibrationCheckpoint(checkpoint, cameras, obsdb):
+    for cam, projection, distortion in zip(cameras, checkpoint['projections'], checkpoint['distortions']):
+        cam.geometry.projection().setParameters(projection)
+        cam.geometry.projection().distortion().setParameters(distortion)
+        cam.invalidatePoseCache()
+    
+    for timestamp, T_target_camera, corners in checkpoint['views']:
+        for cam_id, corner_ids in corners.items():
+            obs = obsdb.getObservationAtTime(timestamp, cam_id)
+            for corner_id in set( int(i) for i in obs.getCornersIdx() ) - set(corner_ids):
+                obs.removeImagePoint(corner_id)
+    
+    return [ sm.Transformation(T) for T in checkpoint['baselines'] ]
+
 def saveResultTxt(cself, filename="camera_calibration_result.txt"):
     f1=open(filename, 'w')
     printParameters(cself, f1)
 
+#short progress summary from values that are already available after adding a view
+#(no covariance recovery and no re-evaluation of the reprojection errors of all views)
+def printProgress(cself, numProcessed, numViews, dest=sys.stdout):
+    numUsed = cself.estimator.getNumBatches() + cself.estimator.getNumMarginalizedBatches()
+    print("Processed {0} of {1} views with {2} views used".format(numProcessed, numViews, numUsed), file=dest)
+    print("    cost: {0:.6f}, information gain of last view: {1:.4f}, rank deficiency: {2}".format(cself.estimator.getFinalCost(), cself.estimator.getInformationGain(), cself.estimator.getRankThetaDeficiency()), file=dest)
+    for cidx, cam in enumerate(cself.cameras):
+        print("cam{0}:".format(cidx), file=dest)
+        print("    distortion: %s" % cam.geometry.projection().distortion().getParameters().flatten(), file=dest)
+        print("    projection: %s" % cam.geometry.projection().getParameters().flatten(), file=dest)
+        if cidx in cself.rerrSums and cself.rerrSums[cidx][0]>0:
+            me, se = getReprojectionErrorStatisticsFromSums(cself.rerrSums[cidx])
+            print("    reprojection error (when the views were added): [%f, %f] +- [%f, %f]" % (me[0], me[1], se[0], se[1]), file=dest)
+
 def printParameters(cself, dest=sys.stdout):
 
     print("Calibration results ", file=dest)
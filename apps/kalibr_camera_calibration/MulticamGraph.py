@@ -8,6 +8,11 @@ import collections
 import igraph
 import itertools
 import sys
+import multiprocessing
+try:
+   import queue
+except ImportError:
+   import Queue as queue # python 2.x
 import pylab as pl
 try:
     from PIL import Image # Modern
@@ -19,6 +24,18 @@ import time
 np.set_printoptions(suppress=True)
 
 
+def multicoreStereoCalibrationWrapper(graph, cameras, taskq, resultq):
+    while 1:
+        try:
+            camL_nr, camH_nr = taskq.get_nowait()
+        except queue.Empty:
+            return
+        success, baseline_HL = graph.calibrateCameraPair(cameras, camL_nr, camH_nr)
+        #the intrinsics refined in this process are sent back with the baseline
+        intrinsics = [ (cameras[cam_nr].geometry.projection().getParameters(), cameras[cam_nr].geometry.projection().distortion().getParameters()) for cam_nr in (camL_nr, camH_nr) ]
+        resultq.put( (camL_nr, camH_nr, success, baseline_HL.T(), intrinsics) )
+
+
 class MulticamCalibrationGraph(object):
     def __init__(self, obs_db):
         #observation database
@@ -112,7 +129,7 @@ class MulticamCalibrationGraph(object):
     #returns: 
     #        baselines:    list of baselines starting from cam0 to camN
     #                      direction: baseline_O => cam0 to cam1 (T_c1_c0)
-    def getInitialGuesses(self, cameras):
+    def getInitialGuesses(self, cameras, multithreading=True, numProcesses=None):
         
         if not self.G:
             raise RuntimeError("Graph is uninitialized!")
@@ -157,27 +174,23 @@ class MulticamCalibrationGraph(object):
         ##         (baselines are always from lower_id to higher_id cams!)
         #################################################################
         
-        #calibrate all cameras in pairs
+        #get the camera pairs (calibrate from low to high id)
+        camera_pairs = list()
         for baseline_edge_id in self.optimal_baseline_edges:
-
-            #get the cam_nrs from the graph edge (calibrate from low to high id)
             vertices = self.G.es[baseline_edge_id].tuple
-            if vertices[0]<vertices[1]:
-                camL_nr = vertices[0]
-                camH_nr = vertices[1]
-            else:
-                camL_nr = vertices[1]
-                camH_nr = vertices[0]
-            
-            print("\t initializing camera pair ({0},{1})...  ".format(camL_nr, camH_nr))
+            camera_pairs.append( (min(vertices), max(vertices)) )
+
+        #calibrate all cameras in pairs (the pairs are independent problems)
+        if multithreading and len(camera_pairs)>1:
+            pair_baselines = self.calibrateCameraPairsMulticore(cameras, camera_pairs, numProcesses)
+        else:
+            pair_baselines = dict()
+            for camL_nr, camH_nr in camera_pairs:
+                pair_baselines[(camL_nr, camH_nr)] = self.calibrateCameraPair(cameras, camL_nr, camH_nr)
+
+        for camL_nr, camH_nr in camera_pairs:
+            success, baseline_HL = pair_baselines[(camL_nr, camH_nr)]
 
-            #run the pair extrinsic calibration
-            obs_list = self.obs_db.getAllObsTwoCams(camL_nr, camH_nr)
-            success, baseline_HL = kcc.stereoCalibrate(cameras[camL_nr], 
-                                                       cameras[camH_nr], 
-                                                       obs_list,
-                                                       distortionActive=False)
-            
             if success:
                 sm.logDebug("baseline_{0}_{1}={2}".format(camL_nr, camH_nr, baseline_HL.T()))
             else:
@@ -233,6 +246,68 @@ class MulticamCalibrationGraph(object):
     
         return baselines
     
+    #run the pair extrinsic calibration for the cameras camL_nr < camH_nr
+    #returns: (success, baseline_HL)
+    def calibrateCameraPair(self, cameras, camL_nr, camH_nr):
+        print("\t initializing camera pair ({0},{1})...  ".format(camL_nr, camH_nr))
+        obs_list = self.obs_db.getAllObsTwoCams(camL_nr, camH_nr)
+        return kcc.stereoCalibrate(cameras[camL_nr], 
+                                   cameras[camH_nr], 
+                                   obs_list,
+                                   distortionActive=False)
+
+    #calibrate all camera pairs concurrently in worker processes
+    #(each worker operates on its own copy of the cameras, so the pairs do not
+    # interfere through shared intrinsics design variables)
+    #the intrinsics refined by the workers are applied in the order of the pairs (as the serial
+    #calibration would leave them)
+    #returns: dict (camL_nr, camH_nr) -> (success, baseline_HL)
+    def calibrateCameraPairsMulticore(self, cameras, camera_pairs, numProcesses=None):
+        if not numProcesses:
+            numProcesses = max(1,multiprocessing.cpu_count()-1)
+        numProcesses = min(numProcesses, len(camera_pairs))
+
+        pair_baselines = dict()
+        pair_intrinsics = dict()
+        try:
+            manager = multiprocessing.Manager()
+            taskq = manager.Queue()
+            resultq = manager.Queue()
+            
+            for camera_pair in camera_pairs:
+                taskq.put(camera_pair)
+            
+            plist=list()
+            for pidx in range(0, numProcesses):
+                p = multiprocessing.Process(target=multicoreStereoCalibrationWrapper, args=(self, cameras, taskq, resultq, ))
+                p.start()
+                plist.append(p)
+            
+            for p in plist:
+                p.join()
+            
+            while not resultq.empty():
+                camL_nr, camH_nr, success, T_HL, intrinsics = resultq.get()
+                pair_baselines[(camL_nr, camH_nr)] = (success, sm.Transformation(T_HL))
+                pair_intrinsics[(camL_nr, camH_nr)] = intrinsics
+        except Exception as e:
+            raise RuntimeError("Exception during multithreaded pair calibration: {0}".format(e))
+        
+        #apply the intrinsics refined in the worker processes
+        for camera_pair in camera_pairs:
+            if camera_pair in pair_intrinsics:
+                for cam_nr, (projection, distortion) in zip(camera_pair, pair_intrinsics[camera_pair]):
+                    cameras[cam_nr].geometry.projection().setParameters(projection)
+                    cameras[cam_nr].geometry.projection().distortion().setParameters(distortion)
+        
+        #fall back to a serial calibration for pairs that got lost (e.g. crashed worker)
+        for camL_nr, camH_nr in camera_pairs:
+            if (camL_nr, camH_nr) not in pair_baselines:
+                sm.logWarn("multithreaded calibration of camera pair ({0},{1}) failed. Retrying...".format(camL_nr, camH_nr))
+                pair_baselines[(camL_nr, camH_nr)] = self.calibrateCameraPair(cameras, camL_nr, camH_nr)
+        
+        return pair_baselines
+    
     def getTargetPoseGuess(self, timestamp, cameras, baselines_HL=[]):
         #go through all camera that see this target at the given time
         #and take the one with the most target points        
@@ -247,8 +322,7 @@ class MulticamCalibrationGraph(object):
         cam_id_max = camids[max_idx]        
         
         #solve the pnp problem
-        camera_geomtry = cameras[cam_id_max].geometry
-        success, T_t_cN = camera_geomtry.estimateTransformation(self.obs_db.getObservationAtTime(timestamp, cam_id_max))
+        success, T_t_cN = cameras[cam_id_max].estimateTransformation(self.obs_db.getObservationAtTime(timestamp, cam_id_max))
                
         if not success:
             sm.logWarn("getTargetPoseGuess: solvePnP failed with solution: {0}".format(T_t_cN))
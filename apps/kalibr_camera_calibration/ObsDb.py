@@ -5,6 +5,92 @@ import aslam_backend as aopt
 import numpy as np
 import collections
 
+#grid cell index (row-major in a gridCells x gridCells image grid) of every observed corner
+def getCornerCells(obs, gridCells=8):
+    corners = np.asarray(obs.getCornersImageFrame()).reshape(-1,2)
+    cols = np.clip((corners[:,0]*gridCells/obs.imCols()).astype(int), 0, gridCells-1)
+    rows = np.clip((corners[:,1]*gridCells/obs.imRows()).astype(int), 0, gridCells-1)
+    return rows*gridCells + cols
+
+#greedy processing order that maximizes the early information (see getViewTimestampsByInformation)
+#       coverage: array (num. views x num. bins) with the corner count per bin
+#       features: array (num. views x 4) with the target normal and log. distance (NaN if unknown) or None
+#       maxCount: stop after this many views (0 orders all views)
+#       returns the view indices in processing order
+def getInformationOrder(coverage, features=None, maxCount=0):
+    if features is not None:
+        hasPose = np.isfinite(features[:,0])
+    
+    #coverage gain of every view (updated for the bins of the picked views only)
+    weights = np.ones(coverage.shape[1])
+    gains = np.dot(coverage, weights)
+    #pose distance to the closest picked view (angle of the normals + log. distance ratio)
+    diversity = np.ones(coverage.shape[0])
+    posePicked = False
+    
+    available = np.ones(coverage.shape[0], dtype=bool)
+    order = list()
+    while np.any(available) and (maxCount <= 0 or len(order) < maxCount):
+        scores = np.where(available, gains*(1.0+diversity), -1.0)
+        best = int(np.argmax(scores))
+        order.append(best)
+        available[best] = False
+        
+        bins = np.nonzero(coverage[best])[0]
+        new_weights = 1.0/(1.0/weights[bins] + coverage[best,bins])
+        gains -= np.dot(coverage[:,bins], weights[bins]-new_weights)
+        weights[bins] = new_weights
+        
+        if features is not None and hasPose[best]:
+            cos = np.clip(np.dot(features[:,0:3], features[best,0:3]), -1.0, 1.0)
+            dist = np.arccos(cos) + np.abs(features[:,3]-features[best,3])
+            if not posePicked:
+                diversity = np.where(hasPose, dist, diversity)
+                posePicked = True
+            else:
+                diversity = np.where(hasPose, np.minimum(diversity, dist), diversity)
+    
+    return order
+
+#target tilt features of single camera observations that do not require the intrinsics: the affine
+#map from the target plane to the image (fitted to the corners) approximates a weak perspective
+#projection, its singular values give the tilt angle and (inverse) distance, the direction of the
+#smaller one the tilt axis. The sign of the axis (and thus of the tilt) is not observable, the axis
+#angle is doubled to map both signs to the same feature.
+#       returns array (num. observations x 4) in the form of getViewPoseFeatures (NaN if less than 3 corners)
+def getObservationTiltFeatures(observations):
+    features = np.full((len(observations), 4), np.nan)
+    for obs_id, obs in enumerate(observations):
+        target = np.asarray(obs.getCornersTargetFrame()).reshape(-1,3)[:,0:2]
+        corners = np.asarray(obs.getCornersImageFrame()).reshape(-1,2)
+        if corners.shape[0] < 3:
+            continue
+        target = np.hstack( (target - np.mean(target, 0), np.ones((target.shape[0], 1))) )
+        A = np.linalg.lstsq(target, corners, rcond=None)[0][0:2,:].T
+        U, S, Vt = np.linalg.svd(A)
+        if not S[0] > 0.0:
+            continue
+        
+        tilt = np.arccos(np.clip(S[1]/S[0], 0.0, 1.0))
+        axis = 2.0*np.arctan2(U[1,1], U[0,1])
+        features[obs_id,0:3] = [np.sin(tilt)*np.cos(axis), np.sin(tilt)*np.sin(axis), np.cos(tilt)]
+        features[obs_id,3] = -np.log(S[0])
+    return features
+
+#select a bounded subset of single camera observations that is diverse in image coverage and target
+#tilt (e.g. to initialize the intrinsics in bounded time on long datasets)
+#       returns the selected observations in the input order (all if there are at most maxObs)
+def selectObservationsByCoverage(observations, maxObs, gridCells=8):
+    if maxObs <= 0 or len(observations) <= maxObs:
+        return list(observations)
+    
+    coverage = np.zeros((len(observations), gridCells*gridCells))
+    for obs_id, obs in enumerate(observations):
+        np.add.at(coverage[obs_id], getCornerCells(obs, gridCells), 1)
+    
+    order = getInformationOrder(coverage, getObservationTiltFeatures(observations), maxObs)
+    return [observations[obs_id] for obs_id in sorted(order)]
+
 #simple data structure that stores all observations for a multi-cam system
 #and can approx. sync observations
 #
@@ -135,7 +221,55 @@ class ObservationDatabase(object):
             if obs is not None:
                 observations.append(obs)
         return observations
+
+    #bin the observed corners of the given views into a coarse image grid per camera
+    #       returns array (num. views x num. cams*gridCells^2) with the corner count per cell
+    def getViewCoverage(self, timestamps, gridCells=8):
+        numCams = max(self.observations.keys())+1
+        coverage = np.zeros((len(timestamps), numCams*gridCells*gridCells))
+        for view_id, timestamp in enumerate(timestamps):
+            for cam_id, obs in self.getAllObsAtTimestamp(timestamp):
+                np.add.at(coverage[view_id], cam_id*gridCells*gridCells + getCornerCells(obs, gridCells), 1)
+        return coverage
+
+    #target pose features of the given views (normal of the target and log. distance in the frame of
+    #the lowest camera that sees the view) from the pnp solutions of the cameras
+    #       returns array (num. views x 4) (NaN if the pose could not be estimated)
+    def getViewPoseFeatures(self, timestamps, cameras):
+        features = np.full((len(timestamps), 4), np.nan)
+        views_per_cam = dict()
+        for view_id, timestamp in enumerate(timestamps):
+            cam_id = min(self.getCamIdsAtTimestamp(timestamp))
+            views_per_cam.setdefault(cam_id, list()).append(view_id)
+        
+        for cam_id, view_ids in views_per_cam.items():
+            observations = [self.getObservationAtTime(timestamps[view_id], cam_id) for view_id in view_ids]
+            for view_id, (success, T_t_c) in zip(view_ids, cameras[cam_id].estimateTransformations(observations)):
+                if success:
+                    T_c_t = T_t_c.inverse()
+                    features[view_id,0:3] = T_c_t.C()[:,2]
+                    features[view_id,3] = np.log(max(np.linalg.norm(T_c_t.t()), 1e-6))
+        return features
     
+    #deterministic processing order that maximizes the early information: greedily pick the view
+    #with the most corners in image cells that the previous views did not cover yet, weighted up
+    #by how different its target pose is from the previous views (if cameras are given)
+    #       returns all timestamps in processing order
+    def getViewTimestampsByInformation(self, cameras=None, gridCells=8):
+        timestamps = self.getAllViewTimestamps()
+        coverage = self.getViewCoverage(timestamps, gridCells)
+        features = None
+        if cameras is not None:
+            features = self.getViewPoseFeatures(timestamps, cameras)
+        
+        order = getInformationOrder(coverage, features)
+        return [timestamps[view_id] for view_id in order]
+
+    #select the maxViews most informative views (see getViewTimestampsByInformation)
+    #       returns the selected timestamps in time order
+    def selectViewsByCoverage(self, maxViews, cameras=None, gridCells=8):
+        return sorted(self.getViewTimestampsByInformation(cameras, gridCells)[0:maxViews])
+
 #############################################################
 ## data queries
 #############################################################    
@@ -30,6 +30,7 @@ class AslamCamera(object):
                 self.frameType = cv.DistortedPinholeFrame
                 self.keypointType = cv.Keypoint2
                 self.reprojectionErrorType = cvb.DistortedPinholeReprojectionErrorSimple
+                self.cameraModel = cvb.DistortedPinhole
                 self.undistorterType = cv.PinholeUndistorterNoMask
                 
             elif dist_model == 'equidistant':
@@ -45,6 +46,7 @@ class AslamCamera(object):
                 self.frameType = cv.EquidistantDistortedPinholeFrame
                 self.keypointType = cv.Keypoint2
                 self.reprojectionErrorType = cvb.EquidistantDistortedPinholeReprojectionErrorSimple
+                self.cameraModel = cvb.EquidistantPinhole
                 self.undistorterType = cv.EquidistantPinholeUndistorterNoMask
                 
             elif dist_model == 'fov':
@@ -59,6 +61,7 @@ class AslamCamera(object):
                 self.frameType = cv.FovDistortedPinholeFrame
                 self.keypointType = cv.Keypoint2
                 self.reprojectionErrorType = cvb.FovDistortedPinholeReprojectionErrorSimple
+                self.cameraModel = cvb.FovPinhole
                 self.undistorterType = cv.FovPinholeUndistorterNoMask
             elif dist_model == 'none':
                 proj = cv.PinholeProjection(focalLength[0], focalLength[1], 
@@ -92,6 +95,7 @@ class AslamCamera(object):
                 self.frameType = cv.DistortedOmniFrame
                 self.keypointType = cv.Keypoint2
                 self.reprojectionErrorType = cvb.DistortedOmniReprojectionErrorSimple
+                self.cameraModel = cvb.DistortedOmni
                 self.undistorterType = cv.OmniUndistorterNoMask
                 
             elif dist_model == 'equidistant':
@@ -124,6 +128,7 @@ class AslamCamera(object):
                 self.frameType = cv.OmniFrame
                 self.keypointType = cv.Keypoint2
                 self.reprojectionErrorType = cvb.OmniReprojectionErrorSimple
+                self.cameraModel = cvb.Omni
 
             else:
                 raise RuntimeError("omni camera model does not support distortion model '{}'".format(dist_model))
@@ -144,6 +149,7 @@ class AslamCamera(object):
                 self.frameType = cv.ExtendedUnifiedFrame
                 self.keypointType = cv.Keypoint2
                 self.reprojectionErrorType = cvb.ExtendedUnifiedReprojectionErrorSimple
+                self.cameraModel = cvb.ExtendedUnified
 
             else:
                 raise RuntimeError("camera model {} does not support distortion model '{}'".format(camera_model, dist_model))
@@ -164,6 +170,7 @@ class AslamCamera(object):
                 self.frameType = cv.DoubleSphereFrame
                 self.keypointType = cv.Keypoint2
                 self.reprojectionErrorType = cvb.DoubleSphereReprojectionErrorSimple
+                self.cameraModel = cvb.DoubleSphere
             else:
                 raise RuntimeError("camera model {} does not support distortion model '{}'".format(camera_model, dist_model))
 
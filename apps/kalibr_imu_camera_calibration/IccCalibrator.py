@@ -160,7 +160,7 @@ class IccCalibrator(object):
             options.convergenceDeltaJ = 1e-2
             options.maxIterations = maxIterations
             options.trustRegionPolicy = aopt.LevenbergMarquardtTrustRegionPolicy(options.levenbergMarquardtLambdaInit)
-            options.linearSolver = aopt.BlockCholeskyLinearSystemSolver() #does not have multi-threading support
+            options.linearSolver = aopt.BlockCholeskyLinearSystemSolver() #builds the system on options.nThreads threads
 
         #run the optimization
         self.optimizer = aopt.Optimizer2(options)
@@ -179,12 +179,12 @@ class IccCalibrator(object):
             sm.logError("Optimization failed!")
             raise RuntimeError("Optimization failed!")
         
-        #free some memory
-        del self.optimizer
-        gc.collect()
         if recoverCov:
             self.recoverCovariance()
         
+        #free some memory
+        del self.optimizer
+        gc.collect()
 
     def recoverCovariance(self):
         #Covariance ordering (=dv ordering)
@@ -193,9 +193,16 @@ class IccCalibrator(object):
         #            2. camera time2imu --> 1*numCams (only if enabled)
         
         print("Recovering covariance...")
-        estimator = inc.IncrementalEstimator(CALIBRATION_GROUP_ID)
-        rval = estimator.addBatch(self.problem, True)    
-        est_stds = np.sqrt(estimator.getSigma2Theta().diagonal())
+        calibrationDvs = [ dv for dv in self.CameraChain.getCalibrationDesignVariables() if dv.isActive() ]
+        try:
+            #only the blocks of the calibration DVs are recovered from the sparse factorization of the optimizer
+            est_stds = np.sqrt(self.optimizer.computeMarginalCovariance(calibrationDvs).diagonal())
+        except Exception as e:
+            #singular information matrix --> pseudo-inverse of the marginal information (full re-solve)
+            sm.logWarn("Selective covariance recovery failed ({0}), falling back to the incremental estimator".format(e))
+            estimator = inc.IncrementalEstimator(CALIBRATION_GROUP_ID)
+            rval = estimator.addBatch(self.problem, True)    
+            est_stds = np.sqrt(estimator.getSigma2Theta().diagonal())
         
         #split and store the variance
         self.std_trafo_ic = np.array(est_stds[0:6])
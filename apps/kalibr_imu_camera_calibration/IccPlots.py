@@ -53,7 +53,7 @@ def plotIMURates(cself, iidx, fno=1, clearFigure=True, noShow=False):
     f.gca().set_ylim((0.0, max(rates)))
 
 def plotGyroError(cself, iidx, fno=1, clearFigure=True, noShow=False):
-    errors = np.array([np.dot(re.error(), re.error()) for re in  cself.ImuList[iidx].gyroErrors])
+    errors = np.sum(cself.ImuList[iidx].gyroErrors.errors()**2, axis=1)
    
     f = pl.figure(fno)
     if clearFigure:
@@ -77,7 +77,7 @@ def plotGyroError(cself, iidx, fno=1, clearFigure=True, noShow=False):
     pl.grid('on')
 
 def plotGyroErrorPerAxis(cself, iidx, fno=1, clearFigure=True, noShow=False):
-    errors = np.array([re.error() for re in  cself.ImuList[iidx].gyroErrors])
+    errors = cself.ImuList[iidx].gyroErrors.errors()
    
     f = pl.figure(fno)
     if clearFigure:
@@ -96,7 +96,7 @@ def plotGyroErrorPerAxis(cself, iidx, fno=1, clearFigure=True, noShow=False):
         pl.xlim([0., errors.shape[0]])
 
 def plotAccelError(cself, iidx, fno=1, clearFigure=True, noShow=False):
-    errors = np.array([np.dot(re.error(), re.error()) for re in cself.ImuList[iidx].accelErrors])
+    errors = np.sum(cself.ImuList[iidx].accelErrors.errors()**2, axis=1)
    
     f = pl.figure(fno)
     if clearFigure:
@@ -120,7 +120,7 @@ def plotAccelError(cself, iidx, fno=1, clearFigure=True, noShow=False):
     pl.grid('on')
 
 def plotAccelErrorPerAxis(cself, iidx, fno=1, clearFigure=True, noShow=False):
-    errors = np.array([re.error() for re in  cself.ImuList[iidx].accelErrors])
+    errors = cself.ImuList[iidx].accelErrors.errors()
    
     f = pl.figure(fno)
     if clearFigure:
@@ -143,7 +143,7 @@ def plotAccelBias(cself, imu_idx, fno=1, clearFigure=True, noShow=False):
     bias = imu.accelBiasDv.spline()
     times = np.array([im.stamp.toSec() for im in imu.imuData if im.stamp.toSec() > bias.t_min() \
                       and im.stamp.toSec() < bias.t_max() ])
-    acc_bias_spline = np.array([bias.evalD(t,0) for t in times]).T
+    acc_bias_spline = bias.evalDAtTimes(times,0).T
     times = times - times[0]     #remove time offset
 
     plotVectorOverTime(times, acc_bias_spline, 
@@ -163,7 +163,7 @@ def plotAngularVelocityBias(cself, imu_idx, fno=1, clearFigure=True, noShow=Fals
     bias = imu.gyroBiasDv.spline()
     times = np.array([im.stamp.toSec() for im in imu.imuData if im.stamp.toSec() > bias.t_min() \
                       and im.stamp.toSec() < bias.t_max() ])
-    gyro_bias_spline = np.array([bias.evalD(t,0) for t in times]).T
+    gyro_bias_spline = bias.evalDAtTimes(times,0).T
     times = times - times[0]     #remove time offset
     
     plotVectorOverTime(times, gyro_bias_spline, 
@@ -186,11 +186,11 @@ def plotAngularVelocities(cself, iidx, fno=1, clearFigure=True, noShow=False):
     times = np.array([im.stamp.toSec() + imu.timeOffset for im in imu.imuData \
                       if im.stamp.toSec() + imu.timeOffset > bodyspline.t_min() \
                       and im.stamp.toSec() + imu.timeOffset < bodyspline.t_max() ])
-    predictedAng_body =  np.array([err.getPredictedMeasurement() for err in imu.gyroErrors]).T
+    predictedAng_body =  imu.gyroErrors.predictedMeasurements().T
     
     #transform the measurements to the body frame
     #not neccessray for imu0 as it is aligned with the spline
-    measuredAng_body =  np.array([err.getMeasurement() for err in imu.gyroErrors]).T
+    measuredAng_body =  imu.gyroErrors.measurements().T
 
     #remove time offset
     times = times - times[0]
@@ -215,12 +215,12 @@ def plotAccelerations(cself, iidx, fno=1, clearFigure=True, noShow=False):
     times = np.array([im.stamp.toSec() + imu.timeOffset for im in imu.imuData \
                       if im.stamp.toSec() + imu.timeOffset > bodyspline.t_min() \
                       and im.stamp.toSec() + imu.timeOffset < bodyspline.t_max() ])
-    predicetedAccel_body =  np.array([err.getPredictedMeasurement() for err in imu.accelErrors]).T
+    predicetedAccel_body =  imu.accelErrors.predictedMeasurements().T
     
     #transform accelerations from imu to body frame (on fixed body and geometry was estimated...)
     #works for imu0 as it is aligned with the spline
     #TODO(schneith): implement the fixed-body acceleration transformation 
-    measuredAccel_imu =  np.array([err.getMeasurement() for err in imu.accelErrors]).T
+    measuredAccel_imu =  imu.accelErrors.measurements().T
     measuredAccel_body = measuredAccel_imu
     
     #remove time offset
@@ -267,9 +267,9 @@ def plotReprojectionScatter(cself, cam_id, fno=1, clearFigure=True, noShow=False
     cmap = pl.cm.jet(values,alpha=0.5)
 
     #reprojection errors scatter plot
-    for image_id, rerrs_image in enumerate(cam.allReprojectionErrors):
+    for image_id, rerr_image in enumerate(cam.allReprojectionErrors):
         color = cmap[image_id,:]
-        rerrs = np.array([rerr.error() for rerr in rerrs_image])  
+        rerrs = rerr_image.getMeasurements() - rerr_image.getPredictedMeasurements()
         pl.plot(rerrs[:,0], rerrs[:,1], 'x', lw=3, mew=3, color=color)
 
     #A red uncertainty bound would be more consistent, but it is less well visible.
@@ -12,6 +12,7 @@ from .IccCalibrator import *
 
 import cv2
 import sys
+import multiprocessing
 import math
 import numpy as np
 import pylab as pl
@@ -37,6 +38,26 @@ def initImuBagDataset(bagfile, topic, from_to=None, perform_synchronization=Fals
     return reader
 
 
+#full cross-correlation of a and v (same result as np.correlate(a, v, "full")) computed with the fft,
+#returns the correlation and the lag of its peak in samples, refined to sub-sample accuracy by fitting
+#a parabola through the peak and its neighbours (lag = index - (len(v)-1))
+def crossCorrelationPeak(a, v):
+    a = np.asarray(a, dtype=np.float64)
+    v = np.asarray(v, dtype=np.float64)
+    n = a.size + v.size - 1
+    nfft = 1 << int(np.ceil(np.log2(n)))
+    corr = np.fft.irfft(np.fft.rfft(a, nfft) * np.fft.rfft(v[::-1], nfft), nfft)[0:n]
+    
+    k = int(corr.argmax())
+    peak = float(k)
+    if 0 < k < n-1:
+        c0, c1, c2 = corr[k-1], corr[k], corr[k+1]
+        denom = c0 - 2.0*c1 + c2
+        if denom < 0.0:
+            peak += 0.5 * (c0 - c2) / denom
+    return corr, peak - (v.size - 1)
+
+
 #mono camera
 class IccCamera():
     def __init__(self, camConfig, targetConfig, dataset, reprojectionSigma=1.0, showCorners=True, \
@@ -135,20 +156,28 @@ class IccCamera():
         #initialize a pose spline using the camera poses
         poseSpline = self.initPoseSplineFromCamera( timeOffsetPadding=0.0 )
         
-        for im in imu.imuData:
-            tk = im.stamp.toSec()
-            if tk > poseSpline.t_min() and tk < poseSpline.t_max():        
-                #DV expressions
-                R_i_c = q_i_c_Dv.toExpression()
-                bias = gyroBiasDv.toExpression()   
-                
-                #get the vision predicted omega and measured omega (IMU)
-                omega_predicted = R_i_c * aopt.EuclideanExpression( np.matrix( poseSpline.angularVelocityBodyFrame( tk ) ).transpose() )
-                omega_measured = im.omega
-                
-                #error term
-                gerr = ket.GyroscopeError(omega_measured, im.omegaInvR, omega_predicted, bias)
-                problem.addErrorTerm(gerr)
+        #imu samples within the spline time range
+        mask = (imu.imuTimes > poseSpline.t_min()) & (imu.imuTimes < poseSpline.t_max())
+        
+        #a rotation prior does not need the full imu rate: decimate the stream to ~200 Hz
+        samples = np.flatnonzero(mask)
+        if len(imu.imuTimes) > 1:
+            stride = max(1, int(round(1.0 / (200.0 * np.mean(np.diff(imu.imuTimes))))))
+            samples = samples[::stride]
+        
+        #DV expressions (shared by all error terms)
+        R_i_c = q_i_c_Dv.toExpression()
+        bias = gyroBiasDv.toExpression()
+        
+        #get the vision predicted omegas (batch evaluation) and the measured omegas (IMU)
+        omega_b = poseSpline.angularVelocitiesBodyFrame(imu.imuTimes[samples]) if len(samples) > 0 else []
+        for k, omega_predicted_b in zip(samples, omega_b):
+            im = imu.imuData[k]
+            omega_predicted = R_i_c * aopt.EuclideanExpression( np.matrix( omega_predicted_b ).transpose() )
+            
+            #error term
+            gerr = ket.GyroscopeError(im.omega, im.omegaInvR, omega_predicted, bias)
+            problem.addErrorTerm(gerr)
         
         if problem.numErrorTerms() == 0:
             sm.logFatal("Failed to obtain orientation prior. "\
@@ -159,8 +188,8 @@ class IccCamera():
         #define the optimization 
         options = aopt.Optimizer2Options()
         options.verbose = False
-        options.linearSolver = aopt.BlockCholeskyLinearSystemSolver() #does not have multi-threading support
-        options.nThreads = 2
+        options.linearSolver = aopt.BlockCholeskyLinearSystemSolver() #builds the system on options.nThreads threads
+        options.nThreads = max(1,multiprocessing.cpu_count()-1)
         options.convergenceDeltaX = 1e-4
         options.convergenceDeltaJ = 1
         options.maxIterations = 50
@@ -181,12 +210,9 @@ class IccCamera():
         self.T_extrinsic = sm.Transformation( sm.rt2Transform( R_i_c, self.T_extrinsic.t() ) )
 
         #estimate gravity in the world coordinate frame as the mean specific force
-        a_w = []
-        for im in imu.imuData:
-            tk = im.stamp.toSec()
-            if tk > poseSpline.t_min() and tk < poseSpline.t_max():
-                a_w.append(np.dot(poseSpline.orientation(tk), np.dot(R_i_c, - im.alpha)))
-        mean_a_w = np.mean(np.asarray(a_w).T, axis=1)
+        C_w_b = poseSpline.orientations(imu.imuTimes[mask]).reshape(-1,3,3)
+        a_w = np.einsum('nij,nj->ni', C_w_b, np.dot(- imu.imuAlphas[mask], R_i_c.T))
+        mean_a_w = np.mean(a_w, axis=0)
         self.gravity_w = mean_a_w / np.linalg.norm(mean_a_w) * 9.80655
         print("Gravity was intialized to", self.gravity_w, "[m/s^2]") 
 
@@ -220,36 +246,22 @@ class IccCamera():
         #fit a spline to the camera observations
         poseSpline = self.initPoseSplineFromCamera( timeOffsetPadding=0.0 )
         
-        #predict time shift prior 
-        t=[]
-        omega_measured_norm = []
-        omega_predicted_norm = []
-        
-        for im in imu.imuData:
-            tk = im.stamp.toSec()
-            if tk > poseSpline.t_min() and tk < poseSpline.t_max():
-                
-                #get imu measurements and spline from camera
-                omega_measured = im.omega
-                omega_predicted = aopt.EuclideanExpression( np.matrix( poseSpline.angularVelocityBodyFrame( tk ) ).transpose() )
-
-                #calc norm
-                t = np.hstack( (t, tk) )
-                omega_measured_norm = np.hstack( (omega_measured_norm, np.linalg.norm( omega_measured ) ))
-                omega_predicted_norm = np.hstack( (omega_predicted_norm, np.linalg.norm( omega_predicted.toEuclidean() )) )
+        #predict time shift prior (imu samples within the spline time range)
+        mask = (imu.imuTimes > poseSpline.t_min()) & (imu.imuTimes < poseSpline.t_max())
+        t = imu.imuTimes[mask]
+        omega_measured_norm = np.linalg.norm(imu.imuOmegas[mask], axis=1)
+        omega_predicted_norm = np.linalg.norm(poseSpline.angularVelocitiesBodyFrame(t), axis=1) if len(t) > 0 else np.zeros(0)
         
         if len(omega_predicted_norm) == 0 or len(omega_measured_norm) == 0:
             sm.logFatal("The time ranges of the camera and IMU do not overlap. "\
                         "Please make sure that your sensors are synchronized correctly.")
             sys.exit(-1)
         
-        #get the time shift
-        corr = np.correlate(omega_predicted_norm, omega_measured_norm, "full")
-        discrete_shift = corr.argmax() - (np.size(omega_measured_norm) - 1)
+        #get the time shift (fft cross-correlation with sub-sample peak)
+        corr, discrete_shift = crossCorrelationPeak(omega_predicted_norm, omega_measured_norm)
         
         #get cont. time shift
-        times = [im.stamp.toSec() for im in imu.imuData]
-        dT = np.mean(np.diff( times ))
+        dT = np.mean(np.diff( imu.imuTimes ))
         shift = -discrete_shift*dT
         
         #Create plots
@@ -327,6 +339,13 @@ class IccCamera():
         self.cameraTimeToImuTimeDv.setActive( not noTimeCalibration )
         problem.addDesignVariable(self.cameraTimeToImuTimeDv, CALIBRATION_GROUP_ID)
         
+        # Add the (fixed) intrinsics used by the per-frame reprojection errors.
+        self.cameraDv = self.camera.cameraModel.designVariable(self.camera.geometry)
+        for dv in [self.cameraDv.projectionDesignVariable(), self.cameraDv.distortionDesignVariable(), \
+                   self.cameraDv.shutterDesignVariable()]:
+            dv.setActive(False)
+            problem.addDesignVariable(dv, HELPER_GROUP_ID)
+        
     def addCameraErrorTerms(self, problem, poseSplineDv, T_cN_b, blakeZissermanDf=0.0, timeOffsetPadding=0.0):
         print("")
         print("Adding camera error terms ({0})".format(self.dataset.topic))
@@ -336,7 +355,10 @@ class IccCamera():
         iProgress.sample()
 
         allReprojectionErrors = list()
-        error_t = self.camera.reprojectionErrorType
+        
+        #corner uncertainty
+        R = np.eye(2) * self.cornerUncertainty * self.cornerUncertainty
+        invR = np.linalg.inv(R)
         
         for obs in self.targetObservations:
             # Build a transformation expression for the time.
@@ -357,42 +379,23 @@ class IccCamera():
             T_c_w = T_cN_b  * T_b_w
             
             #get the image and target points corresponding to the frame
-            imageCornerPoints =  np.array( obs.getCornersImageFrame() ).T
-            targetCornerPoints = np.array( obs.getCornersTargetFrame() ).T
-            
-            #setup an aslam frame (handles the distortion)
-            frame = self.camera.frameType()
-            frame.setGeometry(self.camera.geometry)
+            imageCornerPoints = np.asarray( obs.getCornersImageFrame(), dtype=np.float64 ).reshape(-1,2)
+            targetCornerPoints = np.asarray( obs.getCornersTargetFrame(), dtype=np.float64 ).reshape(-1,3)
+            if imageCornerPoints.shape[0] == 0:
+                continue
             
-            #corner uncertainty
-            R = np.eye(2) * self.cornerUncertainty * self.cornerUncertainty
-            invR = np.linalg.inv(R)
+            #build the error term of all corners of the frame (the spline pose and its
+            #jacobians are evaluated once per frame and shared by all corners)
+            rerr = self.camera.cameraModel.multiCornerReprojectionError(imageCornerPoints, invR, targetCornerPoints, \
+                                                                        T_c_w, self.cameraDv)
             
-            for pidx in range(0,imageCornerPoints.shape[1]):
-                #add all image points
-                k = self.camera.keypointType()
-                k.setMeasurement( imageCornerPoints[:,pidx] )
-                k.setInverseMeasurementCovariance(invR)
-                frame.addKeypoint(k)
+            #add blake-zisserman m-estimator (applied to every corner)
+            if blakeZissermanDf>0.0:
+                mest = aopt.BlakeZissermanMEstimator( blakeZissermanDf )
+                rerr.setCornerMEstimatorPolicy(mest)
             
-            reprojectionErrors=list()
-            for pidx in range(0,imageCornerPoints.shape[1]):
-                #add all target points
-                targetPoint = np.insert( targetCornerPoints.transpose()[pidx], 3, 1)
-                p = T_c_w *  aopt.HomogeneousExpression( targetPoint )
-             
-                #build and append the error term
-                rerr = error_t(frame, pidx, p)
-                
-                #add blake-zisserman m-estimator
-                if blakeZissermanDf>0.0:
-                    mest = aopt.BlakeZissermanMEstimator( blakeZissermanDf )
-                    rerr.setMEstimatorPolicy(mest)
-                
-                problem.addErrorTerm(rerr)  
-                reprojectionErrors.append(rerr)
-            
-            allReprojectionErrors.append(reprojectionErrors)
+            problem.addErrorTerm(rerr)
+            allReprojectionErrors.append(rerr)
                         
             #update progress bar
             iProgress.sample()
@@ -528,6 +531,12 @@ class IccCameraChain():
                 baselinedv_group_id = HELPER_GROUP_ID
             cam.addDesignVariables(problem, noExtrinsics, noTimeCalibration, baselinedv_group_id=baselinedv_group_id)
     
+    #design variables of the calibration group in problem order (T_c0_imu, then the time shifts of all cams)
+    def getCalibrationDesignVariables(self):
+        dvs = [ self.camList[0].T_c_b_Dv.getDesignVariable(i) for i in range(0, self.camList[0].T_c_b_Dv.numDesignVariables()) ]
+        dvs.extend( [ cam.cameraTimeToImuTimeDv for cam in self.camList ] )
+        return dvs
+    
     #add the reprojection error terms for all cameras in the chain
     def addCameraChainErrorTerms(self, problem, poseSplineDv, blakeZissermanDf=-1, timeOffsetPadding=0.0):
         
@@ -637,6 +646,11 @@ class IccImu(object):
         
         self.imuData = imu
         
+        #the measurements as arrays (N, Nx3, Nx3) for vectorized processing
+        self.imuTimes = np.array([ im.stamp.toSec() for im in imu ])
+        self.imuOmegas = np.array([ np.asarray(im.omega).flatten() for im in imu ]).reshape(-1,3)
+        self.imuAlphas = np.array([ np.asarray(im.alpha).flatten() for im in imu ]).reshape(-1,3)
+        
         if len(self.imuData)>1:
             print("\r  Read %d imu readings over %.1f seconds                   " \
                     % (len(imu), imu[-1].stamp.toSec() - imu[0].stamp.toSec()))
@@ -666,48 +680,25 @@ class IccImu(object):
             self.q_i_b_Dv.setActive(True)
             self.r_b_Dv.setActive(True)
 
+    def getErrorTermModel(self):
+        #the imu model shared by the accelerometer and gyroscope error terms
+        return ket.ImuErrorTermModel(self.q_i_b_Dv.toExpression(), self.r_b_Dv.toExpression())
+
     def addAccelerometerErrorTerms(self, problem, poseSplineDv, g_w, mSigma=0.0, \
                                    accelNoiseScale=1.0):
         print("")
         print("Adding accelerometer error terms ({0})".format(self.dataset.topic))
         
-        #progress bar
-        iProgress = sm.Progress2( len(self.imuData) )
-        iProgress.sample()
-        
-        # AccelerometerError(measurement,  invR,  C_b_w,  acceleration_w,  bias,  g_w)
+        # EuclideanError(measurement, invR, a(C_b_w, acceleration_w, g_w, imu model) + bias) for all measurements at once
         weight = 1.0/accelNoiseScale
-        accelErrors = []
-        num_skipped = 0
-        
+        accelErrors = ket.buildAccelerometerErrorTerms(poseSplineDv, self.accelBiasDv, self.getErrorTermModel(), g_w, \
+                                                       self.imuTimes + self.timeOffset, self.imuAlphas, \
+                                                       self.imuData[0].alphaInvR * weight)
         if mSigma > 0.0:
-            mest = aopt.HuberMEstimator(mSigma)
-        else:
-            mest = aopt.NoMEstimator()
-            
-        for im in self.imuData:
-            tk = im.stamp.toSec() + self.timeOffset
-            if tk > poseSplineDv.spline().t_min() and tk < poseSplineDv.spline().t_max():
-                C_b_w = poseSplineDv.orientation(tk).inverse()
-                a_w = poseSplineDv.linearAcceleration(tk)
-                b_i = self.accelBiasDv.toEuclideanExpression(tk,0)
-                w_b = poseSplineDv.angularVelocityBodyFrame(tk)
-                w_dot_b = poseSplineDv.angularAccelerationBodyFrame(tk)
-                C_i_b = self.q_i_b_Dv.toExpression()
-                r_b = self.r_b_Dv.toExpression()
-                a = C_i_b * (C_b_w * (a_w - g_w) + \
-                             w_dot_b.cross(r_b) + w_b.cross(w_b.cross(r_b)))
-                aerr = ket.EuclideanError(im.alpha, im.alphaInvR * weight, a + b_i)
-                aerr.setMEstimatorPolicy(mest)
-                accelErrors.append(aerr)
-                problem.addErrorTerm(aerr)
-            else:
-                num_skipped = num_skipped + 1
+            accelErrors.setMEstimatorPolicy(aopt.HuberMEstimator(mSigma))
+        accelErrors.addToProblem(problem)
 
-            #update progress bar
-            iProgress.sample()
-
-        print("\r  Added {0} of {1} accelerometer error terms (skipped {2} out-of-bounds measurements)".format( len(self.imuData)-num_skipped, len(self.imuData), num_skipped ))
+        print("\r  Added {0} of {1} accelerometer error terms (skipped {2} out-of-bounds measurements)".format( len(accelErrors), len(self.imuData), accelErrors.numSkipped() ))
         self.accelErrors = accelErrors
 
     def addGyroscopeErrorTerms(self, problem, poseSplineDv, mSigma=0.0, gyroNoiseScale=1.0, \
@@ -715,37 +706,21 @@ class IccImu(object):
         print("")
         print("Adding gyroscope error terms ({0})".format(self.dataset.topic))
         
-        #progress bar
-        iProgress = sm.Progress2( len(self.imuData) )
-        iProgress.sample()
-
-        num_skipped = 0
-        gyroErrors = []
+        # EuclideanError(measurement, invR, w(angularVelocity, imu model) + bias) for all measurements at once
         weight = 1.0/gyroNoiseScale
-        if mSigma > 0.0:
-            mest = aopt.HuberMEstimator(mSigma)
+        times = self.imuTimes + self.timeOffset
+        invR = self.imuData[0].omegaInvR * weight
+        if g_w is None:
+            gyroErrors = ket.buildGyroscopeErrorTerms(poseSplineDv, self.gyroBiasDv, self.getErrorTermModel(), \
+                                                      times, self.imuOmegas, invR)
         else:
-            mest = aopt.NoMEstimator()
-            
-        for im in self.imuData:
-            tk = im.stamp.toSec() + self.timeOffset
-            if tk > poseSplineDv.spline().t_min() and tk < poseSplineDv.spline().t_max():
-                # GyroscopeError(measurement, invR, angularVelocity, bias)
-                w_b = poseSplineDv.angularVelocityBodyFrame(tk)
-                b_i = self.gyroBiasDv.toEuclideanExpression(tk,0)
-                C_i_b = self.q_i_b_Dv.toExpression()
-                w = C_i_b * w_b
-                gerr = ket.EuclideanError(im.omega, im.omegaInvR * weight, w + b_i)
-                gerr.setMEstimatorPolicy(mest)
-                gyroErrors.append(gerr)
-                problem.addErrorTerm(gerr)
-            else:
-                num_skipped = num_skipped + 1
-
-            #update progress bar
-            iProgress.sample()
+            gyroErrors = ket.buildGyroscopeErrorTerms(poseSplineDv, self.gyroBiasDv, self.getErrorTermModel(), g_w, \
+                                                      times, self.imuOmegas, invR)
+        if mSigma > 0.0:
+            gyroErrors.setMEstimatorPolicy(aopt.HuberMEstimator(mSigma))
+        gyroErrors.addToProblem(problem)
 
-        print("\r  Added {0} of {1} gyroscope error terms (skipped {2} out-of-bounds measurements)".format( len(self.imuData)-num_skipped, len(self.imuData), num_skipped ))           
+        print("\r  Added {0} of {1} gyroscope error terms (skipped {2} out-of-bounds measurements)".format( len(gyroErrors), len(self.imuData), gyroErrors.numSkipped() ))           
         self.gyroErrors = gyroErrors
 
     def initBiasSplines(self, poseSpline, splineOrder, biasKnotsPerSecond):
@@ -827,8 +802,8 @@ class IccImu(object):
         #define the optimization 
         options = aopt.Optimizer2Options()
         options.verbose = False
-        options.linearSolver = aopt.BlockCholeskyLinearSystemSolver() #does not have multi-threading support
-        options.nThreads = 2
+        options.linearSolver = aopt.BlockCholeskyLinearSystemSolver() #builds the system on options.nThreads threads
+        options.nThreads = max(1,multiprocessing.cpu_count()-1)
         options.convergenceDeltaX = 1e-4
         options.convergenceDeltaJ = 1
         options.maxIterations = 50
@@ -860,11 +835,9 @@ class IccImu(object):
             sys.exit(-1)
          
         #get the time shift
-        corr = np.correlate(referenceAbsoluteOmega(), absoluteOmega(), "full")
-        discrete_shift = corr.argmax() - (np.size(absoluteOmega()) - 1)
+        corr, discrete_shift = crossCorrelationPeak(referenceAbsoluteOmega(), absoluteOmega())
         #get cont. time shift
-        times = [im.stamp.toSec() for im in self.imuData]
-        dT = np.mean(np.diff( times ))
+        dT = np.mean(np.diff( self.imuTimes ))
         shift = discrete_shift*dT
         
         if self.estimateTimedelay and not self.isReferenceImu:
@@ -966,100 +939,11 @@ class IccScaledMisalignedImu(IccImu):
         problem.addDesignVariable(self.M_accel_gyro_Dv, HELPER_GROUP_ID)
         self.M_accel_gyro_Dv.setActive(True)
 
-    def addAccelerometerErrorTerms(self, problem, poseSplineDv, g_w, mSigma=0.0, \
-                                   accelNoiseScale=1.0):
-        print("")
-        print("Adding accelerometer error terms ({0})".format(self.dataset.topic))
-        
-        #progress bar
-        iProgress = sm.Progress2( len(self.imuData) )
-        iProgress.sample()
-        
-        # AccelerometerError(measurement,  invR,  C_b_w,  acceleration_w,  bias,  g_w)
-        weight = 1.0/accelNoiseScale
-        accelErrors = []
-        num_skipped = 0
-        
-        if mSigma > 0.0:
-            mest = aopt.HuberMEstimator(mSigma)
-        else:
-            mest = aopt.NoMEstimator()
-            
-        for im in self.imuData:
-            tk = im.stamp.toSec() + self.timeOffset
-            if tk > poseSplineDv.spline().t_min() and tk < poseSplineDv.spline().t_max():
-                C_b_w = poseSplineDv.orientation(tk).inverse()
-                a_w = poseSplineDv.linearAcceleration(tk)
-                b_i = self.accelBiasDv.toEuclideanExpression(tk,0)
-                M = self.M_accel_Dv.toExpression()
-                w_b = poseSplineDv.angularVelocityBodyFrame(tk)
-                w_dot_b = poseSplineDv.angularAccelerationBodyFrame(tk)
-                C_i_b = self.q_i_b_Dv.toExpression()
-                r_b = self.r_b_Dv.toExpression()
-                a = M * (C_i_b * (C_b_w * (a_w - g_w) + \
-                                  w_dot_b.cross(r_b) + w_b.cross(w_b.cross(r_b))))
-
-                aerr = ket.EuclideanError(im.alpha, im.alphaInvR * weight, a + b_i)
-                aerr.setMEstimatorPolicy(mest)
-                accelErrors.append(aerr)
-                problem.addErrorTerm(aerr)
-            else:
-                num_skipped = num_skipped + 1
-
-            #update progress bar
-            iProgress.sample()
-
-        print("\r  Added {0} of {1} accelerometer error terms (skipped {2} out-of-bounds measurements)".format( len(self.imuData)-num_skipped, len(self.imuData), num_skipped ))
-        self.accelErrors = accelErrors
-
-    def addGyroscopeErrorTerms(self, problem, poseSplineDv, mSigma=0.0, gyroNoiseScale=1.0, g_w=None):
-        print("")
-        print("Adding gyroscope error terms ({0})".format(self.dataset.topic))
-        
-        #progress bar
-        iProgress = sm.Progress2( len(self.imuData) )
-        iProgress.sample()
-
-        num_skipped = 0
-        gyroErrors = []
-        weight = 1.0/gyroNoiseScale
-        if mSigma > 0.0:
-            mest = aopt.HuberMEstimator(mSigma)
-        else:
-            mest = aopt.NoMEstimator()
-            
-        for im in self.imuData:
-            tk = im.stamp.toSec() + self.timeOffset
-            if tk > poseSplineDv.spline().t_min() and tk < poseSplineDv.spline().t_max():
-                # GyroscopeError(measurement, invR, angularVelocity, bias)
-                w_b = poseSplineDv.angularVelocityBodyFrame(tk)
-                w_dot_b = poseSplineDv.angularAccelerationBodyFrame(tk)
-                b_i = self.gyroBiasDv.toEuclideanExpression(tk,0)
-                C_b_w = poseSplineDv.orientation(tk).inverse()
-                a_w = poseSplineDv.linearAcceleration(tk)
-                r_b = self.r_b_Dv.toExpression()
-                a_b = C_b_w * (a_w - g_w) + w_dot_b.cross(r_b) + w_b.cross(w_b.cross(r_b))
-
-                C_i_b = self.q_i_b_Dv.toExpression()
-                C_gyro_i = self.q_gyro_i_Dv.toExpression()
-                C_gyro_b = C_gyro_i * C_i_b
-                M = self.M_gyro_Dv.toExpression()
-                Ma = self.M_accel_gyro_Dv.toExpression()
-
-                w = M * (C_gyro_b * w_b) + Ma * (C_gyro_b * a_b)
-
-                gerr = ket.EuclideanError(im.omega, im.omegaInvR * weight, w + b_i)
-                gerr.setMEstimatorPolicy(mest)
-                gyroErrors.append(gerr)
-                problem.addErrorTerm(gerr)
-            else:
-                num_skipped = num_skipped + 1
-
-            #update progress bar
-            iProgress.sample()
-
-        print("\r  Added {0} of {1} gyroscope error terms (skipped {2} out-of-bounds measurements)".format( len(self.imuData)-num_skipped, len(self.imuData), num_skipped ))           
-        self.gyroErrors = gyroErrors
+    def getErrorTermModel(self):
+        model = IccImu.getErrorTermModel(self)
+        model.setScaleMisalignment(self.M_accel_Dv.toExpression(), self.q_gyro_i_Dv.toExpression(), \
+                                   self.M_gyro_Dv.toExpression(), self.M_accel_gyro_Dv.toExpression())
+        return model
 
 class IccScaledMisalignedSizeEffectImu(IccScaledMisalignedImu):
 
@@ -1117,56 +1001,8 @@ class IccScaledMisalignedSizeEffectImu(IccScaledMisalignedImu):
         problem.addDesignVariable(self.Iz_Dv, HELPER_GROUP_ID)
         self.Iz_Dv.setActive(False)
 
-    def addAccelerometerErrorTerms(self, problem, poseSplineDv, g_w, mSigma=0.0, \
-                                   accelNoiseScale=1.0):
-        print("")
-        print("Adding accelerometer error terms ({0})".format(self.dataset.topic))
-        
-        #progress bar
-        iProgress = sm.Progress2( len(self.imuData) )
-        iProgress.sample()
-        
-        # AccelerometerError(measurement,  invR,  C_b_w,  acceleration_w,  bias,  g_w)
-        weight = 1.0/accelNoiseScale
-        accelErrors = []
-        num_skipped = 0
-        
-        if mSigma > 0.0:
-            mest = aopt.HuberMEstimator(mSigma)
-        else:
-            mest = aopt.NoMEstimator()
-            
-        for im in self.imuData:
-            tk = im.stamp.toSec() + self.timeOffset
-            if tk > poseSplineDv.spline().t_min() and tk < poseSplineDv.spline().t_max():
-                C_b_w = poseSplineDv.orientation(tk).inverse()
-                a_w = poseSplineDv.linearAcceleration(tk)
-                b_i = self.accelBiasDv.toEuclideanExpression(tk,0)
-                M = self.M_accel_Dv.toExpression()
-                w_b = poseSplineDv.angularVelocityBodyFrame(tk)
-                w_dot_b = poseSplineDv.angularAccelerationBodyFrame(tk)
-                C_i_b = self.q_i_b_Dv.toExpression()
-                rx_b = self.r_b_Dv.toExpression() + C_i_b.inverse() * self.rx_i_Dv.toExpression()
-                ry_b = self.r_b_Dv.toExpression() + C_i_b.inverse() * self.ry_i_Dv.toExpression()
-                rz_b = self.r_b_Dv.toExpression() + C_i_b.inverse() * self.rz_i_Dv.toExpression()
-                Ix = self.Ix_Dv.toExpression()
-                Iy = self.Iy_Dv.toExpression()
-                Iz = self.Iz_Dv.toExpression()
-                
-                a = M * (C_i_b * (C_b_w * (a_w - g_w)) + \
-                         Ix * (C_i_b * (w_dot_b.cross(rx_b) + w_b.cross(w_b.cross(rx_b)))) + \
-                         Iy * (C_i_b * (w_dot_b.cross(ry_b) + w_b.cross(w_b.cross(ry_b)))) + \
-                         Iz * (C_i_b * (w_dot_b.cross(rz_b) + w_b.cross(w_b.cross(rz_b)))) )
-
-                aerr = ket.EuclideanError(im.alpha, im.alphaInvR * weight, a + b_i)
-                aerr.setMEstimatorPolicy(mest)
-                accelErrors.append(aerr)
-                problem.addErrorTerm(aerr)
-            else:
-                num_skipped = num_skipped + 1
-
-            #update progress bar
-            iProgress.sample()
-
-        print("\r  Added {0} of {1} accelerometer error terms (skipped {2} out-of-bounds measurements)".format( len(self.imuData)-num_skipped, len(self.imuData), num_skipped ))
-        self.accelErrors = accelErrors
\ No newline at end of file
+    def getErrorTermModel(self):
+        model = IccScaledMisalignedImu.getErrorTermModel(self)
+        model.setSizeEffect(self.rx_i_Dv.toExpression(), self.ry_i_Dv.toExpression(), self.rz_i_Dv.toExpression(), \
+                            self.Ix_Dv.toExpression(), self.Iy_Dv.toExpression(), self.Iz_Dv.toExpression())
+        return model
\ No newline at end of file
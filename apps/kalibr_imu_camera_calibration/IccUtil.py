@@ -44,9 +44,10 @@ def plotTrajectory(cself, fno=1, clearFigure=True, title=""):
     traj_max = np.array([-9999.0, -9999.0, -9999.0])
     traj_min = np.array([9999.0, 9999.0, 9999.0])
     T_last = None
-    for time in times:
-        position =  bodyspline.position(time)
-        orientation = sm.r2quat(bodyspline.orientation(time))
+    positions = bodyspline.positions(times)
+    orientations = bodyspline.orientations(times).reshape(-1,3,3)
+    for position, C in zip(positions, orientations):
+        orientation = sm.r2quat(C)
         T = sm.Transformation(orientation, position)
         sm.plotCoordinateFrame(a3d, T.T(), size=size)
         # record min max
@@ -69,34 +70,36 @@ def printErrorStatistics(cself, dest=sys.stdout):
     print("Normalized Residuals\n----------------------------", file=dest)
     for cidx, cam in enumerate(cself.CameraChain.camList):
         if len(cam.allReprojectionErrors)>0:
-            e2 = np.array([ np.sqrt(rerr.evaluateError()) for reprojectionErrors in cam.allReprojectionErrors for rerr in reprojectionErrors])
+            for rerr in cam.allReprojectionErrors:
+                rerr.evaluateError()
+            e2 = np.sqrt(np.hstack([ rerr.getCornerSquaredErrors() for rerr in cam.allReprojectionErrors ]))
             print("Reprojection error (cam{0}):     mean {1}, median {2}, std: {3}".format(cidx, np.mean(e2), np.median(e2), np.std(e2) ), file=dest)
         else:
             print("Reprojection error (cam{0}):     no corners".format(cidx), file=dest)
     
     for iidx, imu in enumerate(cself.ImuList):
         # Gyro errors
-        e2 = np.array([ np.sqrt(e.evaluateError()) for e in imu.gyroErrors ])
+        e2 = np.sqrt(imu.gyroErrors.evaluateErrors())
         print("Gyroscope error (imu{0}):        mean {1}, median {2}, std: {3}".format(iidx, np.mean(e2), np.median(e2), np.std(e2)), file=dest)
         # Accelerometer errors
-        e2 = np.array([ np.sqrt(e.evaluateError()) for e in imu.accelErrors ])
+        e2 = np.sqrt(imu.accelErrors.evaluateErrors())
         print("Accelerometer error (imu{0}):    mean {1}, median {2}, std: {3}".format(iidx, np.mean(e2), np.median(e2), np.std(e2)), file=dest)
 
     print("", file=dest)
     print("Residuals\n----------------------------", file=dest)
     for cidx, cam in enumerate(cself.CameraChain.camList):
         if len(cam.allReprojectionErrors)>0:
-            e2 = np.array([ np.linalg.norm(rerr.error()) for reprojectionErrors in cam.allReprojectionErrors for rerr in reprojectionErrors])
+            e2 = np.hstack([ np.linalg.norm(rerr.getMeasurements() - rerr.getPredictedMeasurements(), axis=1) for rerr in cam.allReprojectionErrors ])
             print("Reprojection error (cam{0}) [px]:     mean {1}, median {2}, std: {3}".format(cidx, np.mean(e2), np.median(e2), np.std(e2) ), file=dest)
         else:
             print("Reprojection error (cam{0}) [px]:     no corners".format(cidx), file=dest)
     
     for iidx, imu in enumerate(cself.ImuList):
         # Gyro errors
-        e2 = np.array([ np.linalg.norm(e.error()) for e in imu.gyroErrors ])
+        e2 = np.linalg.norm(imu.gyroErrors.errors(), axis=1)
         print("Gyroscope error (imu{0}) [rad/s]:     mean {1}, median {2}, std: {3}".format(iidx, np.mean(e2), np.median(e2), np.std(e2)), file=dest)
         # Accelerometer errors
-        e2 = np.array([ np.linalg.norm(e.error()) for e in imu.accelErrors ])
+        e2 = np.linalg.norm(imu.accelErrors.errors(), axis=1)
         print("Accelerometer error (imu{0}) [m/s^2]: mean {1}, median {2}, std: {3}".format(iidx, np.mean(e2), np.median(e2), np.std(e2)), file=dest)
 
 def printGravity(cself):
@@ -273,9 +276,10 @@ def exportPoses(cself, filename="poses_imu0.csv"):
 
     # Times are in nanoseconds -> convert to seconds
     # Use the ETH groundtruth csv format [t,q,p,v,bg,ba]
-    for time in times:
-        position =  bodyspline.position(time)
-        orientation = sm.r2quat(bodyspline.orientation(time))
+    positions = bodyspline.positions(times)
+    orientations = bodyspline.orientations(times).reshape(-1,3,3)
+    for time, position, C in zip(times, positions, orientations):
+        orientation = sm.r2quat(C)
         print("{:.0f},".format(1e9 * time) + ",".join(map("{:.6f}".format, position)) \
                + "," + ",".join(map("{:.6f}".format, orientation)) , file=f)
 
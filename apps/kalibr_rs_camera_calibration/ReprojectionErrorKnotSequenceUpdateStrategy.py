@@ -58,9 +58,7 @@ class ReprojectionErrorKnotSequenceUpdateStrategy(object):
         # linearly sample the old spline
         times = np.linspace(poseSpline.t_min(), poseSpline.t_max(), len(knots))
 
-        splinePoses = np.zeros((6, len(knots)))
-        for i, time in enumerate(times):
-            splinePoses[:,i] = poseSpline.eval(time)
+        splinePoses = poseSpline.evalAtTimes(times).T
 
         # guarantee that beginning and end times of the spline remain unchanged
         oldKnots = poseSpline.knots()
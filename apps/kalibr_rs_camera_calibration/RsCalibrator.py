@@ -429,7 +429,7 @@ class RsCalibrator(object):
         options.verbose = True
         options.nThreads = max(1,multiprocessing.cpu_count()-1)
         options.doSchurComplement = True
-        options.linearSolver = aopt.BlockCholeskyLinearSystemSolver()  #does not have multi-threading support
+        options.linearSolver = aopt.BlockCholeskyLinearSystemSolver() #builds the system on options.nThreads threads
 
         # stopping criteria
         options.maxIterations = maxIt
@@ -0,0 +1,112 @@
+#ifndef ASLAM_BACKEND_CAMERA_MULTI_CORNER_REPROJECTION_ERROR_HPP
+#define ASLAM_BACKEND_CAMERA_MULTI_CORNER_REPROJECTION_ERROR_HPP
+
+#include <aslam/backend/ErrorTerm.hpp>
+#include <aslam/backend/MEstimatorPolicies.hpp>
+#include <aslam/backend/TransformationExpression.hpp>
+#include <aslam/backend/CameraDesignVariable.hpp>
+#include <boost/shared_ptr.hpp>
+
+namespace aslam {
+namespace backend {
+
+/// \brief The reprojection errors of all observed corners of a calibration target
+///        in one camera image (one error term per view and camera).
+///
+///        The target to camera transformation is evaluated once per evaluation and
+///        all corners are projected in one loop. The error of every corner is whitened
+///        with the (shared) corner uncertainty and weighted by an optional per-corner
+///        M-estimator (iteratively reweighted), so the stacked error has dimension
+///        KeypointDimension x numCorners and an identity covariance.
+template<typename CAMERA_GEOMETRY_T>
+class MultiCornerReprojectionError : public ErrorTerm {
+ public:
+  EIGEN_MAKE_ALIGNED_OPERATOR_NEW
+  typedef CAMERA_GEOMETRY_T camera_geometry_t;
+
+  enum {
+    KeypointDimension = camera_geometry_t::KeypointDimension /*!< The dimension of the keypoint associated with this geometry policy */
+  };
+
+  typedef Eigen::Matrix<double, KeypointDimension, KeypointDimension> inverse_covariance_t;
+
+  /// \param measurements     the corners in image coordinates (N x KeypointDimension)
+  /// \param inverseCovariance the inverse covariance of a single corner
+  /// \param points           the corners in target coordinates (N x 3)
+  /// \param T_camera_target  the transformation from the target to the camera frame
+  MultiCornerReprojectionError(const Eigen::MatrixXd & measurements,
+                               const inverse_covariance_t & inverseCovariance,
+                               const Eigen::MatrixXd & points,
+                               const TransformationExpression & T_camera_target,
+                               CameraDesignVariable<camera_geometry_t> camera);
+
+  virtual ~MultiCornerReprojectionError();
+
+  /// \brief the number of corners of this error term
+  size_t numCorners() const;
+
+  /// \brief set the M-estimator applied to the squared error of every single corner
+  void setCornerMEstimatorPolicy(const boost::shared_ptr<MEstimator> & mEstimator);
+
+  /// \brief the measurements (N x KeypointDimension)
+  Eigen::MatrixXd getMeasurements() const;
+
+  /// \brief the predicted measurements for the current estimate (N x KeypointDimension)
+  Eigen::MatrixXd getPredictedMeasurements();
+
+  /// \brief the squared (whitened, unweighted) error of every corner of the last evaluation
+  Eigen::VectorXd getCornerSquaredErrors() const;
+
+  virtual void getWeightedJacobians(JacobianContainer & outJc, bool useMEstimator);
+  virtual void getWeightedError(Eigen::VectorXd & e, bool useMEstimator) const;
+
+  /// \brief the covariance of the (whitened) stacked error is the identity
+  virtual void getInvR(Eigen::MatrixXd & invR) const;
+  virtual Eigen::MatrixXd vsInvR() const;
+  /// \brief set the inverse covariance of a single corner (KeypointDimension x KeypointDimension)
+  virtual void vsSetInvR(const Eigen::MatrixXd & invR);
+
+ protected:
+  /// \brief evaluate the error term
+  virtual double evaluateErrorImplementation();
+
+  /// \brief evaluate the jacobian
+  virtual void evaluateJacobiansImplementation(JacobianContainer & J) const;
+
+  /// \brief build the hessian without a dense covariance matrix (the error is whitened)
+  virtual void buildHessianImplementation(SparseBlockMatrix & outHessian, Eigen::VectorXd & outRhs, bool useMEstimator);
+
+  virtual Eigen::VectorXd vsErrorImplementation() const;
+
+  virtual size_t getDimensionImplementation() const;
+
+ private:
+  /// \brief the measurements (KeypointDimension x N)
+  Eigen::MatrixXd _y;
+
+  /// \brief the homogeneous target points (4 x N)
+  Eigen::Matrix<double, 4, Eigen::Dynamic> _points;
+
+  /// \brief the square root of the inverse covariance of a single corner
+  inverse_covariance_t _sqrtInvR;
+
+  TransformationExpression _T_camera_target;
+
+  CameraDesignVariable<camera_geometry_t> _camera;
+
+  boost::shared_ptr<MEstimator> _cornerMEstimatorPolicy;
+
+  /// \brief the whitened and weighted stacked error
+  Eigen::VectorXd _error;
+
+  /// \brief the squared error and the square root of the M-estimator weight of every corner
+  Eigen::VectorXd _cornerSquaredErrors;
+  Eigen::VectorXd _cornerSqrtWeights;
+};
+
+}  // namespace backend
+}  // namespace aslam
+
+#include "implementation/MultiCornerReprojectionError.hpp"
+
+#endif /* ASLAM_BACKEND_CAMERA_MULTI_CORNER_REPROJECTION_ERROR_HPP */
@@ -0,0 +1,225 @@
+#include <sm/kinematics/transformations.hpp>
+#include <sm/eigen/matrix_sqrt.hpp>
+#include <aslam/Exceptions.hpp>
+
+namespace aslam {
+namespace backend {
+
+template<typename F>
+MultiCornerReprojectionError<F>::MultiCornerReprojectionError(
+    const Eigen::MatrixXd & measurements,
+    const inverse_covariance_t & inverseCovariance,
+    const Eigen::MatrixXd & points,
+    const TransformationExpression & T_camera_target,
+    CameraDesignVariable<camera_geometry_t> camera)
+    : _y(measurements.transpose()),
+      _T_camera_target(T_camera_target),
+      _camera(camera),
+      _cornerMEstimatorPolicy(new NoMEstimator()) {
+  SM_ASSERT_EQ(Exception, measurements.cols(), (int) KeypointDimension, "The measurements must be a N x " << KeypointDimension << " matrix");
+  SM_ASSERT_EQ(Exception, points.cols(), 3, "The target points must be a N x 3 matrix");
+  SM_ASSERT_EQ(Exception, points.rows(), measurements.rows(), "The number of target points and measurements must match");
+
+  _points.resize(4, points.rows());
+  _points.topRows<3>() = points.transpose();
+  _points.row(3).setOnes();
+
+  vsSetInvR(inverseCovariance);
+
+  _error.setZero(getDimensionImplementation());
+  _cornerSquaredErrors.setZero(numCorners());
+  _cornerSqrtWeights.setOnes(numCorners());
+
+  JacobianContainer::set_t dvs;
+  T_camera_target.getDesignVariables(dvs);  // pose dv's
+  camera.getDesignVariables(dvs);  // camera dv's
+
+  setDesignVariablesIterator(dvs.begin(), dvs.end());
+}
+
+template<typename F>
+MultiCornerReprojectionError<F>::~MultiCornerReprojectionError() {
+
+}
+
+template<typename F>
+size_t MultiCornerReprojectionError<F>::numCorners() const {
+  return _points.cols();
+}
+
+template<typename F>
+size_t MultiCornerReprojectionError<F>::getDimensionImplementation() const {
+  return KeypointDimension * numCorners();
+}
+
+template<typename F>
+void MultiCornerReprojectionError<F>::setCornerMEstimatorPolicy(
+    const boost::shared_ptr<MEstimator> & mEstimator) {
+  _cornerMEstimatorPolicy = mEstimator;
+}
+
+template<typename F>
+double MultiCornerReprojectionError<F>::evaluateErrorImplementation() {
+  const camera_geometry_t & cam = *_camera.camera();
+
+  // the pose is evaluated once for all corners
+  const Eigen::Matrix<double, 4, Eigen::Dynamic> P = _T_camera_target.toTransformationMatrix() * _points;
+
+  double squaredError = 0.0;
+  Eigen::Matrix<double, KeypointDimension, 1> hat_y;
+  for (int i = 0; i < P.cols(); ++i) {
+    const Eigen::Vector4d p = P.col(i);
+    cam.homogeneousToKeypoint(p, hat_y);
+    const Eigen::Matrix<double, KeypointDimension, 1> e = _sqrtInvR.transpose() * (_y.col(i) - hat_y);
+
+    _cornerSquaredErrors[i] = e.squaredNorm();
+    const double w = _cornerMEstimatorPolicy->getWeight(_cornerSquaredErrors[i]);
+    _cornerSqrtWeights[i] = sqrt(w);
+    _error.segment<KeypointDimension>(KeypointDimension * i) = _cornerSqrtWeights[i] * e;
+    squaredError += w * _cornerSquaredErrors[i];
+  }
+
+  return squaredError;
+}
+
+template<typename F>
+void MultiCornerReprojectionError<F>::evaluateJacobiansImplementation(
+    JacobianContainer & _jacobians) const {
+  const camera_geometry_t & cam = *_camera.camera();
+  CameraDesignVariable<camera_geometry_t> camera = _camera;
+
+  const Eigen::Matrix<double, 4, Eigen::Dynamic> P = _T_camera_target.toTransformationMatrix() * _points;
+  const int dim = getDimensionImplementation();
+  const bool projectionActive = camera.projectionDesignVariable()->isActive();
+  const bool distortionActive = camera.distortionDesignVariable()->isActive();
+
+  // stack the Jacobians of all corners (d error / d (T p) chained with T p boxminus)
+  Eigen::MatrixXd J_T(dim, 6);
+  Eigen::MatrixXd J_projection(dim, camera.projectionDesignVariable()->minimalDimensions());
+  Eigen::MatrixXd J_distortion(dim, camera.distortionDesignVariable()->minimalDimensions());
+
+  typename camera_geometry_t::jacobian_homogeneous_t J;
+  Eigen::Matrix<double, KeypointDimension, 1> hat_y;
+  Eigen::MatrixXd Jp;
+  Eigen::MatrixXd Jd;
+  for (int i = 0; i < P.cols(); ++i) {
+    const Eigen::Vector4d p = P.col(i);
+    const Eigen::Matrix<double, KeypointDimension, KeypointDimension> A = -_cornerSqrtWeights[i] * _sqrtInvR.transpose();
+    cam.homogeneousToKeypoint(p, hat_y, J);
+    J_T.middleRows<KeypointDimension>(KeypointDimension * i) = A * J * sm::kinematics::boxMinus(p);
+
+    if (projectionActive) {
+      cam.homogeneousToKeypointIntrinsicsJacobian(p, Jp);
+      J_projection.middleRows<KeypointDimension>(KeypointDimension * i) = A * Jp;
+    }
+    if (distortionActive) {
+      cam.homogeneousToKeypointDistortionJacobian(p, Jd);
+      J_distortion.middleRows<KeypointDimension>(KeypointDimension * i) = A * Jd;
+    }
+  }
+
+  _T_camera_target.evaluateJacobians(_jacobians, J_T);
+  if (projectionActive)
+    _jacobians.add(camera.projectionDesignVariable().get(), J_projection);
+  if (distortionActive)
+    _jacobians.add(camera.distortionDesignVariable().get(), J_distortion);
+}
+
+template<typename F>
+void MultiCornerReprojectionError<F>::buildHessianImplementation(
+    SparseBlockMatrix & outHessian, Eigen::VectorXd & outRhs, bool useMEstimator) {
+  JacobianContainer J(getDimensionImplementation());
+  evaluateJacobians(J);
+  double sqrtWeight = 1.0;
+  if (useMEstimator)
+    sqrtWeight = sqrt(_mEstimatorPolicy->getWeight(getRawSquaredError()));
+
+  // only the upper triangle (the container is sorted by block index)
+  JacobianContainer::map_t::iterator it = J.begin();
+  for (; it != J.end(); ++it)
+    it->second *= sqrtWeight * it->first->scaling();
+  const Eigen::VectorXd e = sqrtWeight * _error;
+  for (it = J.begin(); it != J.end(); ++it) {
+    const int r = it->first->blockIndex();
+    outRhs.segment(outHessian.rowBaseOfBlock(r), it->second.cols()) -= it->second.transpose() * e;
+    for (JacobianContainer::map_t::iterator it2 = it; it2 != J.end(); ++it2) {
+      *outHessian.block(r, it2->first->blockIndex(), true) += it->second.transpose() * it2->second;
+    }
+  }
+}
+
+template<typename F>
+void MultiCornerReprojectionError<F>::getWeightedJacobians(
+    JacobianContainer & outJc, bool useMEstimator) {
+  evaluateJacobians(outJc);
+  double sqrtWeight = 1.0;
+  if (useMEstimator)
+    sqrtWeight = sqrt(_mEstimatorPolicy->getWeight(getRawSquaredError()));
+  JacobianContainer::map_t::iterator it = outJc.begin();
+  for (; it != outJc.end(); ++it) {
+    it->second *= sqrtWeight * it->first->scaling();
+  }
+}
+
+template<typename F>
+void MultiCornerReprojectionError<F>::getWeightedError(
+    Eigen::VectorXd & e, bool useMEstimator) const {
+  double sqrtWeight = 1.0;
+  if (useMEstimator)
+    sqrtWeight = sqrt(_mEstimatorPolicy->getWeight(getRawSquaredError()));
+  e = _error * sqrtWeight;
+}
+
+template<typename F>
+Eigen::VectorXd MultiCornerReprojectionError<F>::vsErrorImplementation() const {
+  return _error;
+}
+
+template<typename F>
+void MultiCornerReprojectionError<F>::getInvR(Eigen::MatrixXd & invR) const {
+  invR = Eigen::MatrixXd::Identity(getDimensionImplementation(), getDimensionImplementation());
+}
+
+template<typename F>
+Eigen::MatrixXd MultiCornerReprojectionError<F>::vsInvR() const {
+  Eigen::MatrixXd invR;
+  getInvR(invR);
+  return invR;
+}
+
+template<typename F>
+void MultiCornerReprojectionError<F>::vsSetInvR(const Eigen::MatrixXd & invR) {
+  SM_ASSERT_EQ(Exception, invR.rows(), (int) KeypointDimension, "The covariance matrix must be the covariance of a single corner");
+  SM_ASSERT_EQ(Exception, invR.cols(), (int) KeypointDimension, "The covariance matrix must be square");
+  Eigen::MatrixXd sqrtInvR;
+  sm::eigen::computeMatrixSqrt(invR, sqrtInvR);
+  _sqrtInvR = sqrtInvR;
+}
+
+template<typename F>
+Eigen::MatrixXd MultiCornerReprojectionError<F>::getMeasurements() const {
+  return _y.transpose();
+}
+
+template<typename F>
+Eigen::MatrixXd MultiCornerReprojectionError<F>::getPredictedMeasurements() {
+  const camera_geometry_t & cam = *_camera.camera();
+
+  const Eigen::Matrix<double, 4, Eigen::Dynamic> P = _T_camera_target.toTransformationMatrix() * _points;
+  Eigen::MatrixXd hat_y(P.cols(), (int) KeypointDimension);
+  Eigen::Matrix<double, KeypointDimension, 1> y;
+  for (int i = 0; i < P.cols(); ++i) {
+    const Eigen::Vector4d p = P.col(i);
+    cam.homogeneousToKeypoint(p, y);
+    hat_y.row(i) = y.transpose();
+  }
+  return hat_y;
+}
+
+template<typename F>
+Eigen::VectorXd MultiCornerReprojectionError<F>::getCornerSquaredErrors() const {
+  return _cornerSquaredErrors;
+}
+
+}  // namespace backend
+}  // namespace aslam
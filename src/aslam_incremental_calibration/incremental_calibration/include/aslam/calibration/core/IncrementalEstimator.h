@@ -25,12 +25,15 @@
 #define ASLAM_CALIBRATION_CORE_INCREMENTAL_ESTIMATOR_H
 
 #include <cstddef>
+#include <vector>
+#include <unordered_map>
 
 #include <boost/shared_ptr.hpp>
 
 #include <Eigen/Core>
 
 #include <aslam/backend/Optimizer2Options.hpp>
+#include <aslam/backend/DesignVariable.hpp>
 
 #include "aslam/calibration/core/LinearSolverOptions.h"
 
@@ -170,12 +173,21 @@ namespace aslam {
         */
       /// Adds a measurement batch to the estimator
       ReturnValue addBatch(const BatchSP& batch, bool force = false);
+      /// Adds measurement batches (always kept) and optimizes once
+      ReturnValue addBatches(const std::vector<BatchSP>& batches);
       /// Removes a measurement batch from the estimator
       void removeBatch(size_t idx);
       /// Removes a measurement batch from the estimator
       void removeBatch(const BatchSP& batch);
+      /// Re-runs the optimizer after a batch in the estimator was modified
+      ReturnValue updateBatch(const BatchSP& batch);
       /// Re-runs the optimizer
       ReturnValue reoptimize();
+      /// Marginalizes a measurement batch into the prior on the marg. group
+      void marginalizeBatch(size_t idx);
+      /// Returns the expected information gains of candidate batches
+      Eigen::VectorXd getExpectedInformationGains(const std::vector<BatchSP>&
+        batches, size_t nThreads = 1);
       /** @}
         */
 
@@ -184,6 +196,8 @@ namespace aslam {
         */
       /// Returns the number of batches
       size_t getNumBatches() const;
+      /// Returns the number of marginalized batches
+      size_t getNumMarginalizedBatches() const;
       /// Returns the incremental optimization problem
       const IncrementalOptimizationProblem* getProblem() const;
       /// Returns the current options
@@ -248,6 +262,14 @@ namespace aslam {
       void orderMarginalizedDesignVariables();
       /// Restores the linear solver
       void restoreLinearSolver();
+      /// Returns the information of a candidate batch (marg. group first),
+      /// the candidate design variables must have unique block indices
+      Eigen::MatrixXd getBatchInformation(const BatchSP& batch,
+        const std::unordered_map<const aslam::backend::DesignVariable*,
+        size_t>& margOffsets, size_t margDim) const;
+      /// Returns the expected information gain from a batch information
+      double getExpectedInformationGain(const Eigen::MatrixXd& Hf,
+        size_t margDim) const;
       /** @}
         */
 
@@ -308,6 +330,10 @@ namespace aslam {
       double _initialCost;
       /// Final cost
       double _finalCost;
+      /// Prior on the marginalized group from the marginalized batches
+      BatchSP _margPrior;
+      /// Number of marginalized batches
+      size_t _numMarginalizedBatches;
       /** @}
         */
 
@@ -111,6 +111,8 @@ namespace aslam {
         const;
       /// Inserts an error term into the problem
       void addErrorTerm(const ErrorTermSP& errorTerm);
+      /// Removes an error term from the problem
+      void removeErrorTerm(const ErrorTerm* errorTerm);
       /// Checks if an error term is in the problem
       bool isErrorTermInProblem(const ErrorTerm* errorTerm) const;
       /// Permutes the error terms
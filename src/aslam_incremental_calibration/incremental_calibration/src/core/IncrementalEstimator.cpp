@@ -22,18 +22,30 @@
 #include <utility>
 #include <vector>
 #include <ostream>
+#include <limits>
+#include <cmath>
+#include <unordered_set>
 
 #include <boost/make_shared.hpp>
+#include <boost/thread.hpp>
+
+#include <Eigen/Cholesky>
+#include <Eigen/LU>
 
 #include <sm/PropertyTree.hpp>
 
 #include <aslam/backend/GaussNewtonTrustRegionPolicy.hpp>
 #include <aslam/backend/Optimizer2.hpp>
+#include <aslam/backend/ErrorTerm.hpp>
+#include <aslam/backend/JacobianContainer.hpp>
+#include <aslam/backend/Marginalizer.hpp>
 
 #include "aslam/calibration/core/LinearSolver.h"
+#include "aslam/calibration/core/OptimizationProblem.h"
 #include "aslam/calibration/core/IncrementalOptimizationProblem.h"
 #include "aslam/calibration/base/Timestamp.h"
 #include "aslam/calibration/exceptions/InvalidOperationException.h"
+#include "aslam/calibration/exceptions/OutOfBoundException.h"
 
 namespace aslam {
   namespace calibration {
@@ -61,7 +73,8 @@ namespace aslam {
         _memoryUsage(0),
         _numFlops(0.0),
         _initialCost(0.0),
-        _finalCost(0.0) {
+        _finalCost(0.0),
+        _numMarginalizedBatches(0) {
       // create linear solver and trust region policy for the optimizer
       OptimizerOptions& optOptions = _optimizer->options();
       optOptions.linearSystemSolver =
@@ -87,7 +100,8 @@ namespace aslam {
         _memoryUsage(0),
         _numFlops(0.0),
         _initialCost(0.0),
-        _finalCost(0.0) {
+        _finalCost(0.0),
+        _numMarginalizedBatches(0) {
       // create the optimizer, linear solver, and trust region policy
       _optimizer = boost::make_shared<Optimizer>(
         sm::PropertyTree(config, "optimizer"),
@@ -339,8 +353,12 @@ namespace aslam {
       // query the time
       const double timeStart = Timestamp::now();
 
-      // insert new batch in the problem
+      // insert new batch in the problem (the marginalization prior stays last)
+      if (_margPrior)
+        _problem->remove(_margPrior);
       _problem->add(problem);
+      if (_margPrior)
+        _problem->add(_margPrior);
 
       // ensure marginalized design variables are well located
       orderMarginalizedDesignVariables();
@@ -469,7 +487,26 @@ namespace aslam {
       return ret;
     }
 
+    IncrementalEstimator::ReturnValue IncrementalEstimator::addBatches(
+        const std::vector<BatchSP>& batches) {
+      // insert the new batches in the problem (the marginalization prior
+      // stays last)
+      if (_margPrior)
+        _problem->remove(_margPrior);
+      for (auto it = batches.cbegin(); it != batches.cend(); ++it)
+        _problem->add(*it);
+      if (_margPrior)
+        _problem->add(_margPrior);
+
+      // a single optimization for all batches
+      return reoptimize();
+    }
+
     void IncrementalEstimator::removeBatch(size_t idx) {
+      if (idx >= getNumBatches())
+        throw OutOfBoundException<size_t>(idx, getNumBatches(),
+          "index out of bound", __FILE__, __LINE__);
+
       // remove the batch
       _problem->remove(idx);
 
@@ -483,8 +520,222 @@ namespace aslam {
         removeBatch(std::distance(_problem->getOptimizationProblemBegin(), it));
     }
 
+    IncrementalEstimator::ReturnValue IncrementalEstimator::updateBatch(
+        const BatchSP& batch) {
+      if (_problem->getOptimizationProblem(batch) ==
+          _problem->getOptimizationProblemEnd())
+        throw InvalidOperationException(
+          "IncrementalEstimator::updateBatch(): "
+          "batch is not in the estimator", __FILE__, __LINE__);
+
+      // the batch was already accepted, only the optimizer has to run again
+      return reoptimize();
+    }
+
+    void IncrementalEstimator::marginalizeBatch(size_t idx) {
+      if (idx >= getNumBatches())
+        throw OutOfBoundException<size_t>(idx, getNumBatches(),
+          "index out of bound", __FILE__, __LINE__);
+      const BatchSP batch = _problem->getOptimizationProblems().at(idx);
+
+      // design variables of the batch that no other batch shares go away
+      std::vector<aslam::backend::DesignVariable*> dvs;
+      std::unordered_set<const aslam::backend::DesignVariable*> margDVs;
+      const auto& groups = batch->getDesignVariablesGroups();
+      for (auto it = groups.cbegin(); it != groups.cend(); ++it) {
+        if (it->first == _margGroupId)
+          continue;
+        for (auto dvIt = it->second.cbegin(); dvIt != it->second.cend();
+            ++dvIt) {
+          if (!(*dvIt)->isActive())
+            continue;
+          bool shared = false;
+          for (size_t i = 0; i < getNumBatches() && !shared; ++i)
+            shared = i != idx && _problem->getOptimizationProblem(i)->
+              isDesignVariableInProblem(dvIt->get());
+          if (!shared) {
+            dvs.push_back(dvIt->get());
+            margDVs.insert(dvIt->get());
+          }
+        }
+      }
+      const int numMargDVs = static_cast<int>(dvs.size());
+
+      // all other design variables of the batch and the current prior remain
+      std::vector<std::pair<Batch::DesignVariableSP, size_t> > priorDVs;
+      std::unordered_set<const aslam::backend::DesignVariable*> priorDVsLookup;
+      std::vector<aslam::backend::ErrorTerm*> ets;
+      std::vector<BatchSP> batches(1, batch);
+      if (_margPrior)
+        batches.push_back(_margPrior);
+      for (auto bIt = batches.cbegin(); bIt != batches.cend(); ++bIt) {
+        const auto& groups = (*bIt)->getDesignVariablesGroups();
+        for (auto it = groups.cbegin(); it != groups.cend(); ++it)
+          for (auto dvIt = it->second.cbegin(); dvIt != it->second.cend();
+              ++dvIt)
+            if ((*dvIt)->isActive() && !margDVs.count(dvIt->get()) &&
+                priorDVsLookup.insert(dvIt->get()).second) {
+              priorDVs.push_back(std::make_pair(*dvIt, it->first));
+              dvs.push_back(dvIt->get());
+            }
+        const auto& errorTerms = (*bIt)->getErrorTerms();
+        for (auto it = errorTerms.cbegin(); it != errorTerms.cend(); ++it)
+          ets.push_back(it->get());
+      }
+
+      // linearize at the current estimate and marginalize
+      boost::shared_ptr<aslam::backend::MarginalizationPriorErrorTerm> priorET;
+      Eigen::MatrixXd cov;
+      std::vector<aslam::backend::DesignVariable*> dvsTop;
+      aslam::backend::marginalize(dvs, ets, numMargDVs, true, priorET, cov,
+        dvsTop);
+
+      // the new prior replaces the batch and the previous prior
+      auto prior = boost::make_shared<Batch>();
+      for (auto it = priorDVs.cbegin(); it != priorDVs.cend(); ++it)
+        prior->addDesignVariable(it->first, it->second);
+      prior->addErrorTerm(priorET);
+      _problem->remove(idx);
+      _problem->add(prior);
+      if (_margPrior)
+        _problem->remove(_margPrior);
+      _margPrior = prior;
+      _numMarginalizedBatches++;
+    }
+
+    Eigen::VectorXd IncrementalEstimator::getExpectedInformationGains(
+        const std::vector<BatchSP>& batches, size_t nThreads) {
+      // without a full rank marginal covariance, any batch is informative
+      Eigen::VectorXd gains = Eigen::VectorXd::Constant(batches.size(),
+        std::numeric_limits<double>::infinity());
+      if (_sigma2Theta.size() == 0 || _rankThetaDeficiency > 0 ||
+          batches.empty())
+        return gains;
+
+      // columns of the active marginalized design variables in sigma2Theta
+      std::unordered_map<const aslam::backend::DesignVariable*, size_t>
+        margOffsets;
+      size_t margDim = 0;
+      const auto& margDVs = _problem->getDesignVariablesGroup(_margGroupId);
+      for (auto it = margDVs.cbegin(); it != margDVs.cend(); ++it)
+        if ((*it)->isActive()) {
+          margOffsets[*it] = margDim;
+          margDim += (*it)->minimalDimensions();
+        }
+      if (margDim != static_cast<size_t>(_sigma2Theta.rows()))
+        throw InvalidOperationException(
+          "IncrementalEstimator::getExpectedInformationGains(): "
+          "marginal covariance does not match the marginalized group",
+          __FILE__, __LINE__);
+
+      // the Jacobian container is sorted by block index: the design variables
+      // that are only in the candidates get unique block indices (shared
+      // among the candidates) before the threads start
+      std::unordered_map<aslam::backend::DesignVariable*, int> blockIndices;
+      int blockIndex = static_cast<int>(_problem->numDesignVariables());
+      for (auto it = batches.cbegin(); it != batches.cend(); ++it) {
+        const size_t numDV = (*it)->numDesignVariables();
+        for (size_t i = 0; i < numDV; ++i) {
+          aslam::backend::DesignVariable* dv = (*it)->designVariable(i);
+          if (!dv->isActive() || margOffsets.count(dv) ||
+              _problem->isDesignVariableInProblem(dv) ||
+              blockIndices.count(dv))
+            continue;
+          blockIndices[dv] = dv->blockIndex();
+          dv->setBlockIndex(++blockIndex);
+        }
+      }
+
+      // the candidates are distributed among the threads (round robin), the
+      // shared expression nodes guard their cached values
+      nThreads = std::max<size_t>(1, std::min(nThreads, batches.size()));
+      boost::thread_group threads;
+      for (size_t t = 0; t < nThreads; ++t) {
+        threads.create_thread([&, t]() {
+          for (size_t i = t; i < batches.size(); i += nThreads) {
+            try {
+              gains(i) = getExpectedInformationGain(getBatchInformation(
+                batches[i], margOffsets, margDim), margDim);
+            }
+            catch (const std::exception& e) {
+              gains(i) = std::numeric_limits<double>::infinity();
+            }
+          }
+        });
+      }
+      threads.join_all();
+      for (auto it = blockIndices.cbegin(); it != blockIndices.cend(); ++it)
+        it->first->setBlockIndex(it->second);
+      return gains;
+    }
+
+    Eigen::MatrixXd IncrementalEstimator::getBatchInformation(
+        const BatchSP& batch, const std::unordered_map<const
+        aslam::backend::DesignVariable*, size_t>& margOffsets, size_t margDim)
+        const {
+      // columns of the remaining active design variables of the batch
+      std::unordered_map<const aslam::backend::DesignVariable*, size_t>
+        otherOffsets;
+      size_t otherDim = 0;
+      const size_t numDV = batch->numDesignVariables();
+      for (size_t i = 0; i < numDV; ++i) {
+        aslam::backend::DesignVariable* dv = batch->designVariable(i);
+        if (!dv->isActive() || margOffsets.count(dv))
+          continue;
+        otherOffsets[dv] = otherDim;
+        otherDim += dv->minimalDimensions();
+      }
+
+      // information of the batch at the current estimate
+      const size_t dim = margDim + otherDim;
+      Eigen::MatrixXd H = Eigen::MatrixXd::Zero(dim, dim);
+      const size_t numET = batch->numErrorTerms();
+      for (size_t i = 0; i < numET; ++i) {
+        aslam::backend::ErrorTerm* et = batch->errorTerm(i);
+        et->evaluateError();
+        aslam::backend::JacobianContainer jc(et->dimension());
+        et->getWeightedJacobians(jc, true);
+        Eigen::MatrixXd J = Eigen::MatrixXd::Zero(et->dimension(), dim);
+        for (auto it = jc.begin(); it != jc.end(); ++it) {
+          auto margIt = margOffsets.find(it->first);
+          if (margIt != margOffsets.end())
+            J.block(0, margIt->second, it->second.rows(), it->second.cols()) =
+              it->second;
+          else
+            J.block(0, margDim + otherOffsets.at(it->first),
+              it->second.rows(), it->second.cols()) = it->second;
+        }
+        H.selfadjointView<Eigen::Lower>().rankUpdate(J.transpose());
+      }
+      return H.selfadjointView<Eigen::Lower>();
+    }
+
+    double IncrementalEstimator::getExpectedInformationGain(
+        const Eigen::MatrixXd& Hf, size_t margDim) const {
+      // marginalize the batch design variables (Schur complement)
+      const size_t otherDim = Hf.rows() - margDim;
+      Eigen::MatrixXd S = Hf.topLeftCorner(margDim, margDim);
+      if (otherDim > 0) {
+        Eigen::LDLT<Eigen::MatrixXd> Hoo(Hf.bottomRightCorner(otherDim,
+          otherDim));
+        S -= Hf.topRightCorner(margDim, otherDim) *
+          Hoo.solve(Hf.bottomLeftCorner(otherDim, margDim));
+      }
+
+      // 0.5 * log2 det(I + Sigma * S), same units as the information gain
+      const Eigen::MatrixXd M = Eigen::MatrixXd::Identity(margDim, margDim) +
+        _sigma2Theta * S;
+      const Eigen::VectorXd u = M.partialPivLu().matrixLU().diagonal();
+      return 0.5 * u.array().abs().log().sum() / std::log(2);
+    }
+
     size_t IncrementalEstimator::getNumBatches() const {
-      return _problem->getNumOptimizationProblems();
+      // the marginalization prior is not a measurement batch
+      return _problem->getNumOptimizationProblems() - (_margPrior ? 1 : 0);
+    }
+
+    size_t IncrementalEstimator::getNumMarginalizedBatches() const {
+      return _numMarginalizedBatches;
     }
 
     void IncrementalEstimator::orderMarginalizedDesignVariables() {
@@ -19,6 +19,7 @@
 #include "aslam/calibration/core/OptimizationProblem.h"
 
 #include <utility>
+#include <algorithm>
 
 #include <aslam/backend/DesignVariable.hpp>
 #include <aslam/backend/ErrorTerm.hpp>
@@ -160,6 +161,19 @@ namespace aslam {
       _errorTerms.push_back(errorTerm);
     }
 
+    void OptimizationProblem::removeErrorTerm(const ErrorTerm* errorTerm) {
+      if (!errorTerm)
+        throw NullPointerException("errorTerm", __FILE__, __LINE__,
+          __PRETTY_FUNCTION__);
+      if (!isErrorTermInProblem(errorTerm))
+        throw InvalidOperationException("error term is not in the problem",
+          __FILE__, __LINE__, __PRETTY_FUNCTION__);
+      auto it = std::find_if(_errorTerms.begin(), _errorTerms.end(),
+        [errorTerm](const ErrorTermSP& e) { return e.get() == errorTerm; });
+      _errorTerms.erase(it);
+      _errorTermsLookup.erase(errorTerm);
+    }
+
     bool OptimizationProblem::
         isErrorTermInProblem(const ErrorTerm* errorTerm) const {
       return _errorTermsLookup.count(errorTerm);
@@ -273,6 +273,27 @@ namespace bsplines {
        */
       std::pair<Eigen::VectorXd, Eigen::MatrixXd> evalDAndJacobian(double t, int derivativeOrder) const;
 
+      /** 
+       * Evaluate the spline curve at a sorted (non-decreasing) sequence of times.
+       * 
+       * @param times The sorted times to evaluate the spline curve.
+       * 
+       * @return A matrix with one row per time, row i is eval(times[i]).
+       */
+      Eigen::MatrixXd evalAtTimes(const Eigen::VectorXd & times) const;
+
+      /** 
+       * Evaluate the derivative of the spline curve at a sorted (non-decreasing) sequence
+       * of times. The knot sequence is walked once instead of searched for every time and
+       * the local coefficients are combined with the basis matrix once per segment.
+       * 
+       * @param times The sorted times to evaluate the spline derivative.
+       * @param derivativeOrder The order of the derivative. This must be >= 0
+       * 
+       * @return A matrix with one row per time, row i is evalD(times[i], derivativeOrder).
+       */
+      Eigen::MatrixXd evalDAtTimes(const Eigen::VectorXd & times, int derivativeOrder) const;
+
       /** 
        * Evaluate the derivative of the spline curve at time t and retrieve the Jacobian
        * of the value with respect to small changes in the paramter vector. The Jacobian
@@ -607,6 +628,16 @@ namespace bsplines {
        */
       std::pair<double,int> computeTIndex(double t) const;
 
+      /** 
+       * The batch version of computeUAndTIndex() for a sorted sequence of times. The
+       * knot sequence is walked once from the first to the last time.
+       * 
+       * @param times The sorted times being queried.
+       * @param outU The values \f$ u = \frac{t - t_i}{t_{i+1} - t_i} \f$ for all times.
+       * @param outIndices The indices \f$i\f$ for all times.
+       */
+      void computeUAndTIndices(const Eigen::VectorXd & times, Eigen::VectorXd & outU, Eigen::VectorXi & outIndices) const;
+
       /** 
        * Compute the vector \f$ \mathbf u(t) \f$ for a spline of
        * order \f$ S \f$, this is an \f$ S \times 1 \f$ vector.
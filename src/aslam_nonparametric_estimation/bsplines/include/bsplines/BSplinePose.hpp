@@ -82,6 +82,13 @@ namespace bsplines {
       Eigen::Vector3d angularAccelerationAndJacobian(double tk, Eigen::MatrixXd * J, Eigen::VectorXi * coefficientIndices) const;
       Eigen::Vector3d angularAccelerationBodyFrameAndJacobian(double tk, Eigen::MatrixXd * J, Eigen::VectorXi * coefficientIndices) const;
 
+      // Evaluation at a sorted (non-decreasing) sequence of times (see BSpline::evalDAtTimes()).
+      // The results have one row per time, the rotation matrices are stored row-major (N x 9).
+      Eigen::MatrixXd positions(const Eigen::VectorXd & times) const;
+      Eigen::MatrixXd orientations(const Eigen::VectorXd & times) const;
+      Eigen::MatrixXd linearAccelerations(const Eigen::VectorXd & times) const;
+      Eigen::MatrixXd angularVelocitiesBodyFrame(const Eigen::VectorXd & times) const;
+
       void initPoseSpline(double t0, double t1, const Eigen::Matrix4d & T_n_t0, const Eigen::Matrix4d & T_n_t);
       void initPoseSpline2(const Eigen::VectorXd & times, const Eigen::Matrix<double, 6, Eigen::Dynamic> & poses, int numSegments, double lambda);
       void initPoseSpline3(const Eigen::VectorXd & times, const Eigen::Matrix<double, 6, Eigen::Dynamic> & poses, int numSegments, double lambda);
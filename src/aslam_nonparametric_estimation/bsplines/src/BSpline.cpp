@@ -286,6 +286,42 @@ namespace bsplines {
 	}
     }
 
+    void BSpline::computeUAndTIndices(const Eigen::VectorXd & times, Eigen::VectorXd & outU, Eigen::VectorXi & outIndices) const
+    {
+      outU.resize(times.size());
+      outIndices.resize(times.size());
+      std::vector<double>::const_iterator i = knots_.begin();
+      for(int k = 0; k < times.size(); ++k)
+	{
+	  double t = times[k];
+	  SM_ASSERT_GE(Exception, t, t_min(), "The time is out of range by " << (t - t_min()));
+	  SM_ASSERT_TRUE(Exception, k == 0 || times[k] >= times[k-1], "The times must be sorted (time " << k << ")");
+
+	  //// HACK - avoids numerical problems on initialisation (as in computeTIndex())
+	  if ( fabs(t_max() - t) < 1e-10 )
+	    t = t_max();
+	  //// \HACK
+
+	  SM_ASSERT_LE(Exception, t, t_max(), "The time is out of range by " << (t_max() - t));
+	  if(t == t_max())
+	    {
+	      i = knots_.end() - splineOrder_;
+	    }
+	  else
+	    {
+	      // the upper bound of t, continuing from the previous time
+	      while(*i <= t)
+		++i;
+	    }
+
+	  const int index = (i - knots_.begin()) - 1;
+	  const double denom = *i - *(i-1);
+	  outIndices[k] = index;
+	  // The case of duplicate knots.
+	  outU[k] = denom <= 0.0 ? 0.0 : (t - knots_[index])/denom;
+	}
+    }
+
     int dmul(int i, int derivativeOrder)
     {
       if(derivativeOrder == 0)
@@ -348,6 +384,36 @@ namespace bsplines {
 
     }
 
+    Eigen::MatrixXd BSpline::evalAtTimes(const Eigen::VectorXd & times) const
+    {
+      return evalDAtTimes(times,0);
+    }
+
+    Eigen::MatrixXd BSpline::evalDAtTimes(const Eigen::VectorXd & times, int derivativeOrder) const
+    {
+      SM_ASSERT_GE(Exception, derivativeOrder, 0, "To integrate, use the integral function");
+      Eigen::VectorXd u;
+      Eigen::VectorXi indices;
+      computeUAndTIndices(times, u, indices);
+
+      // [c_0 c_1 c_2 c_3] * B^T is computed once per segment
+      Eigen::MatrixXd rv(times.size(), coefficients_.rows());
+      Eigen::MatrixXd CBt;
+      int segmentBidx = -1;
+      for(int k = 0; k < times.size(); ++k)
+	{
+	  int bidx = indices[k] - splineOrder_ + 1;
+	  if(bidx != segmentBidx)
+	    {
+	      CBt = coefficients_.block(0,bidx,coefficients_.rows(),splineOrder_) * basisMatrices_[bidx].transpose();
+	      segmentBidx = bidx;
+	    }
+	  rv.row(k) = (CBt * computeU(u[k], indices[k], derivativeOrder)).transpose();
+	}
+
+      return rv;
+    }
+
     Eigen::VectorXd BSpline::evalDAndJacobian(double t, int derivativeOrder, Eigen::MatrixXd * Jacobian, Eigen::VectorXi * coefficientIndices) const
     {
       SM_ASSERT_GE(Exception, derivativeOrder, 0, "To integrate, use the integral function");
@@ -155,6 +155,43 @@ namespace bsplines {
 
 
 
+    Eigen::MatrixXd BSplinePose::positions(const Eigen::VectorXd & times) const
+    {
+      return evalDAtTimes(times,0).leftCols<3>();
+    }
+
+    Eigen::MatrixXd BSplinePose::orientations(const Eigen::VectorXd & times) const
+    {
+      Eigen::MatrixXd r = evalDAtTimes(times,0);
+      Eigen::MatrixXd C(times.size(), 9);
+      for(int k = 0; k < times.size(); ++k)
+      {
+        Eigen::Matrix<double,3,3,Eigen::RowMajor> C_k = rotation_->parametersToRotationMatrix(r.row(k).tail<3>().transpose());
+        C.row(k) = Eigen::Map<Eigen::Matrix<double,1,9> >(C_k.data());
+      }
+      return C;
+    }
+
+    Eigen::MatrixXd BSplinePose::linearAccelerations(const Eigen::VectorXd & times) const
+    {
+      return evalDAtTimes(times,2).leftCols<3>();
+    }
+
+    Eigen::MatrixXd BSplinePose::angularVelocitiesBodyFrame(const Eigen::VectorXd & times) const
+    {
+      Eigen::MatrixXd r = evalDAtTimes(times,0);
+      Eigen::MatrixXd v = evalDAtTimes(times,1);
+      Eigen::MatrixXd omega(times.size(), 3);
+      Eigen::Matrix3d S;
+      for(int k = 0; k < times.size(); ++k)
+      {
+        Eigen::Matrix3d C_w_b = rotation_->parametersToRotationMatrix(r.row(k).tail<3>().transpose(), &S);
+        // \omega = S(\bar \theta) \dot \theta (as in angularVelocityBodyFrame())
+        omega.row(k) = (-C_w_b.transpose() * S * v.row(k).tail<3>().transpose()).transpose();
+      }
+      return omega;
+    }
+
     Eigen::Vector3d BSplinePose::linearVelocity(double tk) const
     {
       return evalD(tk,1).head<3>();
@@ -0,0 +1,167 @@
+#ifndef KALIBR_IMU_CAM_IMU_ERROR_TERM_BATCH_HPP
+#define KALIBR_IMU_CAM_IMU_ERROR_TERM_BATCH_HPP
+
+#include <vector>
+#include <boost/optional.hpp>
+#include <boost/shared_ptr.hpp>
+#include <aslam/backend/EuclideanExpression.hpp>
+#include <aslam/backend/RotationExpression.hpp>
+#include <aslam/backend/MatrixExpression.hpp>
+#include <aslam/backend/MEstimatorPolicies.hpp>
+#include <aslam/splines/BSplinePoseDesignVariable.hpp>
+#include <aslam/splines/EuclideanBSplineDesignVariable.hpp>
+
+#include <kalibr_errorterms/EuclideanError.hpp>
+
+namespace kalibr_errorterms {
+
+/// \brief The imu model shared by all accelerometer and gyroscope error terms of an imu.
+///
+///        The calibrated model only has the imu pose in the body frame (C_i_b, r_b).
+///        The scale-misalignment model adds the accelerometer and gyroscope intrinsics
+///        and the size-effect model the lever arms of the single accelerometer axes.
+///        Only these design variable expressions are shared, the compound expressions
+///        are built for every error term (their nodes cache values while being evaluated
+///        and must not be evaluated concurrently).
+class ImuErrorTermModel {
+ public:
+  ImuErrorTermModel(const aslam::backend::RotationExpression & C_i_b,
+                    const aslam::backend::EuclideanExpression & r_b);
+  virtual ~ImuErrorTermModel();
+
+  /// \brief use the scale-misalignment model
+  void setScaleMisalignment(const aslam::backend::MatrixExpression & M_accel,
+                            const aslam::backend::RotationExpression & C_gyro_i,
+                            const aslam::backend::MatrixExpression & M_gyro,
+                            const aslam::backend::MatrixExpression & M_accel_gyro);
+
+  /// \brief add the size effect to the scale-misalignment model
+  void setSizeEffect(const aslam::backend::EuclideanExpression & rx_i,
+                     const aslam::backend::EuclideanExpression & ry_i,
+                     const aslam::backend::EuclideanExpression & rz_i,
+                     const aslam::backend::MatrixExpression & Ix,
+                     const aslam::backend::MatrixExpression & Iy,
+                     const aslam::backend::MatrixExpression & Iz);
+
+  bool hasScaleMisalignment() const;
+  bool hasSizeEffect() const;
+
+  /// \brief the predicted specific force (without bias) at time t
+  aslam::backend::EuclideanExpression predictAcceleration(
+      aslam::splines::BSplinePoseDesignVariable & poseSpline, double t,
+      const aslam::backend::EuclideanExpression & g_w) const;
+
+  /// \brief the predicted angular velocity (without bias) at time t
+  ///        (gravity is only required by the scale-misalignment model)
+  aslam::backend::EuclideanExpression predictAngularVelocity(
+      aslam::splines::BSplinePoseDesignVariable & poseSpline, double t,
+      const aslam::backend::EuclideanExpression * g_w) const;
+
+ private:
+  aslam::backend::RotationExpression _C_i_b;
+  aslam::backend::EuclideanExpression _r_b;
+
+  // scale-misalignment
+  boost::optional<aslam::backend::MatrixExpression> _M_accel;
+  boost::optional<aslam::backend::RotationExpression> _C_gyro_i;
+  boost::optional<aslam::backend::MatrixExpression> _M_gyro;
+  boost::optional<aslam::backend::MatrixExpression> _M_accel_gyro;
+
+  // size effect (the lever arms in the imu frame)
+  boost::optional<aslam::backend::EuclideanExpression> _rx_i;
+  boost::optional<aslam::backend::EuclideanExpression> _ry_i;
+  boost::optional<aslam::backend::EuclideanExpression> _rz_i;
+  boost::optional<aslam::backend::MatrixExpression> _Ix;
+  boost::optional<aslam::backend::MatrixExpression> _Iy;
+  boost::optional<aslam::backend::MatrixExpression> _Iz;
+};
+
+/// \brief The accelerometer or gyroscope error terms of all measurements of an imu.
+///
+///        Built in one call from the arrays of the measurement times and values
+///        and queried in bulk (one row per error term).
+class ImuErrorTermBatch {
+ public:
+  typedef boost::shared_ptr<EuclideanError> ErrorTermSP;
+  typedef boost::shared_ptr<ImuErrorTermBatch> Ptr;
+
+  ImuErrorTermBatch();
+  virtual ~ImuErrorTermBatch();
+
+  /// \brief the number of error terms
+  size_t size() const;
+
+  /// \brief the number of measurements outside of the pose spline
+  size_t numSkipped() const;
+
+  ErrorTermSP errorTerm(size_t i) const;
+  const std::vector<ErrorTermSP> & errorTerms() const;
+
+  /// \brief set the M-estimator of all error terms
+  void setMEstimatorPolicy(const boost::shared_ptr<aslam::backend::MEstimator> & mEstimator);
+
+  /// \brief add all error terms to the problem
+  template<typename PROBLEM_T>
+  void addToProblem(PROBLEM_T & problem) const {
+    for (size_t i = 0; i < _errorTerms.size(); ++i)
+      problem.addErrorTerm(_errorTerms[i]);
+  }
+
+  /// \brief the (spline) times of the error terms (N)
+  Eigen::VectorXd times() const;
+
+  /// \brief the measurements (N x 3)
+  Eigen::MatrixXd measurements() const;
+
+  /// \brief the predicted measurements for the current estimate (N x 3)
+  Eigen::MatrixXd predictedMeasurements() const;
+
+  /// \brief the errors of the last evaluation (N x 3)
+  Eigen::MatrixXd errors() const;
+
+  /// \brief evaluate all error terms and return the weighted squared errors (N)
+  Eigen::VectorXd evaluateErrors();
+
+  void add(double t, const ErrorTermSP & errorTerm);
+  void skip();
+
+ private:
+  std::vector<double> _times;
+  std::vector<ErrorTermSP> _errorTerms;
+  size_t _numSkipped;
+};
+
+/// \brief build the accelerometer error terms of the measurements (N x 3) at the times (N)
+///        that are within the pose spline
+ImuErrorTermBatch::Ptr buildAccelerometerErrorTerms(
+    aslam::splines::BSplinePoseDesignVariable & poseSpline,
+    aslam::splines::EuclideanBSplineDesignVariable & bias,
+    const ImuErrorTermModel & model,
+    const aslam::backend::EuclideanExpression & g_w,
+    const Eigen::VectorXd & times,
+    const Eigen::MatrixXd & measurements,
+    const Eigen::Matrix3d & invR);
+
+/// \brief build the gyroscope error terms of the measurements (N x 3) at the times (N)
+///        that are within the pose spline
+ImuErrorTermBatch::Ptr buildGyroscopeErrorTerms(
+    aslam::splines::BSplinePoseDesignVariable & poseSpline,
+    aslam::splines::EuclideanBSplineDesignVariable & bias,
+    const ImuErrorTermModel & model,
+    const aslam::backend::EuclideanExpression & g_w,
+    const Eigen::VectorXd & times,
+    const Eigen::MatrixXd & measurements,
+    const Eigen::Matrix3d & invR);
+
+/// \brief as above, for the models that do not depend on gravity
+ImuErrorTermBatch::Ptr buildGyroscopeErrorTerms(
+    aslam::splines::BSplinePoseDesignVariable & poseSpline,
+    aslam::splines::EuclideanBSplineDesignVariable & bias,
+    const ImuErrorTermModel & model,
+    const Eigen::VectorXd & times,
+    const Eigen::MatrixXd & measurements,
+    const Eigen::Matrix3d & invR);
+
+} // namespace kalibr_errorterms
+
+#endif /* KALIBR_IMU_CAM_IMU_ERROR_TERM_BATCH_HPP */
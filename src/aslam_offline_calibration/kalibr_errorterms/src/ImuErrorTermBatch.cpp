@@ -0,0 +1,239 @@
+#include <kalibr_errorterms/ImuErrorTermBatch.hpp>
+#include <sm/assert_macros.hpp>
+
+namespace kalibr_errorterms {
+
+using aslam::backend::EuclideanExpression;
+using aslam::backend::RotationExpression;
+using aslam::backend::MatrixExpression;
+
+ImuErrorTermModel::ImuErrorTermModel(const RotationExpression & C_i_b,
+                                     const EuclideanExpression & r_b)
+    : _C_i_b(C_i_b),
+      _r_b(r_b) {
+}
+
+ImuErrorTermModel::~ImuErrorTermModel() {
+
+}
+
+void ImuErrorTermModel::setScaleMisalignment(const MatrixExpression & M_accel,
+                                             const RotationExpression & C_gyro_i,
+                                             const MatrixExpression & M_gyro,
+                                             const MatrixExpression & M_accel_gyro) {
+  _M_accel = M_accel;
+  _C_gyro_i = C_gyro_i;
+  _M_gyro = M_gyro;
+  _M_accel_gyro = M_accel_gyro;
+}
+
+void ImuErrorTermModel::setSizeEffect(const EuclideanExpression & rx_i,
+                                      const EuclideanExpression & ry_i,
+                                      const EuclideanExpression & rz_i,
+                                      const MatrixExpression & Ix,
+                                      const MatrixExpression & Iy,
+                                      const MatrixExpression & Iz) {
+  SM_ASSERT_TRUE(std::runtime_error, hasScaleMisalignment(), "The size effect requires the scale-misalignment model");
+  _rx_i = rx_i;
+  _ry_i = ry_i;
+  _rz_i = rz_i;
+  _Ix = Ix;
+  _Iy = Iy;
+  _Iz = Iz;
+}
+
+bool ImuErrorTermModel::hasScaleMisalignment() const {
+  return static_cast<bool>(_M_accel);
+}
+
+bool ImuErrorTermModel::hasSizeEffect() const {
+  return static_cast<bool>(_Ix);
+}
+
+EuclideanExpression ImuErrorTermModel::predictAcceleration(
+    aslam::splines::BSplinePoseDesignVariable & poseSpline, double t,
+    const EuclideanExpression & g_w) const {
+  RotationExpression C_b_w = poseSpline.orientation(t).inverse();
+  EuclideanExpression a_w = poseSpline.linearAcceleration(t);
+  EuclideanExpression w_b = poseSpline.angularVelocityBodyFrame(t);
+  EuclideanExpression w_dot_b = poseSpline.angularAccelerationBodyFrame(t);
+
+  if (hasSizeEffect()) {
+    // the lever arms in the body frame
+    RotationExpression C_i_b = _C_i_b;
+    RotationExpression C_b_i = C_i_b.inverse();
+    EuclideanExpression rx_b = _r_b + C_b_i * *_rx_i;
+    EuclideanExpression ry_b = _r_b + C_b_i * *_ry_i;
+    EuclideanExpression rz_b = _r_b + C_b_i * *_rz_i;
+    return *_M_accel * (_C_i_b * (C_b_w * (a_w - g_w)) +
+        *_Ix * (_C_i_b * (w_dot_b.cross(rx_b) + w_b.cross(w_b.cross(rx_b)))) +
+        *_Iy * (_C_i_b * (w_dot_b.cross(ry_b) + w_b.cross(w_b.cross(ry_b)))) +
+        *_Iz * (_C_i_b * (w_dot_b.cross(rz_b) + w_b.cross(w_b.cross(rz_b)))));
+  }
+
+  EuclideanExpression a = _C_i_b * (C_b_w * (a_w - g_w) +
+      w_dot_b.cross(_r_b) + w_b.cross(w_b.cross(_r_b)));
+  if (hasScaleMisalignment())
+    return *_M_accel * a;
+  return a;
+}
+
+EuclideanExpression ImuErrorTermModel::predictAngularVelocity(
+    aslam::splines::BSplinePoseDesignVariable & poseSpline, double t,
+    const EuclideanExpression * g_w) const {
+  EuclideanExpression w_b = poseSpline.angularVelocityBodyFrame(t);
+  if (!hasScaleMisalignment())
+    return _C_i_b * w_b;
+
+  SM_ASSERT_TRUE(std::runtime_error, g_w != NULL, "The scale-misalignment model requires gravity");
+  RotationExpression C_b_w = poseSpline.orientation(t).inverse();
+  EuclideanExpression a_w = poseSpline.linearAcceleration(t);
+  EuclideanExpression w_dot_b = poseSpline.angularAccelerationBodyFrame(t);
+  EuclideanExpression a_b = C_b_w * (a_w - *g_w) + w_dot_b.cross(_r_b) + w_b.cross(w_b.cross(_r_b));
+  RotationExpression C_gyro_b = *_C_gyro_i * _C_i_b;
+  return *_M_gyro * (C_gyro_b * w_b) + *_M_accel_gyro * (C_gyro_b * a_b);
+}
+
+/////////////////////////////////////////////////////////////////////////////////////////////
+
+ImuErrorTermBatch::ImuErrorTermBatch() : _numSkipped(0) {
+
+}
+
+ImuErrorTermBatch::~ImuErrorTermBatch() {
+
+}
+
+size_t ImuErrorTermBatch::size() const {
+  return _errorTerms.size();
+}
+
+size_t ImuErrorTermBatch::numSkipped() const {
+  return _numSkipped;
+}
+
+ImuErrorTermBatch::ErrorTermSP ImuErrorTermBatch::errorTerm(size_t i) const {
+  SM_ASSERT_LT(std::runtime_error, i, _errorTerms.size(), "Out of bounds");
+  return _errorTerms[i];
+}
+
+const std::vector<ImuErrorTermBatch::ErrorTermSP> & ImuErrorTermBatch::errorTerms() const {
+  return _errorTerms;
+}
+
+void ImuErrorTermBatch::setMEstimatorPolicy(const boost::shared_ptr<aslam::backend::MEstimator> & mEstimator) {
+  for (size_t i = 0; i < _errorTerms.size(); ++i)
+    _errorTerms[i]->setMEstimatorPolicy(mEstimator);
+}
+
+Eigen::VectorXd ImuErrorTermBatch::times() const {
+  return Eigen::Map<const Eigen::VectorXd>(_times.data(), _times.size());
+}
+
+Eigen::MatrixXd ImuErrorTermBatch::measurements() const {
+  Eigen::MatrixXd y(_errorTerms.size(), 3);
+  for (size_t i = 0; i < _errorTerms.size(); ++i)
+    y.row(i) = _errorTerms[i]->getMeasurement().transpose();
+  return y;
+}
+
+Eigen::MatrixXd ImuErrorTermBatch::predictedMeasurements() const {
+  Eigen::MatrixXd y(_errorTerms.size(), 3);
+  for (size_t i = 0; i < _errorTerms.size(); ++i)
+    y.row(i) = _errorTerms[i]->getPredictedMeasurement().transpose();
+  return y;
+}
+
+Eigen::MatrixXd ImuErrorTermBatch::errors() const {
+  Eigen::MatrixXd e(_errorTerms.size(), 3);
+  for (size_t i = 0; i < _errorTerms.size(); ++i)
+    e.row(i) = _errorTerms[i]->error().transpose();
+  return e;
+}
+
+Eigen::VectorXd ImuErrorTermBatch::evaluateErrors() {
+  Eigen::VectorXd e2(_errorTerms.size());
+  for (size_t i = 0; i < _errorTerms.size(); ++i)
+    e2[i] = _errorTerms[i]->evaluateError();
+  return e2;
+}
+
+void ImuErrorTermBatch::add(double t, const ErrorTermSP & errorTerm) {
+  _times.push_back(t);
+  _errorTerms.push_back(errorTerm);
+}
+
+void ImuErrorTermBatch::skip() {
+  ++_numSkipped;
+}
+
+/////////////////////////////////////////////////////////////////////////////////////////////
+
+namespace {
+
+ImuErrorTermBatch::Ptr buildErrorTerms(
+    aslam::splines::BSplinePoseDesignVariable & poseSpline,
+    aslam::splines::EuclideanBSplineDesignVariable & bias,
+    const ImuErrorTermModel & model,
+    const EuclideanExpression * g_w,
+    bool accelerometer,
+    const Eigen::VectorXd & times,
+    const Eigen::MatrixXd & measurements,
+    const Eigen::Matrix3d & invR) {
+  SM_ASSERT_EQ(std::runtime_error, measurements.rows(), times.size(), "The number of measurements and times must match");
+  SM_ASSERT_EQ(std::runtime_error, measurements.cols(), 3, "The measurements must be a N x 3 matrix");
+
+  ImuErrorTermBatch::Ptr batch(new ImuErrorTermBatch());
+  const double t_min = poseSpline.spline().t_min();
+  const double t_max = poseSpline.spline().t_max();
+  for (int i = 0; i < times.size(); ++i) {
+    const double t = times[i];
+    if (!(t > t_min && t < t_max)) {
+      batch->skip();
+      continue;
+    }
+    EuclideanExpression predicted = accelerometer ?
+        model.predictAcceleration(poseSpline, t, *g_w) :
+        model.predictAngularVelocity(poseSpline, t, g_w);
+    ImuErrorTermBatch::ErrorTermSP err(new EuclideanError(measurements.row(i).transpose(), invR,
+                                                           predicted + bias.toEuclideanExpression(t, 0)));
+    batch->add(t, err);
+  }
+  return batch;
+}
+
+} // namespace
+
+ImuErrorTermBatch::Ptr buildAccelerometerErrorTerms(
+    aslam::splines::BSplinePoseDesignVariable & poseSpline,
+    aslam::splines::EuclideanBSplineDesignVariable & bias,
+    const ImuErrorTermModel & model,
+    const EuclideanExpression & g_w,
+    const Eigen::VectorXd & times,
+    const Eigen::MatrixXd & measurements,
+    const Eigen::Matrix3d & invR) {
+  return buildErrorTerms(poseSpline, bias, model, &g_w, true, times, measurements, invR);
+}
+
+ImuErrorTermBatch::Ptr buildGyroscopeErrorTerms(
+    aslam::splines::BSplinePoseDesignVariable & poseSpline,
+    aslam::splines::EuclideanBSplineDesignVariable & bias,
+    const ImuErrorTermModel & model,
+    const EuclideanExpression & g_w,
+    const Eigen::VectorXd & times,
+    const Eigen::MatrixXd & measurements,
+    const Eigen::Matrix3d & invR) {
+  return buildErrorTerms(poseSpline, bias, model, &g_w, false, times, measurements, invR);
+}
+
+ImuErrorTermBatch::Ptr buildGyroscopeErrorTerms(
+    aslam::splines::BSplinePoseDesignVariable & poseSpline,
+    aslam::splines::EuclideanBSplineDesignVariable & bias,
+    const ImuErrorTermModel & model,
+    const Eigen::VectorXd & times,
+    const Eigen::MatrixXd & measurements,
+    const Eigen::Matrix3d & invR) {
+  return buildErrorTerms(poseSpline, bias, model, NULL, false, times, measurements, invR);
+}
+
+} // namespace kalibr_errorterms
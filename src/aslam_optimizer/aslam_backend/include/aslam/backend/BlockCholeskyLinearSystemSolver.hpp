@@ -26,7 +26,7 @@ namespace aslam {
       virtual ~BlockCholeskyLinearSystemSolver();
 
 
-      /// \brief build the system of equations.
+      /// \brief build the system of equations (the error terms are split across nThreads threads).
       virtual void buildSystem(size_t nThreads, bool useMEstimator);
 
       /// \brief solve the system storing the solution in outDx and returning true on success.
@@ -61,7 +61,6 @@ namespace aslam {
       /// \brief initialized the matrix structure for the problem with these error terms and errors.
       virtual void initMatrixStructureImplementation(const std::vector<DesignVariable*>& dvs, const std::vector<ErrorTerm*>& errors, bool useDiagonalConditioner);
 
-
       /// \brief The full Hessian matrix.
       SparseBlockMatrixWrapper _H;
 
@@ -54,6 +54,9 @@ namespace aslam {
         double tol = SPQR_DEFAULT_TOL, bool transpose = false);
 #endif
 
+      /// \brief Wraps the cholmod_change_factor function. Returns true for success.
+      bool changeFactor(int toXType, bool toLL, bool toSuper, bool toPacked, bool toMonotonic, cholmod_factor* L);
+
       /// \brief free a cholmod_factor
       void free(cholmod_factor* factor);
 
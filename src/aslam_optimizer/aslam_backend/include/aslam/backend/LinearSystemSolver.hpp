@@ -5,6 +5,7 @@
 #include <Eigen/Core>
 #include <boost/function.hpp>
 #include <sm/assert_macros.hpp>
+#include <sparse_block_matrix/sparse_block_matrix.h>
 
 namespace aslam {
   namespace backend {
@@ -16,6 +17,7 @@ namespace aslam {
     class LinearSystemSolver {
     public:
       SM_DEFINE_EXCEPTION(Exception, std::runtime_error);
+      typedef sparse_block_matrix::SparseBlockMatrix<Eigen::MatrixXd> SparseBlockMatrix;
 
       LinearSystemSolver();
 
@@ -82,12 +84,25 @@ namespace aslam {
       /// \brief a function to split a multi-threaded job across all error term indices.
       void setupThreadedJob(boost::function<void(size_t, size_t, size_t, bool)> job, size_t nThreads, bool useMEstimator);
 
+      /// \brief build the Hessian H (upper triangle) and _rhs of all error terms using nThreads.
+      void buildHessianSystem(SparseBlockMatrix& H, size_t nThreads, bool useMEstimator);
+
+      /// \brief a function for one thread to add a set of error terms to its Hessian and rhs.
+      void buildHessians(SparseBlockMatrix& H, size_t threadId, size_t startIdx, size_t endIdx, bool useMEstimator);
+
+      /// \brief add the block columns [startCol, endCol) of the thread local Hessians to H.
+      void reduceHessians(SparseBlockMatrix& H, size_t numReduced, size_t startCol, size_t endCol);
+
       /// \brief the vector of error terms.
       std::vector<ErrorTerm*> _errorTerms;
 
       /// \brief The squared error values calculated locally for a single thread.
       std::vector<double> _threadLocalErrors;
 
+      /// \brief The Hessians and rhs accumulated by the threads 1..nThreads-1 (see buildHessianSystem).
+      std::vector<SparseBlockMatrix> _threadLocalH;
+      std::vector<Eigen::VectorXd> _threadLocalRhs;
+
       /// \brief the error vector;
       Eigen::VectorXd _e;
 
@@ -90,9 +90,14 @@ namespace aslam {
       /// \brief compute only the diagonal covariance blocks.
       void computeDiagonalCovariances(SparseBlockMatrix& outP, double lambda);
 
-      /// \brief compute only the covariance blocks associated with the block indices passed as an argument
+      /// \brief compute only the covariance blocks associated with the block indices passed as an argument.
+      ///        The block or sparse Cholesky solver of the optimizer is reused if possible.
       void computeCovarianceBlocks(const std::vector<std::pair<int, int> >& blockIndices, SparseBlockMatrix& outP, double lambda);
 
+      /// \brief compute the joint covariance of a few design variables. Only the needed entries of the inverse
+      ///        are recovered from the sparse Cholesky factor (selective inversion), the dense inverse is never formed.
+      Eigen::MatrixXd computeMarginalCovariance(const std::vector<DesignVariable*>& dvs, double lambda = 0.0);
+
       void computeHessian(SparseBlockMatrix& outH, double lambda);
 
       /// \brief Evaluate the error at the current state.
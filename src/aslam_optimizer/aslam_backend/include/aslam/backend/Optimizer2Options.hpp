@@ -11,6 +11,7 @@ namespace aslam {
         convergenceDeltaJ(1e-3),
         convergenceDeltaX(1e-3),
         maxIterations(20),
+        doSchurComplement(false),
         verbose(false),
         linearSolverMaximumFails(0),
         nThreads(4)
@@ -25,7 +26,9 @@ namespace aslam {
       /// \brief stop if we reach this number of iterations without hitting any of the above stopping criteria.
       int maxIterations;
 
-      /// \brief should we use the Schur complement trick? Currently not supported.
+      /// \brief should we use the Schur complement trick? Eliminates the marginalized design variables
+      ///        (DesignVariable::setMarginalized()) with the SchurComplementLinearSystemSolver if no
+      ///        linear system solver is set.
       bool doSchurComplement;
 
       /// \brief should we print out some information each iteration?
@@ -52,6 +55,8 @@ namespace aslam {
       out << "\tconvergenceDeltaX: " << options.convergenceDeltaX << std::endl;
       /// \brief stop if we reach this number of iterations without hitting any of the above stopping criteria.
       out << "\tmaxIterations: " << options.maxIterations << std::endl;
+      /// \brief should we use the Schur complement trick?
+      out << "\tdoSchurComplement: " << options.doSchurComplement << std::endl;
       /// \brief what value of lambda (for Levenberg-Marquardt) should be used when initializing the optimization
       /// \brief should we print out some information each iteration?
       out << "\tverbose: " << options.verbose << std::endl;
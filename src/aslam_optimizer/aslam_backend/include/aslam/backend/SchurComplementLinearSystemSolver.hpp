@@ -0,0 +1,81 @@
+#ifndef ASLAM_BACKEND_SCHUR_COMPLEMENT_LINEAR_SYSTEM_SOLVER_HPP
+#define ASLAM_BACKEND_SCHUR_COMPLEMENT_LINEAR_SYSTEM_SOLVER_HPP
+
+#include "LinearSystemSolver.hpp"
+#include <Eigen/Dense>
+#include "SparseBlockMatrixWrapper.hpp"
+
+namespace aslam {
+  namespace backend {
+
+    /// \brief A linear system solver that eliminates the marginalized design
+    ///        variables (DesignVariable::isMarginalized()) with the Schur complement.
+    ///
+    ///        The marginalized design variables are grouped such that no error term
+    ///        connects two groups (e.g. the rotation and translation of one target pose).
+    ///        Every group is eliminated with a small dense Cholesky decomposition and
+    ///        the reduced system of the remaining design variables is solved densely.
+    ///        This is efficient for the arrow-shaped problems of bundle adjustment
+    ///        with few shared parameters and many independent poses.
+    class SchurComplementLinearSystemSolver : public LinearSystemSolver {
+    public:
+      typedef sparse_block_matrix::SparseBlockMatrix<Eigen::MatrixXd> SparseBlockMatrix;
+
+      SchurComplementLinearSystemSolver();
+      virtual ~SchurComplementLinearSystemSolver();
+
+      /// \brief build the system of equations (the error terms are split across nThreads threads).
+      virtual void buildSystem(size_t nThreads, bool useMEstimator);
+
+      /// \brief solve the system storing the solution in outDx and returning true on success.
+      virtual bool solveSystem(Eigen::VectorXd& outDx);
+
+      /// \brief return the Hessian matrix if avaliable. Null if not available.
+      virtual const Matrix* Hessian() const {
+        return &_H;
+      }
+
+      virtual std::string name() const { return "schur_complement"; }
+
+      /// \brief the number of parameters of the reduced (dense) system
+      size_t reducedSystemDimension() const;
+
+      /// \brief the number of eliminated groups of marginalized design variables
+      size_t numEliminatedGroups() const;
+
+      /// Helper Function for DogLeg implementation; returns parts required for the steepest descent solution
+      double rhsJtJrhs();
+
+    private:
+      /// \brief initialized the matrix structure for the problem with these error terms and errors.
+      virtual void initMatrixStructureImplementation(const std::vector<DesignVariable*>& dvs, const std::vector<ErrorTerm*>& errors, bool useDiagonalConditioner);
+
+      /// \brief add the Hessian block (r, c) to the reduced system or the eliminated groups
+      void addBlock(int r, int c, const Eigen::MatrixXd& B);
+
+      /// \brief The full Hessian matrix (upper triangle).
+      SparseBlockMatrixWrapper _H;
+
+      /// \brief the group of every block (-1 for the blocks of the reduced system)
+      std::vector<int> _blockGroup;
+
+      /// \brief the offset of every block in the reduced system or in its group
+      std::vector<int> _blockOffset;
+
+      /// \brief the dimension of every group
+      std::vector<int> _groupDims;
+
+      /// \brief the dimension of the reduced system
+      int _reducedDim;
+
+      /// \brief the reduced system, the group blocks and the coupling of the groups with the reduced system
+      Eigen::MatrixXd _U;
+      Eigen::VectorXd _bU;
+      std::vector<Eigen::MatrixXd> _V;
+      std::vector<Eigen::VectorXd> _bV;
+      std::vector<Eigen::MatrixXd> _W;
+    };
+
+  } // namespace backend
+} // namespace aslam
+#endif /* ASLAM_BACKEND_SCHUR_COMPLEMENT_LINEAR_SYSTEM_SOLVER_HPP */
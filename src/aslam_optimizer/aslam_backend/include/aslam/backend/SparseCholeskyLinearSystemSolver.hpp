@@ -32,6 +32,10 @@ namespace aslam {
       void setOptions(const SparseCholeskyLinearSolverOptions& options);
 
       virtual std::string name() const {  return "sparse_cholesky"; };        
+
+      /// \brief compute only the covariance blocks associated with the block indices passed as an argument.
+      ///        The symbolic factorization of the solver is reused.
+      void computeCovarianceBlocks(const std::vector<std::pair<int, int> >& blockIndices, SparseBlockMatrix& outP);
       /// Helper Function for DogLeg implementation; returns parts required for the steepest descent solution
       double rhsJtJrhs();
    
@@ -46,6 +50,9 @@ namespace aslam {
       cholmod_dense  _cholmodRhs;
       cholmod_factor* _factor;
 
+      /// \brief The cumulative dimensions of the design variables (block structure of the Hessian)
+      std::vector<int> _blocks;
+
       /// Options
       SparseCholeskyLinearSolverOptions _options;
 
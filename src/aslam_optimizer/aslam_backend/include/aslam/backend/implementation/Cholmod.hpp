@@ -66,6 +66,9 @@ namespace aslam {
       static int factorize(cholmod_sparse* A, cholmod_factor* L, cholmod_common* c) {
         return cholmod_factorize(A, L, c);
       }
+      static int change_factor(int to_xtype, int to_ll, int to_super, int to_packed, int to_monotonic, cholmod_factor* L, cholmod_common* c) {
+        return cholmod_change_factor(to_xtype, to_ll, to_super, to_packed, to_monotonic, L, c);
+      }
       static cholmod_dense* solve(int sys, cholmod_factor* L, cholmod_dense* B, cholmod_common* c) {
         return cholmod_solve(sys, L, B, c);
       }
@@ -113,6 +116,9 @@ namespace aslam {
       static int factorize(cholmod_sparse* A, cholmod_factor* L, cholmod_common* c) {
         return cholmod_l_factorize(A, L, c);
       }
+      static int change_factor(int to_xtype, int to_ll, int to_super, int to_packed, int to_monotonic, cholmod_factor* L, cholmod_common* c) {
+        return cholmod_l_change_factor(to_xtype, to_ll, to_super, to_packed, to_monotonic, L, c);
+      }
       static cholmod_dense* solve(int sys, cholmod_factor* L, cholmod_dense* B, cholmod_common* c) {
         return cholmod_l_solve(sys, L, B, c);
       }
@@ -245,6 +251,14 @@ namespace aslam {
 #endif
 
 
+    template<typename I>
+    bool Cholmod<I>::changeFactor(int toXType, bool toLL, bool toSuper, bool toPacked, bool toMonotonic, cholmod_factor* L)
+    {
+      SM_ASSERT_TRUE(Exception, L != NULL, "Null input");
+      int status = CholmodIndexTraits<index_t>::change_factor(toXType, toLL, toSuper, toPacked, toMonotonic, L, &_cholmod);
+      return status != 0 && _cholmod.status == CHOLMOD_OK;
+    }
+
     template<typename I>
     void Cholmod<I>::free(cholmod_factor* factor)
     {
@@ -90,17 +90,23 @@ namespace aslam {
     }
 
     template<typename T>
-    void DesignVariableAdapter<T>::minimalDifferenceImplementation(const Eigen::MatrixXd& /* xHat */, Eigen::VectorXd& /* outDifference */) const
+    void DesignVariableAdapter<T>::minimalDifferenceImplementation(const Eigen::MatrixXd& xHat, Eigen::VectorXd& outDifference) const
     {
-    	// TODO: implement
+      // the wrapped parameters are updated additively, so the minimal difference is the Euclidean difference
+      Eigen::MatrixXd p;
+      _dv->getParameters(p);
+      SM_ASSERT_TRUE(aslam::InvalidArgumentException, (xHat.rows() == p.rows()) && (xHat.cols() == p.cols()), "xHat has incompatible dimensions");
+      SM_ASSERT_EQ(aslam::InvalidArgumentException, p.size(), (int) _dv->minimalDimensions(), "The parameters of the wrapped design variable are not minimal");
+      const Eigen::MatrixXd d = p - xHat;
+      outDifference = Eigen::Map<const Eigen::VectorXd>(d.data(), d.size());
     }
 
     template<typename T>
-    void DesignVariableAdapter<T>::minimalDifferenceAndJacobianImplementation(const Eigen::MatrixXd& /* xHat */, Eigen::VectorXd& /* outDifference */, Eigen::MatrixXd& /* outJacobian */) const
+    void DesignVariableAdapter<T>::minimalDifferenceAndJacobianImplementation(const Eigen::MatrixXd& xHat, Eigen::VectorXd& outDifference, Eigen::MatrixXd& outJacobian) const
     {
-    	// TODO: implement
+      minimalDifferenceImplementation(xHat, outDifference);
+      outJacobian = Eigen::MatrixXd::Identity(outDifference.size(), outDifference.size());
     }
 
-
   } // namespace backend
 } // namespace aslam
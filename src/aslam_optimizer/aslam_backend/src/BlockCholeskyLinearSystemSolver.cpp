@@ -55,20 +55,9 @@ namespace aslam {
     }
 
 
-  void BlockCholeskyLinearSystemSolver::buildSystem(size_t /* nThreads */, bool useMEstimator)
+  void BlockCholeskyLinearSystemSolver::buildSystem(size_t nThreads, bool useMEstimator)
     {
-      // \todo make multithreaded. This is complicated as it requires synchronized access to the block matrix.
-      //       A little bit of effort should make this possible by initializing the structure and adding
-      //       a mutex for each block and having writers for each jacobian that have a list of mutexes.
-      //       Save it for later.
-      _H._M.clear(false);
-      _rhs.setZero();
-      std::vector<ErrorTerm*>::iterator it, it_end;
-      it = _errorTerms.begin();
-      it_end = _errorTerms.end();
-      for (; it != it_end; ++it) {
-        (*it)->buildHessian(_H._M, _rhs, useMEstimator);
-      }
+      buildHessianSystem(_H._M, nThreads, useMEstimator);
     }
 
     bool BlockCholeskyLinearSystemSolver::solveSystem(Eigen::VectorXd& outDx)
@@ -2,6 +2,7 @@
 #include <boost/thread.hpp>
 #include <aslam/backend/ErrorTerm.hpp>
 #include <boost/ref.hpp>
+#include <boost/bind.hpp>
 
 namespace aslam {
   namespace backend {
@@ -78,6 +79,66 @@ namespace aslam {
     }
 
 
+    void LinearSystemSolver::buildHessianSystem(SparseBlockMatrix& H, size_t nThreads, bool useMEstimator)
+    {
+      // Every thread accumulates its error terms into its own Hessian and rhs (thread 0 directly
+      // into H and _rhs). The thread local matrices are summed up at the end.
+      nThreads = std::max((size_t)1, std::min(nThreads, _errorTerms.size()));
+      while (_threadLocalH.size() + 1 < nThreads) {
+        _threadLocalH.push_back(SparseBlockMatrix(H.rowBlockIndices(), H.colBlockIndices()));
+        _threadLocalRhs.push_back(Eigen::VectorXd::Zero(_rhs.size()));
+      }
+      H.clear(false);
+      _rhs.setZero();
+      for (size_t i = 0; i + 1 < nThreads; ++i) {
+        _threadLocalH[i].clear(false);
+        _threadLocalRhs[i].setZero(_rhs.size());
+      }
+      setupThreadedJob(boost::bind(&LinearSystemSolver::buildHessians, this, boost::ref(H), _1, _2, _3, _4), nThreads, useMEstimator);
+      if (nThreads == 1)
+        return;
+
+      // Reduce the thread local systems. The block columns are split across the threads,
+      // so no two threads write to the same block.
+      const size_t numReduced = nThreads - 1;
+      const size_t bCols = H.bCols();
+      const size_t nReduceThreads = std::max((size_t)1, std::min(nThreads, bCols));
+      const size_t nColsPerThread = (bCols + nReduceThreads - 1) / nReduceThreads;
+      boost::thread_group threads;
+      for (size_t i = 0; i < nReduceThreads; ++i) {
+        const size_t startCol = i * nColsPerThread;
+        const size_t endCol = std::min(bCols, startCol + nColsPerThread);
+        if (startCol < endCol)
+          threads.create_thread(boost::bind(&LinearSystemSolver::reduceHessians, this, boost::ref(H), numReduced, startCol, endCol));
+      }
+      threads.join_all();
+      for (size_t i = 0; i < numReduced; ++i)
+        _rhs += _threadLocalRhs[i];
+    }
+
+    void LinearSystemSolver::buildHessians(SparseBlockMatrix& H, size_t threadId, size_t startIdx, size_t endIdx, bool useMEstimator)
+    {
+      SparseBlockMatrix& threadH = threadId == 0 ? H : _threadLocalH[threadId - 1];
+      Eigen::VectorXd& rhs = threadId == 0 ? _rhs : _threadLocalRhs[threadId - 1];
+      for (size_t i = startIdx; i < endIdx; ++i) {
+        _errorTerms[i]->buildHessian(threadH, rhs, useMEstimator);
+      }
+    }
+
+    void LinearSystemSolver::reduceHessians(SparseBlockMatrix& H, size_t numReduced, size_t startCol, size_t endCol)
+    {
+      for (size_t i = 0; i < numReduced; ++i) {
+        const std::vector<SparseBlockMatrix::IntBlockMap>& blockCols = _threadLocalH[i].blockCols();
+        for (size_t c = startCol; c < endCol; ++c) {
+          SparseBlockMatrix::IntBlockMap::const_iterator it = blockCols[c].begin();
+          for (; it != blockCols[c].end(); ++it) {
+            *H.block(it->first, c, true) += *it->second;
+          }
+        }
+      }
+    }
+
+
     double LinearSystemSolver::evaluateError(size_t nThreads, bool useMEstimator)
     {
       nThreads = std::max((size_t)1, nThreads);
@@ -118,6 +179,8 @@ namespace aslam {
     {
       setOrdering(dvs, errors);
       _errorTerms = errors;
+      _threadLocalH.clear();
+      _threadLocalRhs.clear();
       // Figure out the size of the Jacobian matrix.
       _JRows = 0;
       std::vector<ErrorTerm*>::const_iterator eit = errors.begin();
@@ -97,8 +97,8 @@ void marginalize(
 		  aslam::backend::DenseQrLinearSystemSolver qrSolver;
           qrSolver.initMatrixStructure(inDesignVariables, inErrorTerms, false);
 
-		  SM_INFO_STREAM("Marginalization optimization problem initialized with " << inDesignVariables.size() << " design variables and " << inErrorTerms.size() << " error terrms");
-		  SM_INFO_STREAM("The Jacobian matrix is " << dim << " x " << columnBase);
+		  SM_DEBUG_STREAM("Marginalization optimization problem initialized with " << inDesignVariables.size() << " design variables and " << inErrorTerms.size() << " error terrms");
+		  SM_DEBUG_STREAM("The Jacobian matrix is " << dim << " x " << columnBase);
 
 		  qrSolver.evaluateError(1, useMEstimator);
 		  qrSolver.buildSystem(1, useMEstimator);
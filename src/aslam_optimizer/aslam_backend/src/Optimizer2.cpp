@@ -1,6 +1,8 @@
 #include <aslam/backend/Optimizer2.hpp>
 // std::partial_sum
 #include <numeric>
+// std::find
+#include <algorithm>
 #include <aslam/backend/ErrorTerm.hpp>
 // M.inverse()
 #include <Eigen/Dense>
@@ -15,6 +17,7 @@
 #include <aslam/backend/BlockCholeskyLinearSystemSolver.hpp>
 #include <aslam/backend/SparseCholeskyLinearSystemSolver.hpp>
 #include <aslam/backend/DenseQrLinearSystemSolver.hpp>
+#include <aslam/backend/SchurComplementLinearSystemSolver.hpp>
 #include <sm/PropertyTree.hpp>
 
 
@@ -81,8 +84,13 @@ namespace aslam {
         void Optimizer2::initializeLinearSolver()
         {
           if( ! _options.linearSystemSolver ) {
-            _options.verbose && std::cout << "No linear system solver set in the options. Defaulting to the sparse_cholesky solver\n";
-            _solver.reset(new SparseCholeskyLinearSystemSolver());
+            if( _options.doSchurComplement ) {
+              _options.verbose && std::cout << "No linear system solver set in the options. Defaulting to the schur_complement solver\n";
+              _solver.reset(new SchurComplementLinearSystemSolver());
+            } else {
+              _options.verbose && std::cout << "No linear system solver set in the options. Defaulting to the sparse_cholesky solver\n";
+              _solver.reset(new SparseCholeskyLinearSystemSolver());
+            }
           } else {
             _solver = _options.linearSystemSolver;
           }
@@ -364,8 +372,6 @@ namespace aslam {
 
             void Optimizer2::computeDiagonalCovariances(SparseBlockMatrix& outP, double lambda)
             {
-                SM_THROW(Exception, "Broken");
-
                 std::vector<std::pair<int, int> > blockIndices;
                 for (size_t i = 0; i < _designVariables.size(); ++i) {
                     blockIndices.push_back(std::make_pair(i, i));
@@ -373,17 +379,92 @@ namespace aslam {
                 computeCovarianceBlocks(blockIndices, outP, lambda);
             }
 
-    void Optimizer2::computeCovarianceBlocks(const std::vector<std::pair<int, int> > & /* blockIndices */, SparseBlockMatrix& /* outP */, double /* lambda */)
+    void Optimizer2::computeCovarianceBlocks(const std::vector<std::pair<int, int> > & blockIndices, SparseBlockMatrix& outP, double lambda)
             {
-                SM_THROW(Exception, "Broken");
+              SM_ASSERT_FALSE(Exception, _designVariables.empty(), "The optimizer has not been initialized");
+
+              // The Cholesky solvers of the optimizer are reused with their matrix structure and symbolic
+              // factorization. Only the Hessian at the current estimate is rebuilt and refactorized: the last
+              // numeric factorization holds the damping and the linearization point of the last step.
+              // optimize() reinitializes the solver, so its state may be overwritten here.
+              if (lambda == 0.0 || _trustRegionPolicy->requiresAugmentedDiagonal()) {
+                boost::shared_ptr<BlockCholeskyLinearSystemSolver> block_sp = boost::dynamic_pointer_cast<BlockCholeskyLinearSystemSolver>(_solver);
+                boost::shared_ptr<SparseCholeskyLinearSystemSolver> sparse_sp = boost::dynamic_pointer_cast<SparseCholeskyLinearSystemSolver>(_solver);
+                if (block_sp || sparse_sp) {
+                  evaluateError(true);
+                  _solver->setConstantConditioner(lambda);
+                  _solver->buildSystem(_options.nThreads, true);
+                  if (block_sp)
+                    block_sp->computeCovarianceBlocks(blockIndices, outP);
+                  else
+                    sparse_sp->computeCovarianceBlocks(blockIndices, outP);
+                  return;
+                }
+              }
+
+              // Otherwise a separate block Cholesky solver is factorized.
+              // The block indices are the same as the ones assigned in initialize().
+              boost::shared_ptr<BlockCholeskyLinearSystemSolver> solver_sp;
+              solver_sp.reset(new BlockCholeskyLinearSystemSolver());
+              solver_sp->initMatrixStructure(_designVariables, _errorTerms, lambda > 0.0);
 
+              evaluateError(true);
+              solver_sp->setConstantConditioner(lambda);
+              solver_sp->buildSystem(_options.nThreads, true);
+              solver_sp->computeCovarianceBlocks(blockIndices, outP);
             }
 
 
-    void Optimizer2::computeCovariances(SparseBlockMatrix& /* outP */, double /* lambda */)
+    void Optimizer2::computeCovariances(SparseBlockMatrix& outP, double lambda)
             {
-                SM_THROW(Exception, "Broken");
+                std::vector<std::pair<int, int> > blockIndices;
+                for (size_t i = 0; i < _designVariables.size(); ++i) {
+                    for (size_t j = i; j < _designVariables.size(); ++j) {
+                        blockIndices.push_back(std::make_pair(i, j));
+                    }
+                }
+                computeCovarianceBlocks(blockIndices, outP, lambda);
+            }
 
+    Eigen::MatrixXd Optimizer2::computeMarginalCovariance(const std::vector<DesignVariable*>& dvs, double lambda)
+            {
+              // block index and offset in the output of every requested design variable
+              std::vector<int> blocks;
+              std::vector<int> offsets;
+              int dim = 0;
+              for (size_t i = 0; i < dvs.size(); ++i) {
+                SM_ASSERT_TRUE(Exception, dvs[i]->isActive(), "The covariance can only be recovered for active design variables");
+                auto it = std::find(_designVariables.begin(), _designVariables.end(), dvs[i]);
+                SM_ASSERT_TRUE(Exception, it != _designVariables.end(), "The design variable is not in the optimized problem");
+                blocks.push_back(static_cast<int>(it - _designVariables.begin()));
+                offsets.push_back(dim);
+                dim += dvs[i]->minimalDimensions();
+              }
+
+              // only the upper triangle of the requested blocks is computed
+              std::vector<std::pair<int, int> > blockIndices;
+              for (size_t i = 0; i < blocks.size(); ++i) {
+                for (size_t j = i; j < blocks.size(); ++j) {
+                  blockIndices.push_back(std::make_pair(std::min(blocks[i], blocks[j]), std::max(blocks[i], blocks[j])));
+                }
+              }
+              SparseBlockMatrix P;
+              computeCovarianceBlocks(blockIndices, P, lambda);
+
+              Eigen::MatrixXd covariance(dim, dim);
+              for (size_t i = 0; i < blocks.size(); ++i) {
+                for (size_t j = i; j < blocks.size(); ++j) {
+                  const int ri = dvs[i]->minimalDimensions();
+                  const int cj = dvs[j]->minimalDimensions();
+                  if (blocks[i] <= blocks[j]) {
+                    covariance.block(offsets[i], offsets[j], ri, cj) = *P.block(blocks[i], blocks[j]);
+                  } else {
+                    covariance.block(offsets[i], offsets[j], ri, cj) = P.block(blocks[j], blocks[i])->transpose();
+                  }
+                  covariance.block(offsets[j], offsets[i], cj, ri) = covariance.block(offsets[i], offsets[j], ri, cj).transpose();
+                }
+              }
+              return covariance;
             }
 
         void Optimizer2::computeHessian(SparseBlockMatrix& outH, double lambda)
@@ -0,0 +1,202 @@
+#include <aslam/backend/SchurComplementLinearSystemSolver.hpp>
+#include <aslam/backend/ErrorTerm.hpp>
+// std::partial_sum
+#include <numeric>
+
+namespace aslam {
+  namespace backend {
+
+    namespace {
+      int findRoot(std::vector<int>& parents, int i) {
+        while (parents[i] != i) {
+          parents[i] = parents[parents[i]];
+          i = parents[i];
+        }
+        return i;
+      }
+    }
+
+    SchurComplementLinearSystemSolver::SchurComplementLinearSystemSolver() :
+        _reducedDim(0)
+    {
+    }
+
+    SchurComplementLinearSystemSolver::~SchurComplementLinearSystemSolver()
+    {
+    }
+
+
+    void SchurComplementLinearSystemSolver::initMatrixStructureImplementation(const std::vector<DesignVariable*>& dvs, const std::vector<ErrorTerm*>& errors, bool useDiagonalConditioner)
+    {
+      _useDiagonalConditioner = useDiagonalConditioner;
+      _errorTerms = errors;
+      std::vector<int> blocks;
+      for (size_t i = 0; i < dvs.size(); ++i) {
+        dvs[i]->setBlockIndex(i);
+        blocks.push_back(dvs[i]->minimalDimensions());
+      }
+
+      // Group the marginalized design variables that are connected by an error term (union find).
+      std::vector<int> parents(dvs.size());
+      for (size_t i = 0; i < dvs.size(); ++i)
+        parents[i] = i;
+      std::vector<int> marginalized;
+      for (size_t i = 0; i < errors.size(); ++i) {
+        marginalized.clear();
+        for (size_t j = 0; j < errors[i]->numDesignVariables(); ++j) {
+          DesignVariable* dv = errors[i]->designVariable(j);
+          if (dv->isActive() && dv->isMarginalized())
+            marginalized.push_back(dv->blockIndex());
+        }
+        for (size_t j = 1; j < marginalized.size(); ++j)
+          parents[findRoot(parents, marginalized[j])] = findRoot(parents, marginalized[0]);
+      }
+
+      // Assign the blocks to the reduced system or to their group.
+      _blockGroup.assign(dvs.size(), -1);
+      _blockOffset.assign(dvs.size(), 0);
+      _groupDims.clear();
+      _reducedDim = 0;
+      std::vector<int> rootGroup(dvs.size(), -1);
+      for (size_t i = 0; i < dvs.size(); ++i) {
+        if (!dvs[i]->isMarginalized()) {
+          _blockOffset[i] = _reducedDim;
+          _reducedDim += blocks[i];
+        } else {
+          int root = findRoot(parents, i);
+          if (rootGroup[root] < 0) {
+            rootGroup[root] = _groupDims.size();
+            _groupDims.push_back(0);
+          }
+          _blockGroup[i] = rootGroup[root];
+          _blockOffset[i] = _groupDims[_blockGroup[i]];
+          _groupDims[_blockGroup[i]] += blocks[i];
+        }
+      }
+
+      std::partial_sum(blocks.begin(), blocks.end(), blocks.begin());
+      // Now we can initialized the sparse Hessian matrix.
+      _H._M = SparseBlockMatrix(blocks, blocks);
+    }
+
+
+    void SchurComplementLinearSystemSolver::buildSystem(size_t nThreads, bool useMEstimator)
+    {
+      buildHessianSystem(_H._M, nThreads, useMEstimator);
+    }
+
+
+    void SchurComplementLinearSystemSolver::addBlock(int r, int c, const Eigen::MatrixXd& B)
+    {
+      const int gr = _blockGroup[r];
+      const int gc = _blockGroup[c];
+      const int or_ = _blockOffset[r];
+      const int oc = _blockOffset[c];
+      if (gr < 0 && gc < 0) {
+        _U.block(or_, oc, B.rows(), B.cols()) += B;
+      } else if (gr < 0) {
+        _W[gc].block(or_, oc, B.rows(), B.cols()) += B;
+      } else if (gc >= 0) {
+        SM_ASSERT_EQ(Exception, gr, gc, "Marginalized design variables of different groups are connected");
+        _V[gr].block(or_, oc, B.rows(), B.cols()) += B;
+      }
+      // The coupling of a group with the reduced system is stored once (in W).
+    }
+
+
+    bool SchurComplementLinearSystemSolver::solveSystem(Eigen::VectorXd& outDx)
+    {
+      const SparseBlockMatrix& H = _H._M;
+      const size_t numGroups = _groupDims.size();
+
+      _U.setZero(_reducedDim, _reducedDim);
+      _bU.setZero(_reducedDim);
+      _V.resize(numGroups);
+      _bV.resize(numGroups);
+      _W.resize(numGroups);
+      for (size_t g = 0; g < numGroups; ++g) {
+        _V[g].setZero(_groupDims[g], _groupDims[g]);
+        _bV[g].setZero(_groupDims[g]);
+        _W[g].setZero(_reducedDim, _groupDims[g]);
+      }
+
+      // Distribute the rhs and the (augmented) diagonal.
+      for (int b = 0; b < H.bRows(); ++b) {
+        const int base = H.rowBaseOfBlock(b);
+        const int dim = H.rowsOfBlock(b);
+        const int g = _blockGroup[b];
+        Eigen::VectorXd& rhs = g < 0 ? _bU : _bV[g];
+        Eigen::MatrixXd& M = g < 0 ? _U : _V[g];
+        rhs.segment(_blockOffset[b], dim) = _rhs.segment(base, dim);
+        if (_useDiagonalConditioner) {
+          M.block(_blockOffset[b], _blockOffset[b], dim, dim).diagonal() +=
+              _diagonalConditioner.segment(base, dim).cwiseProduct(_diagonalConditioner.segment(base, dim));
+        }
+      }
+
+      // Distribute the Hessian blocks (only the upper triangle is stored).
+      for (int c = 0; c < H.bCols(); ++c) {
+        const SparseBlockMatrix::IntBlockMap& column = H.blockCols()[c];
+        for (SparseBlockMatrix::IntBlockMap::const_iterator it = column.begin(); it != column.end(); ++it) {
+          addBlock(it->first, c, *it->second);
+          if (it->first != c)
+            addBlock(c, it->first, it->second->transpose());
+        }
+      }
+
+      // Eliminate the groups: S = U - sum W V^-1 W^T, bS = bU - sum W V^-1 bV
+      std::vector<Eigen::LLT<Eigen::MatrixXd> > Vllt(numGroups);
+      for (size_t g = 0; g < numGroups; ++g) {
+        Vllt[g].compute(_V[g]);
+        if (Vllt[g].info() != Eigen::Success)
+          return false;
+        Eigen::MatrixXd VinvWt = Vllt[g].solve(_W[g].transpose());
+        _U.noalias() -= _W[g] * VinvWt;
+        _bU.noalias() -= VinvWt.transpose() * _bV[g];
+      }
+
+      // Solve the reduced system and back-substitute the groups.
+      Eigen::VectorXd dxU;
+      if (_reducedDim > 0) {
+        Eigen::LLT<Eigen::MatrixXd> Sllt(_U);
+        if (Sllt.info() != Eigen::Success)
+          return false;
+        dxU = Sllt.solve(_bU);
+      } else {
+        dxU.resize(0);
+      }
+
+      std::vector<Eigen::VectorXd> dxV(numGroups);
+      for (size_t g = 0; g < numGroups; ++g) {
+        dxV[g] = Vllt[g].solve(_bV[g] - _W[g].transpose() * dxU);
+      }
+
+      outDx.resize(H.rows());
+      for (int b = 0; b < H.bRows(); ++b) {
+        const int dim = H.rowsOfBlock(b);
+        const int g = _blockGroup[b];
+        outDx.segment(H.rowBaseOfBlock(b), dim) = g < 0 ? dxU.segment(_blockOffset[b], dim) : dxV[g].segment(_blockOffset[b], dim);
+      }
+      return outDx.allFinite();
+    }
+
+
+    size_t SchurComplementLinearSystemSolver::reducedSystemDimension() const
+    {
+      return _reducedDim;
+    }
+
+    size_t SchurComplementLinearSystemSolver::numEliminatedGroups() const
+    {
+      return _groupDims.size();
+    }
+
+
+    double SchurComplementLinearSystemSolver::rhsJtJrhs() {
+        Eigen::VectorXd JtJrhs;
+        _H.rightMultiply(_rhs, JtJrhs);
+        return _rhs.dot(JtJrhs);
+    }
+
+  } // namespace backend
+} // namespace aslam
@@ -1,5 +1,8 @@
 #include <aslam/backend/SparseCholeskyLinearSystemSolver.hpp>
 #include <sm/PropertyTree.hpp>
+#include <sparse_block_matrix/marginal_covariance_cholesky.h>
+// std::partial_sum
+#include <numeric>
 
 namespace aslam {
   namespace backend {
@@ -21,6 +24,10 @@ namespace aslam {
       // std::cout << "init structure\n";
       _useDiagonalConditioner = useDiagonalConditioner;
       _jacobianBuilder.initMatrixStructure(dvs, errors);
+      _blocks.clear();
+      for (size_t i = 0; i < dvs.size(); ++i)
+        _blocks.push_back(dvs[i]->minimalDimensions());
+      std::partial_sum(_blocks.begin(), _blocks.end(), _blocks.begin());
       CompressedColumnMatrix<int>& J_transpose = _jacobianBuilder.J_transpose();
       if (_useDiagonalConditioner) {
         J_transpose.pushConstantDiagonalBlock(1.0);
@@ -88,6 +95,35 @@ namespace aslam {
       return true;
     }
 
+    void SparseCholeskyLinearSystemSolver::computeCovarianceBlocks(const std::vector<std::pair<int, int> >& blockIndices, SparseBlockMatrix& outP)
+    {
+      CompressedColumnMatrix<int>& J_transpose = _jacobianBuilder.J_transpose();
+      if (_useDiagonalConditioner) {
+        J_transpose.pushDiagonalBlock(_diagonalConditioner);
+      }
+      J_transpose.getView(&_cholmodLhs);
+      if (!_factor) {
+        _factor = _cholmod.analyze(&_cholmodLhs);
+      }
+      // The selective inversion needs a simplicial LL' factor.
+      bool success = _cholmod.factorize(&_cholmodLhs, _factor) &&
+          _cholmod.changeFactor(CHOLMOD_REAL, true, false, true, true, _factor);
+      if (_useDiagonalConditioner) {
+        J_transpose.popDiagonalBlock();
+      }
+      SM_ASSERT_TRUE(Exception, success, "Unable to retrieve covariance");
+
+      // invert the permutation
+      const int* p = (const int*)_factor->Perm;
+      Eigen::VectorXi pinv(_factor->n);
+      for (size_t i = 0; i < _factor->n; ++i)
+        pinv(p[i]) = i;
+
+      sparse_block_matrix::MarginalCovarianceCholesky mcc;
+      mcc.setCholeskyFactor(_factor->n, (int*)_factor->p, (int*)_factor->i, (double*)_factor->x, pinv.data());
+      mcc.computeCovariance(outP, _blocks, blockIndices);
+    }
+
     const SparseCholeskyLinearSolverOptions&
     SparseCholeskyLinearSystemSolver::getOptions() const {
       return _options;
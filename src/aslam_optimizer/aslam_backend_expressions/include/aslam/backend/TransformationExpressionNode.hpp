@@ -5,6 +5,7 @@
 #include <aslam/backend/JacobianContainer.hpp>
 #include <boost/shared_ptr.hpp>
 #include <set>
+#include <mutex>
 
 namespace aslam {
   namespace backend {
@@ -43,6 +44,9 @@ namespace aslam {
      * \class TransformationExpressionNodeMultiply
      *
      * \brief A class representing the multiplication of two transformation matrices.
+     *
+     * The node may be shared by error terms that are evaluated on different threads
+     * (e.g. a chain of baselines), so the cached operands are guarded by a mutex.
      * 
      */
     class TransformationExpressionNodeMultiply : public TransformationExpressionNode
@@ -65,6 +69,7 @@ namespace aslam {
       Eigen::Matrix4d _T_lhs;
       boost::shared_ptr<TransformationExpressionNode> _rhs;
       Eigen::Matrix4d _T_rhs;
+      mutable std::mutex _mutex;
     };
 
 
@@ -73,6 +78,8 @@ namespace aslam {
      * 
      * \brief A class representing the inverse of a transformation matrix.
      *
+     * The cached inverse is guarded by a mutex (see TransformationExpressionNodeMultiply).
+     *
      */
     class TransformationExpressionNodeInverse : public TransformationExpressionNode
     {
@@ -92,6 +99,7 @@ namespace aslam {
 
       boost::shared_ptr<TransformationExpressionNode> _dvTransformation;
       Eigen::Matrix4d _T;
+      mutable std::mutex _mutex;
     };
 
 
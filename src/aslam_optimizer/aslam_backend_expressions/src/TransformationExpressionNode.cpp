@@ -53,21 +53,36 @@ namespace aslam {
 
     Eigen::Matrix4d TransformationExpressionNodeMultiply::toTransformationMatrixImplementation()
     {
-      _T_lhs = _lhs->toTransformationMatrix();
-      _T_rhs = _rhs->toTransformationMatrix();
-      return  _T_lhs * _T_rhs;
+      const Eigen::Matrix4d T_lhs = _lhs->toTransformationMatrix();
+      const Eigen::Matrix4d T_rhs = _rhs->toTransformationMatrix();
+      {
+        std::lock_guard<std::mutex> lock(_mutex);
+        _T_lhs = T_lhs;
+        _T_rhs = T_rhs;
+      }
+      return  T_lhs * T_rhs;
     }
 
     void TransformationExpressionNodeMultiply::evaluateJacobiansImplementation(JacobianContainer & outJacobians) const
     {	
-      _rhs->evaluateJacobians(outJacobians,sm::kinematics::boxTimes(_T_lhs));
+      Eigen::Matrix4d T_lhs;
+      {
+        std::lock_guard<std::mutex> lock(_mutex);
+        T_lhs = _T_lhs;
+      }
+      _rhs->evaluateJacobians(outJacobians,sm::kinematics::boxTimes(T_lhs));
       _lhs->evaluateJacobians(outJacobians);
     }
 
  
     void TransformationExpressionNodeMultiply::evaluateJacobiansImplementation(JacobianContainer & outJacobians, const Eigen::MatrixXd & applyChainRule) const
     {	
-      _rhs->evaluateJacobians(outJacobians, (applyChainRule * sm::kinematics::boxTimes(_T_lhs)));
+      Eigen::Matrix4d T_lhs;
+      {
+        std::lock_guard<std::mutex> lock(_mutex);
+        T_lhs = _T_lhs;
+      }
+      _rhs->evaluateJacobians(outJacobians, (applyChainRule * sm::kinematics::boxTimes(T_lhs)));
       _lhs->evaluateJacobians(outJacobians, applyChainRule);
     }
 
@@ -85,19 +100,33 @@ namespace aslam {
 
     Eigen::Matrix4d TransformationExpressionNodeInverse::toTransformationMatrixImplementation()
     {
-      _T = _dvTransformation->toTransformationMatrix().inverse();
-      return  _T;
+      const Eigen::Matrix4d T = _dvTransformation->toTransformationMatrix().inverse();
+      {
+        std::lock_guard<std::mutex> lock(_mutex);
+        _T = T;
+      }
+      return  T;
     }
 
     void TransformationExpressionNodeInverse::evaluateJacobiansImplementation(JacobianContainer & outJacobians) const
     {
-      _dvTransformation->evaluateJacobians(outJacobians, -sm::kinematics::boxTimes(_T));
+      Eigen::Matrix4d T;
+      {
+        std::lock_guard<std::mutex> lock(_mutex);
+        T = _T;
+      }
+      _dvTransformation->evaluateJacobians(outJacobians, -sm::kinematics::boxTimes(T));
     }
 
 
     void TransformationExpressionNodeInverse::evaluateJacobiansImplementation(JacobianContainer & outJacobians, const Eigen::MatrixXd & applyChainRule) const
     {
-      _dvTransformation->evaluateJacobians(outJacobians, (applyChainRule * -sm::kinematics::boxTimes(_T)));
+      Eigen::Matrix4d T;
+      {
+        std::lock_guard<std::mutex> lock(_mutex);
+        T = _T;
+      }
+      _dvTransformation->evaluateJacobians(outJacobians, (applyChainRule * -sm::kinematics::boxTimes(T)));
     }
 
     void TransformationExpressionNodeInverse::getDesignVariablesImplementation(DesignVariable::set_t & designVariables) const
@@ -2,6 +2,7 @@
 #include <aslam/backend/LinearSystemSolver.hpp>
 #include <aslam/backend/Matrix.hpp>
 #include <aslam/backend/BlockCholeskyLinearSystemSolver.hpp>
+#include <aslam/backend/SchurComplementLinearSystemSolver.hpp>
 #include <aslam/backend/SparseCholeskyLinearSystemSolver.hpp>
 #include <aslam/backend/SparseQrLinearSystemSolver.hpp>
 #include <aslam/backend/DenseQrLinearSystemSolver.hpp>
@@ -78,6 +79,10 @@ void exportLinearSystemSolver()
 
     class_<DenseQrLinearSystemSolver, boost::shared_ptr<DenseQrLinearSystemSolver>, bases<LinearSystemSolver> >("DenseQrLinearSystemSolver", init<>());
     class_<BlockCholeskyLinearSystemSolver, boost::shared_ptr<BlockCholeskyLinearSystemSolver>, bases<LinearSystemSolver> >("BlockCholeskyLinearSystemSolver", init<>());
+    class_<SchurComplementLinearSystemSolver, boost::shared_ptr<SchurComplementLinearSystemSolver>, bases<LinearSystemSolver> >("SchurComplementLinearSystemSolver", init<>())
+        .def("reducedSystemDimension", &SchurComplementLinearSystemSolver::reducedSystemDimension)
+        .def("numEliminatedGroups", &SchurComplementLinearSystemSolver::numEliminatedGroups)
+        ;
     class_<SparseCholeskyLinearSystemSolver, boost::shared_ptr<SparseCholeskyLinearSystemSolver>, bases<LinearSystemSolver> >("SparseCholeskyLinearSystemSolver", init<>());
     class_<SparseQrLinearSystemSolver, boost::shared_ptr<SparseQrLinearSystemSolver>, bases<LinearSystemSolver> >("SparseQrLinearSystemSolver", init<>())
         .def("getJacobianTranspose", &SparseQrLinearSystemSolver::getJacobianTranspose, return_internal_reference<>())
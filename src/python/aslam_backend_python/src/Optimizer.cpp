@@ -1,7 +1,9 @@
 #include <numpy_eigen/boost_python_headers.hpp>
 #include <aslam/backend/Optimizer.hpp>
 #include <aslam/backend/Optimizer2.hpp>
+#include <aslam/backend/DesignVariable.hpp>
 #include <boost/shared_ptr.hpp>
+#include <vector>
 
 
 // some wrappers:
@@ -17,6 +19,13 @@ Eigen::VectorXd rhs(const aslam::backend::Optimizer * o)
 {
 	return o->rhs();
 }
+Eigen::MatrixXd computeMarginalCovariance(aslam::backend::Optimizer2 * o, const boost::python::object & py_dvs, double lambda)
+{
+	std::vector<aslam::backend::DesignVariable*> dvs;
+	for (int i = 0; i < boost::python::len(py_dvs); ++i)
+		dvs.push_back(boost::python::extract<aslam::backend::DesignVariable*>(py_dvs[i]));
+	return o->computeMarginalCovariance(dvs, lambda);
+}
 
 
 void exportOptimizer()
@@ -157,6 +166,9 @@ void exportOptimizer()
         // Eigen::MatrixXd getDenseSparseCovariance(int di, int si);
         .def("computeCovariances", &Optimizer2::computeCovariances)
         .def("computeDiagonalCovariances", &Optimizer2::computeDiagonalCovariances)
+
+        /// \brief joint covariance of a list of design variables (selective inversion of the sparse Cholesky factor)
+        .def("computeMarginalCovariance", &computeMarginalCovariance, (arg("designVariables"), arg("lambda")=0.0))
         
         /// \brief Evaluate the error at the current state.
         .def("evaluateError", &Optimizer2::evaluateError)
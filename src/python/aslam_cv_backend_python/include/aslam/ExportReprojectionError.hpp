@@ -1,8 +1,10 @@
 #ifndef ASLAM_PYTHON_EXPORT_FRAME_HPP
 #define ASLAM_PYTHON_EXPORT_FRAME_HPP
 #include <sstream>
+#include <limits>
 #include <aslam/Frame.hpp>
 #include <aslam/backend/ReprojectionError.hpp>
+#include <aslam/backend/MultiCornerReprojectionError.hpp>
 #include <aslam/backend/CovarianceReprojectionError.hpp>
 #include <aslam/backend/SimpleReprojectionError.hpp>
 #include <aslam/backend/HomogeneousExpression.hpp>
@@ -12,6 +14,29 @@
 namespace aslam {
 namespace python {
 
+// Evaluate the measurements and predicted measurements of a list of
+// reprojection errors (e.g. all corners of one camera in one view) in one call.
+// Entries of the list may be None (unobserved corner): the corresponding rows
+// are filled with NaN. Returns the tuple (y, yhat) of two Nx2 arrays.
+template<typename CAMERA_GEOMETRY_T>
+boost::python::tuple reprojectionErrorMeasurements(const boost::python::object & py_rerrs) {
+  typedef aslam::backend::ReprojectionError<CAMERA_GEOMETRY_T> rerr_t;
+  const int numRerrs = boost::python::len(py_rerrs);
+  const int dim = rerr_t::KeypointDimension;
+
+  Eigen::MatrixXd y = Eigen::MatrixXd::Constant(numRerrs, dim, std::numeric_limits<double>::quiet_NaN());
+  Eigen::MatrixXd yhat = y;
+  for (int i = 0; i < numRerrs; ++i) {
+    boost::python::object py_rerr = py_rerrs[i];
+    if (py_rerr.is_none())
+      continue;
+    rerr_t & rerr = boost::python::extract<rerr_t &>(py_rerr);
+    y.row(i) = rerr.getMeasurement().transpose();
+    yhat.row(i) = rerr.getPredictedMeasurement().transpose();
+  }
+  return boost::python::make_tuple(y, yhat);
+}
+
 template<typename CAMERA_GEOMETRY_T>
 void exportReprojectionError(const std::string & camName) {
   std::string name = camName + "ReprojectionError";
@@ -46,6 +71,9 @@ void exportReprojectionError(const std::string & camName) {
       "getPredictedMeasurement",
       &ReprojectionError<geometry_t>::getPredictedMeasurement);
 
+  def((name + "Measurements").c_str(), &reprojectionErrorMeasurements<geometry_t>,
+      ("(y, yhat) = " + name + "Measurements( rerrs ): measurements and predicted measurements (Nx2, NaN for None entries) of a list of " + name + "s").c_str());
+
   class_<SimpleReprojectionError<frame_t>,
       boost::shared_ptr<SimpleReprojectionError<frame_t> >, bases<ErrorTerm> >(
       (name + "Simple").c_str(),
@@ -60,6 +88,29 @@ void exportReprojectionError(const std::string & camName) {
 
 }
 
+template<typename CAMERA_GEOMETRY_T>
+void exportMultiCornerReprojectionError(const std::string & camName) {
+  std::string name = camName + "MultiCornerReprojectionError";
+  using namespace boost::python;
+  using namespace aslam;
+  using namespace aslam::backend;
+  typedef CAMERA_GEOMETRY_T geometry_t;
+  typedef MultiCornerReprojectionError<geometry_t> rerr_t;
+
+  class_<rerr_t, boost::shared_ptr<rerr_t>, bases<ErrorTerm> >(
+      name.c_str(),
+      init<const Eigen::MatrixXd &, const typename rerr_t::inverse_covariance_t &,
+          const Eigen::MatrixXd &, const TransformationExpression &,
+          CameraDesignVariable<geometry_t> >(
+          (name + "( y (Nx2), invR (of one corner), targetPoints (Nx3), T_camera_target, CameraDesignVariable)").c_str()))
+      .def("numCorners", &rerr_t::numCorners)
+      .def("setCornerMEstimatorPolicy", &rerr_t::setCornerMEstimatorPolicy)
+      .def("getMeasurements", &rerr_t::getMeasurements)
+      .def("getPredictedMeasurements", &rerr_t::getPredictedMeasurements)
+      .def("getCornerSquaredErrors", &rerr_t::getCornerSquaredErrors,
+           "The squared (unweighted) error of every corner of the last evaluateError() call");
+}
+
 template<typename CAMERA_GEOMETRY_T>
 void exportCovarianceReprojectionError(const std::string & camName)
 {
@@ -97,6 +148,7 @@ void exportCovarianceReprojectionError(const std::string & camName)
 template<typename CAMERA_GEOMETRY_T>
 void exportReprojectionErrors(const std::string & camName) {
   exportReprojectionError<CAMERA_GEOMETRY_T>(camName);
+  exportMultiCornerReprojectionError<CAMERA_GEOMETRY_T>(camName);
 }
 
 }  // namespace python
@@ -1,3 +1,4 @@
+#include <limits>
 #include <numpy_eigen/boost_python_headers.hpp>
 #include <aslam/cameras.hpp>
 
@@ -6,6 +7,7 @@
 #include <sm/python/Id.hpp>
 #include <sm/python/boost_serialization_pickle.hpp>
 #include <aslam/cameras/Triangulation.hpp>
+#include <sm/assert_macros.hpp>
 
 #include <aslam/LinkCvSerialization.hpp>
 
@@ -50,6 +52,92 @@ boost::python::tuple triangulateWrap(const Eigen::Vector3d & point0,
 
 // }
 
+namespace detail {
+// Batched projection functions of the concrete geometry. The points/keypoints
+// are passed one per row and mapped with the (statically dispatched) functions
+// of the geometry, so a whole array crosses the python boundary once. The
+// back-projection without Jacobians, keypointsToEuclidean, is inherited from
+// CameraGeometryBase.
+
+// The numpy converters are 2D only: the Jacobians are stacked row-wise and
+// reshaped to one matrix per point on the python side.
+inline boost::python::object stackedToArray(const Eigen::MatrixXd & J, int rows) {
+  return boost::python::object(J).attr("reshape")(J.rows() / rows, rows, J.cols());
+}
+
+// Map N x 3 Euclidean points to N x KeypointDimension keypoints. Rows of
+// points that are not finite or do not project to a valid keypoint are set
+// to NaN.
+template<typename C>
+Eigen::MatrixXd e2kBatch(const C * camera, Eigen::MatrixXd const & P) {
+  SM_ASSERT_EQ(std::runtime_error, P.cols(), 3, "The points must be passed as N x 3 array");
+  Eigen::MatrixXd K(P.rows(), (int)C::KeypointDimension);
+  typename C::keypoint_t k;
+  for (int i = 0; i < P.rows(); ++i) {
+    Eigen::Vector3d p = P.row(i).transpose();
+    if (p.allFinite() && camera->euclideanToKeypoint(p, k))
+      K.row(i) = k.transpose();
+    else
+      K.row(i).setConstant(std::numeric_limits<double>::quiet_NaN());
+  }
+  return K;
+}
+
+// Same as e2kBatch but also returns the Jacobians with respect to the points
+// (N x KeypointDimension x 3) and the validity of every projection. The
+// keypoints and Jacobians of invalid projections are NaN.
+template<typename C>
+boost::python::tuple e2kJpBatch(const C * camera, Eigen::MatrixXd const & P) {
+  SM_ASSERT_EQ(std::runtime_error, P.cols(), 3, "The points must be passed as N x 3 array");
+  const int kd = C::KeypointDimension;
+  Eigen::MatrixXd K(P.rows(), kd);
+  Eigen::MatrixXd Jp(P.rows() * kd, 3);
+  Eigen::VectorXi valid(P.rows());
+  typename C::keypoint_t k;
+  typename C::jacobian_t J;
+  for (int i = 0; i < P.rows(); ++i) {
+    Eigen::Vector3d p = P.row(i).transpose();
+    valid[i] = p.allFinite() && camera->euclideanToKeypoint(p, k, J);
+    if (valid[i]) {
+      K.row(i) = k.transpose();
+      Jp.block(i * kd, 0, kd, 3) = J;
+    } else {
+      K.row(i).setConstant(std::numeric_limits<double>::quiet_NaN());
+      Jp.block(i * kd, 0, kd, 3).setConstant(std::numeric_limits<double>::quiet_NaN());
+    }
+  }
+  return boost::python::make_tuple(K, stackedToArray(Jp, kd), valid);
+}
+
+// Map N x KeypointDimension keypoints to N x 3 Euclidean points and return the
+// Jacobians with respect to the keypoints (N x 3 x KeypointDimension) and the
+// validity of every back-projection. The points and Jacobians of invalid
+// keypoints are NaN.
+template<typename C>
+boost::python::tuple k2eJkBatch(const C * camera, Eigen::MatrixXd const & K) {
+  SM_ASSERT_EQ(std::runtime_error, K.cols(), (int)C::KeypointDimension, "The keypoints must be passed as N x KeypointDimension array");
+  const int kd = C::KeypointDimension;
+  Eigen::MatrixXd P(K.rows(), 3);
+  Eigen::MatrixXd Jk(K.rows() * 3, kd);
+  Eigen::VectorXi valid(K.rows());
+  typename C::keypoint_t k;
+  typename C::inverse_jacobian_t J;
+  Eigen::Vector3d p;
+  for (int i = 0; i < K.rows(); ++i) {
+    k = K.row(i).transpose();
+    valid[i] = k.allFinite() && camera->keypointToEuclidean(k, p, J);
+    if (valid[i]) {
+      P.row(i) = p.transpose();
+      Jk.block(i * 3, 0, 3, kd) = J;
+    } else {
+      P.row(i).setConstant(std::numeric_limits<double>::quiet_NaN());
+      Jk.block(i * 3, 0, 3, kd).setConstant(std::numeric_limits<double>::quiet_NaN());
+    }
+  }
+  return boost::python::make_tuple(P, stackedToArray(Jk, 3), valid);
+}
+}  // namespace detail
+
 template<typename C>
 void exportCameraGeometry(std::string name) {
   typedef typename C::shutter_t shutter_t;
@@ -68,6 +156,9 @@ void exportCameraGeometry(std::string name) {
       .def("shutter", shutter, return_internal_reference<>())
       .def("projection", projection, return_internal_reference<>())
       .def("mask", mask, return_internal_reference<>())
+      .def("euclideanToKeypoints", &detail::e2kBatch<C>, "Map N x 3 Euclidean points (one per row) to N x 2 keypoints. Rows that are not finite or do not project to a valid keypoint are NaN.\nK = euclideanToKeypoints(P)")
+      .def("euclideanToKeypointsJp", &detail::e2kJpBatch<C>, "Map N x 3 Euclidean points to N x 2 keypoints and get the Jacobians with respect to the points (N x 2 x 3) and the validity of each projection.\n(K, Jp, valid) = euclideanToKeypointsJp(P)")
+      .def("keypointsToEuclideanJk", &detail::k2eJkBatch<C>, "Map N x 2 keypoints to N x 3 Euclidean points and get the Jacobians with respect to the keypoints (N x 3 x 2) and the validity of each back-projection.\n(P, Jk, valid) = keypointsToEuclideanJk(K)")
       .def("getTestGeometry", C::getTestGeometry)
       .staticmethod("getTestGeometry")
       .def_pickle(sm::python::pickle_suite<C>());
@@ -1,8 +1,11 @@
 #include <vector>
+#include <limits>
 #include <numpy_eigen/boost_python_headers.hpp>
 #include <aslam/cameras/CameraGeometryBase.hpp>
 #include <sm/python/Id.hpp>
+#include <sm/assert_macros.hpp>
 #include <boost/python/stl_iterator.hpp>
+#include <boost/thread.hpp>
 #include <aslam/cameras/GridCalibrationTargetObservation.hpp>
 #include <sm/python/boost_serialization_pickle.hpp>
 #include <aslam/cameras/GridCalibrationTargetObservation.hpp>
@@ -71,6 +74,25 @@ boost::python::tuple k2ehJk(const C * camera, Eigen::VectorXd const & k) {
   return boost::python::make_tuple(p, Jk, valid);
 }
 
+// Map a list of keypoints (N x keypointDimension, one keypoint per row) to
+// Euclidean points (N x 3). Rows of keypoints that can not be back-projected
+// are set to NaN.
+template<typename C>
+Eigen::MatrixXd k2eBatch(const C * camera, Eigen::MatrixXd const & K) {
+  SM_ASSERT_EQ(std::runtime_error, K.cols(), (int)camera->keypointDimension(), "The keypoints must be passed as N x keypointDimension array");
+  Eigen::MatrixXd P(K.rows(), 3);
+  Eigen::VectorXd k;
+  Eigen::VectorXd p;
+  for (int i = 0; i < K.rows(); ++i) {
+    k = K.row(i).transpose();
+    if (k.allFinite() && camera->vsKeypointToEuclidean(k, p))
+      P.row(i) = p.transpose();
+    else
+      P.row(i).setConstant(std::numeric_limits<double>::quiet_NaN());
+  }
+  return P;
+}
+
 template<typename C>
 boost::python::tuple estimateTransformation(const C * camera, aslam::cameras::GridCalibrationTargetObservation & obs)
 {
@@ -79,6 +101,44 @@ boost::python::tuple estimateTransformation(const C * camera, aslam::cameras::Gr
   return boost::python::make_tuple(success, trafo);
 }
 
+// Solve the PnP problem for a whole list of observations. The observations
+// are split among nThreads threads (round robin). Returns a list of tuples
+// (bool, sm.Transformation) in the order of the input list.
+template<typename C>
+boost::python::list estimateTransformations(const C * camera, const boost::python::object& py_obslist, size_t nThreads)
+{
+  typedef aslam::cameras::GridCalibrationTargetObservation Observation;
+
+  //reference the observations in the python list (avoids copying the images)
+  const size_t numObs = boost::python::len(py_obslist);
+  std::vector<const Observation*> obslist(numObs);
+  for (size_t i = 0; i < numObs; ++i)
+    obslist[i] = &boost::python::extract<const Observation&>(py_obslist[i])();
+
+  std::vector<sm::kinematics::Transformation> trafos(numObs);
+  std::vector<char> success(numObs, 0);
+  nThreads = std::max<size_t>(1, std::min(nThreads, numObs));
+
+  boost::thread_group threads;
+  for (size_t t = 0; t < nThreads; ++t) {
+    threads.create_thread([&, t]() {
+      for (size_t i = t; i < numObs; i += nThreads) {
+        try {
+          success[i] = camera->estimateTransformation(*obslist[i], trafos[i]);
+        } catch (const std::exception& e) {
+          success[i] = 0;
+        }
+      }
+    });
+  }
+  threads.join_all();
+
+  boost::python::list rval;
+  for (size_t i = 0; i < numObs; ++i)
+    rval.append(boost::python::make_tuple(success[i] != 0, trafos[i]));
+  return rval;
+}
+
 template<typename C>
 bool initializeIntrinsics(C* camera, const boost::python::object& py_obslist)
 {
@@ -119,6 +179,7 @@ void exportCameraGeometryBase() {
       .def("keypointToHomogeneous", &detail::k2eh<CameraGeometryBase>,"Map a keypoint to a 4x1 homogeneous Euclidean point.\np = keypointToHomogeneous(k)")
       .def("keypointToHomogeneousJk", &detail::k2ehJk<CameraGeometryBase>, "Map a keypoint to a 4x1 homogeneous Euclidean point and get the Jacobian of the mapping with respect to small changes in the keypoint.\n(p, Jk) = keypointToHomogeneousJk(k)")
       .def("keypointToEuclidean", &detail::k2e<CameraGeometryBase>, "Map a keypoint to a 3x1 Euclidean point.\np = keypointToEuclidean(k)")
+      .def("keypointsToEuclidean", &detail::k2eBatch<CameraGeometryBase>, "Map a list of keypoints (N x 2, one keypoint per row) to 3D Euclidean points (N x 3). Rows that can not be mapped are NaN.\nP = keypointsToEuclidean(K)")
       .def("keypointToEuclideanJk", &detail::k2eJk<CameraGeometryBase>, "Map a keypoint to a 3x1 Euclidean point and get the Jacobian of the mapping with respect to small changes in the keypoint.\n(p, Jk) = keypointToEuclideanJk(k)")
       .def("isValid", &CameraGeometryBase::vsIsValid)
       .def("isEuclideanVisible", &CameraGeometryBase::vsIsEuclideanVisible)
@@ -129,6 +190,7 @@ void exportCameraGeometryBase() {
       .def("getParameters", &getParameters<CameraGeometryBase>)
       .def("setParameters", &CameraGeometryBase::setParameters)
       .def("estimateTransformation", &detail::estimateTransformation<CameraGeometryBase>, "estimate the transformation of the camera with respect to the calibration target, returns tuple (bool, sm.Transformation)")
+      .def("estimateTransformations", &detail::estimateTransformations<CameraGeometryBase>, "estimate the transformations of the camera with respect to the calibration target for a list of observations using nThreads threads, returns a list of tuples (bool, sm.Transformation)\nrvals = estimateTransformations(observations, nThreads)")
       .def("initializeIntrinsics", &detail::initializeIntrinsics<CameraGeometryBase>, "intialize intrinsics on a list of observations")
       .def_pickle( sm::python::pickle_suite<CameraGeometryBase>())
       ;
@@ -120,6 +120,10 @@ void import_bspline_pose_python()
     .def("angularVelocityBodyFrameAndJacobian", &angularVelocityBodyFrameAndJacobianWrapper)
     .def("angularAccelerationBodyFrame", &BSplinePose::angularAccelerationBodyFrame)
     .def("angularAccelerationBodyFrameAndJacobian", &angularAccelerationBodyFrameAndJacobianWrapper)
+    .def("positions", &BSplinePose::positions, "The positions at a sorted array of times (Nx3)")
+    .def("orientations", &BSplinePose::orientations, "The rotation matrices at a sorted array of times (Nx9, row-major)")
+    .def("linearAccelerations", &BSplinePose::linearAccelerations, "The linear accelerations at a sorted array of times (Nx3)")
+    .def("angularVelocitiesBodyFrame", &BSplinePose::angularVelocitiesBodyFrame, "The body frame angular velocities at a sorted array of times (Nx3)")
     .def("rotation", &BSplinePose::rotation);
   //.def("", &BSplinePose::, "")
 
@@ -21,6 +21,8 @@
            class.
   */
 
+#include <vector>
+
 #include <boost/shared_ptr.hpp>
 
 #include <numpy_eigen/boost_python_headers.hpp>
@@ -86,6 +88,28 @@ Eigen::MatrixXd getScaledSingularValues(const IncrementalEstimator* ie) {
   return ie->getSingularValues(true);
 }
 
+/// This functions converts the python list of candidate batches
+Eigen::VectorXd getExpectedInformationGains(IncrementalEstimator* ie,
+    const boost::python::object& py_batches, size_t nThreads) {
+  const size_t numBatches = boost::python::len(py_batches);
+  std::vector<IncrementalEstimator::BatchSP> batches(numBatches);
+  for (size_t i = 0; i < numBatches; ++i)
+    batches[i] =
+      boost::python::extract<IncrementalEstimator::BatchSP>(py_batches[i]);
+  return ie->getExpectedInformationGains(batches, nThreads);
+}
+
+/// This functions converts the python list of batches to add
+IncrementalEstimator::ReturnValue addBatches(IncrementalEstimator* ie,
+    const boost::python::object& py_batches) {
+  const size_t numBatches = boost::python::len(py_batches);
+  std::vector<IncrementalEstimator::BatchSP> batches(numBatches);
+  for (size_t i = 0; i < numBatches; ++i)
+    batches[i] =
+      boost::python::extract<IncrementalEstimator::BatchSP>(py_batches[i]);
+  return ie->addBatches(batches);
+}
+
 void exportIncrementalEstimator() {
   /// Export options for the IncrementalEstimator class
   class_<IncrementalEstimator::Options>("IncrementalEstimatorOptions", init<>())
@@ -170,10 +194,16 @@ void exportIncrementalEstimator() {
     .def("getLinearSolverOptions", getLinearSolverOptions,
       return_internal_reference<>())
     .def("addBatch", &IncrementalEstimator::addBatch)
+    .def("addBatches", &addBatches)
     .def("reoptimize", &IncrementalEstimator::reoptimize)
     .def("getNumBatches", &IncrementalEstimator::getNumBatches)
     .def("removeBatch", removeBatch1)
     .def("removeBatch", removeBatch2)
+    .def("updateBatch", &IncrementalEstimator::updateBatch)
+    .def("marginalizeBatch", &IncrementalEstimator::marginalizeBatch)
+    .def("getNumMarginalizedBatches",
+      &IncrementalEstimator::getNumMarginalizedBatches)
+    .def("getExpectedInformationGains", &getExpectedInformationGains)
     .def("getMargGroupId", &IncrementalEstimator::getMargGroupId)
     .def("getInformationGain", &IncrementalEstimator::getInformationGain)
     .def("getJacobianTranspose", &IncrementalEstimator::getJacobianTranspose,
@@ -188,6 +218,8 @@ void exportIncrementalEstimator() {
     .def("getPeakMemoryUsage", &IncrementalEstimator::getPeakMemoryUsage)
     .def("getMemoryUsage", &IncrementalEstimator::getMemoryUsage)
     .def("getNumFlops", &IncrementalEstimator::getNumFlops)
+    .def("getInitialCost", &IncrementalEstimator::getInitialCost)
+    .def("getFinalCost", &IncrementalEstimator::getFinalCost)
     .def("getNobsBasis", &getNobsBasis)
     .def("getNobsBasisScaled", &getNobsBasisScaled)
     .def("getObsBasis", &getObsBasis)
@@ -42,6 +42,8 @@ void exportOptimizationProblem() {
       "CalibrationOptimizationProblem", init<>())
     .def("addDesignVariable", &OptimizationProblem::addDesignVariable)
     .def("addErrorTerm", &OptimizationProblem::addErrorTerm)
+    .def("removeErrorTerm", &OptimizationProblem::removeErrorTerm)
+    .def("isErrorTermInProblem", &OptimizationProblem::isErrorTermInProblem)
     .def("clear", &OptimizationProblem::clear)
     ;
 
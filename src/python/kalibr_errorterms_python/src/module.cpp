@@ -5,6 +5,9 @@
 #include <kalibr_errorterms/EuclideanError.hpp>
 #include <kalibr_errorterms/GyroscopeError.hpp>
 #include <kalibr_errorterms/AccelerometerError.hpp>
+#include <kalibr_errorterms/ImuErrorTermBatch.hpp>
+#include <aslam/backend/OptimizationProblem.hpp>
+#include <aslam/calibration/core/OptimizationProblem.h>
 
 // The title of this library must match exactly
 BOOST_PYTHON_MODULE(libkalibr_errorterms_python)
@@ -73,4 +76,46 @@ BOOST_PYTHON_MODULE(libkalibr_errorterms_python)
 	("GyroscopeErrorEccentric(measurement, invR, M, Ma, C_b_w, acceleration_w, angularVelocity_b, angularAcceleration_b,)"
 			"C_i_b, r_b, bias, g_w"));
 
+	class_<ImuErrorTermModel, boost::shared_ptr<ImuErrorTermModel> >
+	("ImuErrorTermModel", init<const aslam::backend::RotationExpression &, const aslam::backend::EuclideanExpression &>
+	("ImuErrorTermModel(C_i_b, r_b)"))
+	.def("setScaleMisalignment", &ImuErrorTermModel::setScaleMisalignment, "setScaleMisalignment(M_accel, C_gyro_i, M_gyro, M_accel_gyro)")
+	.def("setSizeEffect", &ImuErrorTermModel::setSizeEffect, "setSizeEffect(rx_i, ry_i, rz_i, Ix, Iy, Iz)")
+	.def("hasScaleMisalignment", &ImuErrorTermModel::hasScaleMisalignment)
+	.def("hasSizeEffect", &ImuErrorTermModel::hasSizeEffect);
+
+	void (ImuErrorTermBatch::*addToBackendProblem)(aslam::backend::OptimizationProblem &) const =
+			&ImuErrorTermBatch::addToProblem<aslam::backend::OptimizationProblem>;
+	void (ImuErrorTermBatch::*addToCalibrationProblem)(aslam::calibration::OptimizationProblem &) const =
+			&ImuErrorTermBatch::addToProblem<aslam::calibration::OptimizationProblem>;
+
+	class_<ImuErrorTermBatch, boost::shared_ptr<ImuErrorTermBatch>, boost::noncopyable>
+	("ImuErrorTermBatch", no_init)
+	.def("__len__", &ImuErrorTermBatch::size)
+	.def("size", &ImuErrorTermBatch::size)
+	.def("numSkipped", &ImuErrorTermBatch::numSkipped)
+	.def("errorTerm", &ImuErrorTermBatch::errorTerm)
+	.def("setMEstimatorPolicy", &ImuErrorTermBatch::setMEstimatorPolicy)
+	.def("addToProblem", addToBackendProblem)
+	.def("addToProblem", addToCalibrationProblem)
+	.def("times", &ImuErrorTermBatch::times, "times() -> N array of the error term times")
+	.def("measurements", &ImuErrorTermBatch::measurements, "measurements() -> N x 3 measurements")
+	.def("predictedMeasurements", &ImuErrorTermBatch::predictedMeasurements, "predictedMeasurements() -> N x 3 predicted measurements")
+	.def("errors", &ImuErrorTermBatch::errors, "errors() -> N x 3 errors of the last evaluation")
+	.def("evaluateErrors", &ImuErrorTermBatch::evaluateErrors, "evaluateErrors() -> N weighted squared errors");
+
+	ImuErrorTermBatch::Ptr (*buildGyroscopeErrorTermsGravity)(aslam::splines::BSplinePoseDesignVariable &,
+			aslam::splines::EuclideanBSplineDesignVariable &, const ImuErrorTermModel &, const aslam::backend::EuclideanExpression &,
+			const Eigen::VectorXd &, const Eigen::MatrixXd &, const Eigen::Matrix3d &) = &buildGyroscopeErrorTerms;
+	ImuErrorTermBatch::Ptr (*buildGyroscopeErrorTermsNoGravity)(aslam::splines::BSplinePoseDesignVariable &,
+			aslam::splines::EuclideanBSplineDesignVariable &, const ImuErrorTermModel &,
+			const Eigen::VectorXd &, const Eigen::MatrixXd &, const Eigen::Matrix3d &) = &buildGyroscopeErrorTerms;
+
+	def("buildAccelerometerErrorTerms", &buildAccelerometerErrorTerms,
+			"buildAccelerometerErrorTerms(poseSpline, bias, model, g_w, times, measurements, invR)");
+	def("buildGyroscopeErrorTerms", buildGyroscopeErrorTermsGravity,
+			"buildGyroscopeErrorTerms(poseSpline, bias, model, g_w, times, measurements, invR)");
+	def("buildGyroscopeErrorTerms", buildGyroscopeErrorTermsNoGravity,
+			"buildGyroscopeErrorTerms(poseSpline, bias, model, times, measurements, invR)");
+
 }